@@ -121,6 +121,9 @@ import src.translator as translator
 import src.scsLogReader as LogReader
 from src.server import SendCrashReport, Ping
 import plugins.MSSScreenCapture.main as MSSScreenCapture
+import src.pipeline as pipeline
+from src.scheduler import pluginScheduler
+from src.governor import frameGovernor
 
 try:
     import importlib_metadata
@@ -224,6 +227,11 @@ def FindPlugins(reloadFully=False):
     global pluginObjects
     global pluginNames
     global splash
+    global pipelineBlockers
+    
+    # Don't change the plugins while the pipeline threads are running them
+    if mainPipeline != None:
+        mainPipeline.WaitIdle()
     
     try:
         mainUI.root.update()
@@ -277,12 +285,25 @@ def FindPlugins(reloadFully=False):
     for plugin in plugins:
         pluginObjects.append(__import__("plugins." + plugin.name + ".main", fromlist=["plugin", "UI", "PluginInfo", "onEnable"]))
         pluginObjects[-1].onEnable()
+    
+    scheduler.parallel = settings.GetSettings("Main Loop", "parallelPlugins", False)
+    scheduler.Plan(pluginObjects)
+    governor.frameBudget = settings.GetSettings("Main Loop", "frameBudget", 0) / 1000
+    
+    # Plugins that use the UI in their plugin function can only be run on the main thread (src/pipeline.py)
+    pipelineBlockers = pipeline.UnsafePlugins(pluginObjects)
+    if settings.GetSettings("Main Loop", "pipelined", False) and pipelineBlockers != []:
+        print(f"Running the main loop without pipelining, these plugins are not thread safe: {', '.join(pipelineBlockers)}")
         
     if closeAfter and hasRoot:
         splash.close()
         del splash
         
 def ReloadPluginCode():
+    # Don't reload the plugins while the pipeline threads are running them
+    if mainPipeline != None:
+        mainPipeline.WaitIdle()
+    
     keybinds = controls.ReadKeybindsVariable()
     FindPlugins()
     controls.WriteKeybindsVariable(keybinds)
@@ -326,27 +347,35 @@ def RunOnEnable():
             print(ex.args)
             pass
 
-def UpdatePlugins(dynamicOrder, data):
-    for plugin in pluginObjects:
-        try:
-            if plugin.PluginInfo.dynamicOrder == dynamicOrder:
-                startTime = time.time()
+scheduler = pluginScheduler()
+def RunPlugin(plugin, data):
+    try:
+        startTime = time.time()
 
-                pluginData = plugin.plugin(data)
-                
-                if pluginData != None:
-                    data = pluginData
-                else:
-                    print(f"Plugin '{plugin.PluginInfo.name}' returned NoneType instead of a the data variable. Please make sure that you return the data variable.")
+        pluginData = plugin.plugin(data)
+        
+        if pluginData is not None:
+            data = pluginData
+        else:
+            print(f"Plugin '{plugin.PluginInfo.name}' returned NoneType instead of a the data variable. Please make sure that you return the data variable.")
+        
+        endTime = time.time()    
+        data["executionTimes"][plugin.PluginInfo.name] = endTime - startTime
                 
-                endTime = time.time()    
-                data["executionTimes"][plugin.PluginInfo.name] = endTime - startTime
-                        
-        except Exception as ex:
-            print(ex.args[0] + f"[{plugin.PluginInfo.name}]")
-            pass
+    except Exception as ex:
+        print(ex.args[0] + f"[{plugin.PluginInfo.name}]")
+        pass
     return data
 
+governor = frameGovernor()
+def RunGovernedPlugin(plugin, data):
+    # Plugins over their maxExecTime are run in the background or skipped (src/governor.py)
+    return governor.Run(plugin, data, RunPlugin)
+
+def UpdatePlugins(dynamicOrder, data):
+    # The plan is made in FindPlugins() (src/scheduler.py)
+    return scheduler.Run(dynamicOrder, data, RunGovernedPlugin)
+
 def GetListOfAllPluginAndPanelNames():
     # Find plugins
     path = os.path.join(variables.PATH, "plugins")
@@ -529,17 +558,26 @@ def CheckLastKnownVersion():
         return
     
 def CloseAllPlugins():
+    global mainPipeline
+    if mainPipeline != None:
+        mainPipeline.Stop()
+        # LoadApplication makes a new one if the pipeline is still enabled
+        mainPipeline = None
+    
     for plugin in pluginObjects:
         plugin.onDisable()
         del plugin
         
 
 timesLoaded = 0
+mainPipeline = None
+pipelineBlockers = []
 def LoadApplication():
     global mainUI
     global uiUpdateRate
     global timesLoaded
     global splash
+    global mainPipeline
 
     if timesLoaded > 0:
         try:
@@ -612,6 +650,11 @@ def LoadApplication():
     if uiUpdateRate == None: 
         uiUpdateRate = 0
         settings.CreateSettings("User Interface", "updateRate", 0)
+    
+    # Run the capture, detection and controller stages on their own threads (src/pipeline.py)
+    if settings.GetSettings("Main Loop", "pipelined", False) and mainPipeline == None:
+        mainPipeline = pipeline.pipeline(UpdatePlugins)
+        mainPipeline.Start()
 
     CheckLastKnownVersion()
     # Show the root window
@@ -668,7 +711,7 @@ if __name__ == "__main__":
             
             # Remove "last" from the data and set it as this frame's "last"
             try: 
-                data.pop("last")
+                data.pop("last", None)
                 data = {
                     "last": data, 
                     "executionTimes": {}
@@ -725,6 +768,9 @@ if __name__ == "__main__":
                 GetEnabledPlugins()
                 FindPlugins()
                 variables.UPDATEPLUGINS = False
+            
+            # Tell the plugins about settings that have changed since the last frame
+            settings.NotifySubscribers()
                 
             for runner in helpers.runners:
                 # [duration, function, time.time(), args, kwargs]
@@ -804,17 +850,33 @@ if __name__ == "__main__":
                 continue
             
             
-            data = UpdatePlugins("before image capture", data)
-            data = UpdatePlugins("image capture", data)
-            
-            data = UpdatePlugins("before lane detection", data)
-            data = UpdatePlugins("lane detection", data)
-            
-            data = UpdatePlugins("before controller", data)
-            data = UpdatePlugins("controller", data)
-            
-            data = UpdatePlugins("before game", data)
-            data = UpdatePlugins("game", data)
+            if mainPipeline != None and pipelineBlockers == []:
+                # The pipeline threads run everything up to "game", continue with
+                # the newest frame that has gone through all of them.
+                mainPipeline.Submit(data)
+                # Wait a moment for the stages, so the loop doesn't spin (and skip the "last" plugins
+                # like the FPS limiter) while they are behind.
+                completed = mainPipeline.Collect(timeout=0.05)
+                if completed == None:
+                    # No new frame has gone through all the stages yet, keep the UI responsive.
+                    # The submitted frame belongs to the pipeline now, so give the UI its own dict.
+                    data = data["last"]
+                    mainUI.update({"last": data, "executionTimes": {}})
+                    variables.FRAMECOUNTER += 1
+                    continue
+                data = completed
+            else:
+                data = UpdatePlugins("before image capture", data)
+                data = UpdatePlugins("image capture", data)
+                
+                data = UpdatePlugins("before lane detection", data)
+                data = UpdatePlugins("lane detection", data)
+                
+                data = UpdatePlugins("before controller", data)
+                data = UpdatePlugins("controller", data)
+                
+                data = UpdatePlugins("before game", data)
+                data = UpdatePlugins("game", data)
             
             data = UpdatePlugins("before UI", data)
 
@@ -2,4 +2,6 @@
 ```
 data["frameFull"] | Entire display image
 data["frame"] | Cropped image based on the x,y,w,h values in the settings.
+data["frameTimestamp"] | When the frame was captured.
+data["frameSequence"] | Number of the frame, the same frame can be given to more than one main loop iteration.
 ```"""
\ No newline at end of file
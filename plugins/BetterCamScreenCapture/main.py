@@ -16,7 +16,10 @@ PluginInfo = PluginInformation(
     url="https://github.com/Tumppi066/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", # = Panel
     dynamicOrder="before lane detection", # Will run the plugin before anything else in the mainloop (data will be empty)
-    exclusive="ScreenCapture" # Will disable the other screen capture plugins
+    exclusive="ScreenCapture", # Will disable the other screen capture plugins
+    reads=[],
+    writes=["frameFull", "frame", "frameOriginal", "frameTimestamp", "frameSequence"],
+    maxExecTime=0
 )
 
 import tkinter as tk
@@ -25,6 +28,8 @@ import src.helpers as helpers
 import src.mainUI as mainUI
 import src.variables as variables
 import src.settings as settings
+import src.capture as capture
+import time
 import os
 import bettercam
 import _ctypes
@@ -40,13 +45,24 @@ def onEnable():
     pass
 
 def onDisable():
-    pass
+    capturer.Stop()
+
+def GrabFrame(buffers):
+    # bettercam makes a new array for each frame, so there are no buffers to capture into
+    frame = camera.grab()
+    if type(frame) == type(None):
+        return None
+    return [frame], None
+
+capturer = capture.captureThread(GrabFrame, name="BetterCamScreenCapture")
+sequence = 0
 
 monitor = None
 def CreateCamera():
     global camera
     global monitor
     global verifyWidthAndHeight
+    global threaded
     
     width = settings.GetSettings("bettercam", "width")
     if width == None:
@@ -78,6 +94,8 @@ def CreateCamera():
         settings.CreateSettings("bettercam", "device", 0)
         device = 0
 
+    threaded = settings.GetSettings("bettercam", "threaded", True)
+
     left, top = x, y
     right, bottom = left + width, top + height
 
@@ -148,10 +166,27 @@ def plugin(data):
         CreateCamera()
     
     try:
-        frame = camera.grab()
-        if type(frame) == type(None):
-            return data
+        global sequence
+        if threaded:
+            # The frames are captured in the background, only take the newest one
+            capturer.Start()
+            arrays, info, timestamp, frameSequence = capturer.Latest()
+            if arrays is None:
+                return data
+            frame = arrays[0]
+        else:
+            capturer.Stop()
+            frame = camera.grab()
+            if type(frame) == type(None):
+                return data
+            timestamp = time.time()
+            sequence += 1
+            frameSequence = sequence
         
+        data["frameTimestamp"] = timestamp
+        data["frameSequence"] = frameSequence
+        # The frame is read-only, plugins that draw on it make a copy with capture.Writable()
+        frame = capture.ReadOnly(frame)
         data["frameFull"] = frame
         # Crop the frame to the selected area
         frame = frame[monitor[1]:monitor[3], monitor[0]:monitor[2]]
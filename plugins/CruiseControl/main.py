@@ -16,7 +16,9 @@ PluginInfo = PluginInformation(
     url="https://github.com/Glas42/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", # = Panel
     dynamicOrder="before game", # Will run the plugin before anything else in the mainloop (data will be empty)
-    requires=["TruckSimAPI", "SDKController"]
+    requires=["TruckSimAPI", "SDKController"],
+    maxExecTime=0,
+    threadSafe=True
 )
 
 import tkinter as tk
@@ -25,6 +27,7 @@ import src.helpers as helpers
 import src.mainUI as mainUI
 import src.variables as variables
 import src.settings as settings
+import src.capture as capture
 import src.controls as controls
 from src.translator import Translate
 from tkinter import messagebox
@@ -40,6 +43,31 @@ controls.RegisterKeybind("Pause/Resume Automatic Acceleration",
                          notBoundInfo="Bind this if you use the CruiseControl\nplugin with automatic acceleration.",
                          description="Bind this if you use the CruiseControl\nplugin with automatic acceleration.")
 
+def ApplySettings(cruiseSettings):
+    global auto_enable
+    global stop_trafficlight
+    global trafficlight_accelerate
+    global auto_accelerate
+    global auto_hazard
+    global auto_stop
+    global show_symbols
+    global acceleration_strength
+    global brake_strength
+    global brakes_switch
+
+    auto_enable = cruiseSettings.get("auto_enable", True)
+    stop_trafficlight = cruiseSettings.get("stop_trafficlight", True)
+    trafficlight_accelerate = cruiseSettings.get("trafficlight_accelerate", True)
+    auto_accelerate = cruiseSettings.get("auto_accelerate", False)
+    auto_hazard = cruiseSettings.get("auto_hazard", True)
+    auto_stop = cruiseSettings.get("auto_stop", False)
+    show_symbols = cruiseSettings.get("show_symbols", True)
+    acceleration_strength = cruiseSettings.get("acceleration", 50)
+    acceleration_strength /= 100
+    brake_strength = cruiseSettings.get("brake", 100)
+    brake_strength /= 100
+    brakes_switch = cruiseSettings.get("brakes_switch", False)
+
 def UpdateSettings():
     global trafficlightdetectionisenabled
     global navigationdetectionisenabled
@@ -59,15 +87,6 @@ def UpdateSettings():
     global cruisecontrol_emergency_set
     global cruisecontrol_emergency_unset
     global cruisecontrol_emergency_slowed
-    global auto_enable
-    global stop_trafficlight
-    global trafficlight_accelerate
-    global auto_accelerate
-    global auto_hazard
-    global auto_stop
-    global show_symbols
-    global acceleration_strength
-    global brake_strength
     global cruisespeed_turn
     global cruisespeed_trafficlight
     global wait_for_response
@@ -96,7 +115,6 @@ def UpdateSettings():
     global pauseresume_allow
     global last_park_brake
     global turn_was_incoming
-    global brakes_switch
     global override_cruise_control
     
     if "TrafficLightDetection" in settings.GetSettings("Plugins", "Enabled", []):
@@ -142,19 +160,8 @@ def UpdateSettings():
     cruisecontrol_emergency_unset = cv2.imread(variables.PATH + r"\assets\CruiseControl\cruisecontrol_emergency_unset.png")
     cruisecontrol_emergency_slowed = cv2.imread(variables.PATH + r"\assets\CruiseControl\cruisecontrol_emergency_slowed.png")
 
-    auto_enable = settings.GetSettings("CruiseControl", "auto_enable", True)
-    stop_trafficlight = settings.GetSettings("CruiseControl", "stop_trafficlight", True)
-    trafficlight_accelerate = settings.GetSettings("CruiseControl", "trafficlight_accelerate", True)
-    auto_accelerate = settings.GetSettings("CruiseControl", "auto_accelerate", False)
-    auto_hazard = settings.GetSettings("CruiseControl", "auto_hazard", True)
-    auto_stop = settings.GetSettings("CruiseControl", "auto_stop", False)
-    show_symbols = settings.GetSettings("CruiseControl", "show_symbols", True)
-    acceleration_strength = settings.GetSettings("CruiseControl", "acceleration", 50)
-    acceleration_strength /= 100
-    brake_strength = settings.GetSettings("CruiseControl", "brake", 100)
-    brake_strength /= 100
+    ApplySettings(settings.GetSnapshot("CruiseControl"))
     turn_was_incoming = False
-    brakes_switch = settings.GetSettings("CruiseControl", "brakes_switch", False)
 
     cruisespeed_turn = 30
     cruisespeed_trafficlight = 0
@@ -319,6 +326,8 @@ def plugin(data):
         hazard_light = data["api"]["truckBool"]["lightsHazard"]
         park_brake = data["api"]["truckBool"]["parkBrake"]
         gamepaused = data["api"]["pause"]
+        # False when the game hasn't written new telemetry since the last frame
+        fresh = data["api"].get("fresh", True)
     except:
         speed = last_speed
         speedlimit = last_speedlimit
@@ -330,6 +339,7 @@ def plugin(data):
         hazard_light = False
         park_brake = False
         gamepaused = False
+        fresh = True
 
     if override_cruise_control == False:
         if speedlimit != 0 and speedlimit > 0:
@@ -384,8 +394,9 @@ def plugin(data):
             trafficlight_accelerate = False
             allow_acceleration = False
         else:
-            auto_accelerate = settings.GetSettings("CruiseControl", "auto_accelerate", False)
-            trafficlight_accelerate = settings.GetSettings("CruiseControl", "trafficlight_accelerate", True)
+            cruiseSettings = settings.GetSnapshot("CruiseControl")
+            auto_accelerate = cruiseSettings.get("auto_accelerate", False)
+            trafficlight_accelerate = cruiseSettings.get("trafficlight_accelerate", True)
             allow_acceleration = True
         pauseresume_allow = False
     elif controls.GetKeybindValue("Pause/Resume Automatic Acceleration") == False:
@@ -456,33 +467,35 @@ def plugin(data):
                         user_accelerating = False
                     data["sdk"]["brake"] = 0
         else:
+            # The cruise control buttons are only pressed on fresh telemetry, on a repeated frame the
+            # speeds are the same as last frame and the game can't have reacted to the last press yet
             if override_cruise_control:
-                if speed > 30 and cruisecontrolspeed == 0 and auto_enable == True and wait_for_response == False and targetspeed != 0:
+                if speed > 30 and cruisecontrolspeed == 0 and auto_enable == True and wait_for_response == False and targetspeed != 0 and fresh == True:
                     data["sdk"]["CruiseControl"] = True
                     wait_for_response = True
                     wait_for_response_timer = current_time
                     data["sdk"]["acceleration"] = 0
                     trafficlight_allow_acceleration = False
-                if cruisecontrolspeed != 0 and cruisecontrolspeed < targetspeed and wait_for_response == False and targetspeed != 0:
+                if cruisecontrolspeed != 0 and cruisecontrolspeed < targetspeed and wait_for_response == False and targetspeed != 0 and fresh == True:
                     data["sdk"]["CruiseControlIncrease"] = True
                     wait_for_response = True
                     wait_for_response_timer = current_time
-                if cruisecontrolspeed != 0 and cruisecontrolspeed > targetspeed and wait_for_response == False and targetspeed != 0:
+                if cruisecontrolspeed != 0 and cruisecontrolspeed > targetspeed and wait_for_response == False and targetspeed != 0 and fresh == True:
                     data["sdk"]["CruiseControlDecrease"] = True
                     wait_for_response = True
                     wait_for_response_timer = current_time
             else:
-                if speed > 30 and cruisecontrolspeed == 0 and auto_enable == True and wait_for_response == False and targetspeed != 0:
+                if speed > 30 and cruisecontrolspeed == 0 and auto_enable == True and wait_for_response == False and targetspeed != 0 and fresh == True:
                     data["sdk"]["CruiseControl"] = True
                     wait_for_response = True
                     wait_for_response_timer = current_time
                     data["sdk"]["acceleration"] = 0
                     trafficlight_allow_acceleration = False
-                if cruisecontrolspeed != 0 and cruisecontrolspeed < targetspeed and wait_for_response == False and targetspeed != 0:
+                if cruisecontrolspeed != 0 and cruisecontrolspeed < targetspeed and wait_for_response == False and targetspeed != 0 and fresh == True:
                     data["sdk"]["CruiseControlIncrease"] = True
                     wait_for_response = True
                     wait_for_response_timer = current_time
-                if cruisecontrolspeed != 0 and cruisecontrolspeed > targetspeed and wait_for_response == False and targetspeed != 0:
+                if cruisecontrolspeed != 0 and cruisecontrolspeed > targetspeed and wait_for_response == False and targetspeed != 0 and fresh == True:
                     data["sdk"]["CruiseControlDecrease"] = True
                     wait_for_response = True
                     wait_for_response_timer = current_time
@@ -588,7 +601,7 @@ def plugin(data):
     if show_symbols == True:
         if not brakes_switch:
             try:
-                frame = data["frame"]
+                frame = capture.Writable(data)
                 width = frame.shape[1]
                 height = frame.shape[0]
                 if frame is None: return data
@@ -699,7 +712,7 @@ def plugin(data):
     if allow_acceleration == False:
         if show_symbols == False:
             try:
-                frame = data["frame"]
+                frame = capture.Writable(data)
                 width = frame.shape[1]
                 height = frame.shape[0]
                 if frame is None: return data
@@ -757,10 +770,10 @@ def plugin(data):
 # Plugins need to all also have the onEnable and onDisable functions
 def onEnable():
     UpdateSettings()
-    pass
+    settings.Subscribe("CruiseControl", ApplySettings)
 
 def onDisable():
-    pass
+    settings.Unsubscribe("CruiseControl", ApplySettings)
 
 class UI():
     try: # The panel is in a try loop so that the logger can log errors if they occur
@@ -783,7 +796,6 @@ class UI():
             self.brake.set(self.brakeSlider.get())
             settings.CreateSettings("CruiseControl", "acceleration", self.accelerationSlider.get())
             settings.CreateSettings("CruiseControl", "brake", self.brakeSlider.get())
-            UpdateSettings()
         
         def exampleFunction(self):
             try:
@@ -810,14 +822,14 @@ class UI():
             self.root.pack(anchor="center", expand=False)
             self.root.update()
             
-            helpers.MakeCheckButton(generalFrame, "Automatically enable cruise control when available.", "CruiseControl", "auto_enable", 2, 0, width=90, callback=lambda: UpdateSettings())
-            helpers.MakeCheckButton(generalFrame, "Stop the truck when a red traffic light is detected.\n(requires that the TrafficLightDetection plugin is enabled)", "CruiseControl", "stop_trafficlight", 3, 0, width=90, callback=lambda: UpdateSettings())
-            helpers.MakeCheckButton(generalFrame, "Automatically accelerate when the red traffic light turns green.", "CruiseControl", "trafficlight_accelerate", 4, 0, width=90, callback=lambda: UpdateSettings())
-            helpers.MakeCheckButton(generalFrame, "Automatically accelerate to the target speed, even if your truck is standing still.\n(if you disable the steering or pause this feature, the truck will not accelerate to the target speed)", "CruiseControl", "auto_accelerate", 5, 0, width=90, callback=lambda: UpdateSettings())
-            helpers.MakeCheckButton(generalFrame, "Automatically enable the hazard light, when the user does a emergency stop.", "CruiseControl", "auto_hazard", 6, 0, width=90, callback=lambda: UpdateSettings())
-            helpers.MakeCheckButton(generalFrame, "Automatically come to a stop and enable the hazard light if no lane is detected. (Doesnt work with nav ai)", "CruiseControl", "auto_stop", 7, 0, width=90, callback=lambda: UpdateSettings())
-            helpers.MakeCheckButton(generalFrame, "Show Cruise Control symbol in the Lane Assist window. (ShowImage Plugin)", "CruiseControl", "show_symbols", 8, 0, width=90, callback=lambda: UpdateSettings())
-            helpers.MakeCheckButton(generalFrame, "Switch from in-game cruise control to manual acceleration and braking (BETA)", "CruiseControl", "brakes_switch", 9, 0, width=90, callback=lambda: UpdateSettings())
+            helpers.MakeCheckButton(generalFrame, "Automatically enable cruise control when available.", "CruiseControl", "auto_enable", 2, 0, width=90)
+            helpers.MakeCheckButton(generalFrame, "Stop the truck when a red traffic light is detected.\n(requires that the TrafficLightDetection plugin is enabled)", "CruiseControl", "stop_trafficlight", 3, 0, width=90)
+            helpers.MakeCheckButton(generalFrame, "Automatically accelerate when the red traffic light turns green.", "CruiseControl", "trafficlight_accelerate", 4, 0, width=90)
+            helpers.MakeCheckButton(generalFrame, "Automatically accelerate to the target speed, even if your truck is standing still.\n(if you disable the steering or pause this feature, the truck will not accelerate to the target speed)", "CruiseControl", "auto_accelerate", 5, 0, width=90)
+            helpers.MakeCheckButton(generalFrame, "Automatically enable the hazard light, when the user does a emergency stop.", "CruiseControl", "auto_hazard", 6, 0, width=90)
+            helpers.MakeCheckButton(generalFrame, "Automatically come to a stop and enable the hazard light if no lane is detected. (Doesnt work with nav ai)", "CruiseControl", "auto_stop", 7, 0, width=90)
+            helpers.MakeCheckButton(generalFrame, "Show Cruise Control symbol in the Lane Assist window. (ShowImage Plugin)", "CruiseControl", "show_symbols", 8, 0, width=90)
+            helpers.MakeCheckButton(generalFrame, "Switch from in-game cruise control to manual acceleration and braking (BETA)", "CruiseControl", "brakes_switch", 9, 0, width=90)
             
             self.accelerationSlider = tk.Scale(generalFrame, from_=0, to=100, resolution=1, orient=tk.HORIZONTAL, length=480, command=lambda x: self.UpdateScaleValueFromSlider())
             self.accelerationSlider.set(settings.GetSettings("CruiseControl", "acceleration", 50))
@@ -29,7 +29,8 @@ PluginInfo = PluginInformation(
     author="SafwanChowdhury",
     url="https://github.com/SafwanChowdhury/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic",
-    dynamicOrder="last"
+    dynamicOrder="last",
+    maxExecTime=0
 )
 
 # Configuration
@@ -14,7 +14,10 @@ PluginInfo = PluginInformation(
     author="DylDev",
     url="https://github.com/Tumppi066/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic",
-    dynamicOrder="before lane detection"
+    dynamicOrder="before lane detection",
+    reads=["frameFull"],
+    writes=[],
+    threadSafe=True
 )
 
 import tkinter as tk
@@ -224,7 +227,7 @@ def plugin(data):
             return data
         
         fullframe = data["frameFull"]
-        frame = fullframe.copy()[y1:y2, x1:x2]
+        frame = fullframe[y1:y2, x1:x2].copy()
 
         threading.Thread(target=SendImage, args=(frame,), daemon=True).start()
         last_capture = time.time()
@@ -251,8 +254,8 @@ def plugin(data):
             return data
 
         fullframe = data["frameFull"]
-        left_mirror = fullframe.copy()[mirror_coords[0][1]:mirror_coords[0][3], mirror_coords[0][0]:mirror_coords[0][2]]
-        right_mirror = fullframe.copy()[mirror_coords[1][1]:mirror_coords[1][3], mirror_coords[1][0]:mirror_coords[1][2]]
+        left_mirror = fullframe[mirror_coords[0][1]:mirror_coords[0][3], mirror_coords[0][0]:mirror_coords[0][2]].copy()
+        right_mirror = fullframe[mirror_coords[1][1]:mirror_coords[1][3], mirror_coords[1][0]:mirror_coords[1][2]].copy()
 
         if last_github_version_check + 1800 < time.time():
             github_version = str(requests.get("https://raw.githubusercontent.com/ETS2LA/Euro-Truck-Simulator-2-Lane-Assist/main/version.txt").text.strip())
@@ -16,7 +16,9 @@ PluginInfo = PluginInformation(
     url="https://github.com/Tumppi066/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", # = Panel
     dynamicOrder="before controller", # Will run the plugin before anything else in the mainloop (data will be empty)
-    requires=["TruckSimAPI"]
+    requires=["TruckSimAPI"],
+    maxExecTime=0,
+    threadSafe=True
 )
 
 import tkinter as tk
@@ -25,6 +27,7 @@ import src.helpers as helpers
 import src.mainUI as mainUI
 import src.variables as variables
 import src.settings as settings
+import src.capture as capture
 import src.sounds as sounds
 from src.translator import Translate
 import os
@@ -56,17 +59,17 @@ def onEnable():
 def onDisable():
     pass
 
-def verifySetting(category, key, default):
-    value = settings.GetSettings(category, key)
+def verifySetting(steeringSettings, key, default):
+    value = steeringSettings.get(key)
     
     if value == None:
         value = default
-        settings.CreateSettings(category, key, default)
+        settings.CreateSettings("DefaultSteering", key, default)
         
     return value
 
 lastWheelIndex = -1
-def updateSettings():
+def updateSettings(steeringSettings):
     global lastWheelIndex
     global maximumControl
     global controlSmoothness
@@ -76,28 +79,28 @@ def updateSettings():
     global gamepadSmoothness
     global enableDisable
     global keyboard
-    global lanechangingnavdetection
     global keyboardSensitivity
     global keyboardReturnSensitivity
         
-    maximumControl = verifySetting("DefaultSteering", "maximumControl", 1.0)
-    controlSmoothness = verifySetting("DefaultSteering", "smoothness", 4)
-    sensitivity = verifySetting("DefaultSteering", "sensitivity", 0.4)
-    offset = verifySetting("DefaultSteering", "offset", 0)
-    gamepadMode = verifySetting("DefaultSteering", "gamepad", False)
-    gamepadSmoothness = verifySetting("DefaultSteering", "gamepadSmoothness", 0.05)
-    enableDisable = verifySetting("DefaultSteering", "enableDisable", 5)
+    maximumControl = verifySetting(steeringSettings, "maximumControl", 1.0)
+    controlSmoothness = verifySetting(steeringSettings, "smoothness", 4)
+    sensitivity = verifySetting(steeringSettings, "sensitivity", 0.4)
+    offset = verifySetting(steeringSettings, "offset", 0)
+    gamepadMode = verifySetting(steeringSettings, "gamepad", False)
+    gamepadSmoothness = verifySetting(steeringSettings, "gamepadSmoothness", 0.05)
+    enableDisable = verifySetting(steeringSettings, "enableDisable", 5)
     
-    keyboard = verifySetting("DefaultSteering", "keyboard", False)
+    keyboard = verifySetting(steeringSettings, "keyboard", False)
     
-    keyboardSensitivity = verifySetting("DefaultSteering", "keyboardSensitivity", 0.5)
-    keyboardReturnSensitivity = verifySetting("DefaultSteering", "keyboardReturnSensitivity", 0.2)
+    keyboardSensitivity = verifySetting(steeringSettings, "keyboardSensitivity", 0.5)
+    keyboardReturnSensitivity = verifySetting(steeringSettings, "keyboardReturnSensitivity", 0.2)
 
-    lanechangingnavdetection = settings.GetSettings("NavigationDetectionV2", "lanechanging", True)
-    
-    helpers.ShowPopup("\nLoaded settings...", "DefaultSteering", timeout=1.5)
+def updateNavigationSettings(navigationSettings):
+    global lanechangingnavdetection
+    lanechangingnavdetection = navigationSettings.get("lanechanging", True)
     
-updateSettings()
+settings.Subscribe("DefaultSteering", updateSettings)
+settings.Subscribe("NavigationDetectionV2", updateNavigationSettings)
 
 # MOST OF THIS FILE IS COPIED FROM THE OLD VERSION
 desiredControl = 0
@@ -198,7 +201,7 @@ def plugin(data):
                 IndicatingLeft = False
                 IndicatingRight = False
             if IndicatingLeft == True or IndicatingRight == True:
-                if "NavigationDetection" in settings.GetSettings("Plugins", "Enabled"):
+                if "NavigationDetection" in settings.GetSnapshot("Plugins").get("Enabled", ()):
                     IndicatingLeft = False
                     IndicatingRight = False
 
@@ -290,7 +293,7 @@ def plugin(data):
             else:
                 IndicatingRight_original = False
             if IndicatingLeft == True or IndicatingRight == True:
-                if "NavigationDetection" in settings.GetSettings("Plugins", "Enabled"):
+                if "NavigationDetection" in settings.GetSnapshot("Plugins").get("Enabled", ()):
                     IndicatingLeft = False
                     IndicatingRight = False
 
@@ -308,7 +311,8 @@ def plugin(data):
                 steeringAxisValue = controls.GetKeybindValue("Steering Axis")
                 # Check if the SDK controller is enabled and vgamepad is not
                 try:
-                    if "SDKController" in settings.GetSettings("Plugins", "Enabled") and "VGamepadController" not in settings.GetSettings("Plugins", "Enabled"):
+                    enabledPlugins = settings.GetSnapshot("Plugins").get("Enabled", ())
+                    if "SDKController" in enabledPlugins and "VGamepadController" not in enabledPlugins:
                         steeringAxisValue = 0 # Don't pass the users control values to the game
                 except:
                     steeringAxisValue = 0 # Don't pass the users control values to the game
@@ -370,7 +374,7 @@ def plugin(data):
             try:
                 output_img = cv2.cvtColor(data["frame"], cv2.COLOR_GRAY2RGB)
             except:
-                output_img = data["frame"]
+                output_img = capture.Writable(data)
             w = output_img.shape[1]
             h = output_img.shape[0]
             
@@ -431,7 +435,7 @@ def plugin(data):
             try:
                 output_img = cv2.cvtColor(data["frame"], cv2.COLOR_GRAY2RGB)
             except:
-                output_img = data["frame"]
+                output_img = capture.Writable(data)
             w = output_img.shape[1]
             h = output_img.shape[0]
             
@@ -610,7 +614,7 @@ class UI():
             # settings.CreateSettings("DefaultSteering", "leftIndicatorKey", self.leftIndicatorKey.get())
             settings.CreateSettings("DefaultSteering", "keyboardSensitivity", self.keyboardSensitivity.get())
             settings.CreateSettings("DefaultSteering", "keyboardReturnSensitivity", self.keyboardReturnSens.get())
-            updateSettings()
+            helpers.ShowPopup("\nLoaded settings...", "DefaultSteering", timeout=1.5)
             
         
         def update(self, data): # When the panel is open this function is called each frame 
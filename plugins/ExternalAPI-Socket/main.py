@@ -13,7 +13,8 @@ PluginInfo = PluginInformation(
     author="Tumppi066 & SafwanChowdhury",
     url="https://github.com/SafwanChowdhury/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", # = Panel
-    dynamicOrder="last" # Will run the plugin before anything else in the mainloop (data will be empty)
+    dynamicOrder="last", # Will run the plugin before anything else in the mainloop (data will be empty)
+    maxExecTime=0
 )
 
 import tkinter as tk
@@ -14,7 +14,8 @@ PluginInfo = PluginInformation(
     author="Tumppi066",
     url="https://github.com/Tumppi066/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", # = Panel
-    dynamicOrder="last" # Will run the plugin before anything else in the mainloop (data will be empty)
+    dynamicOrder="last", # Will run the plugin before anything else in the mainloop (data will be empty)
+    maxExecTime=0 # The plugin sleeps, so it would always be over the limit
 )
 
 import tkinter as tk
@@ -47,6 +48,9 @@ def plugin(data):
     # Calculate the ms so far this frame
     executionTime = 0
     for plugin in data["executionTimes"]:
+        # Counters are stored as ints, only the floats are times
+        if type(data["executionTimes"][plugin]) == int:
+            continue
         executionTime += float(data["executionTimes"][plugin])
     
     # Calculate the ms needed to reach the desired FPS
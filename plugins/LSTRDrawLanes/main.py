@@ -14,7 +14,8 @@ PluginInfo = PluginInformation(
     author="Tumppi066",
     url="https://github.com/Tumppi066/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", 
-    dynamicOrder="before game"
+    dynamicOrder="before game",
+    threadSafe=True
 )
 
 import tkinter as tk
@@ -13,7 +13,9 @@ PluginInfo = PluginInformation(
     url="https://github.com/Tumppi066/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", # = Panel
     dynamicOrder="lane detection", # Will run the plugin before anything else in the mainloop (data will be empty)
-    exclusive="LaneDetection" # Will disable the other screen capture plugins
+    exclusive="LaneDetection", # Will disable the other screen capture plugins
+    maxExecTime=0,
+    threadSafe=True
 )
 
 import tkinter as tk
@@ -22,6 +24,8 @@ import src.helpers as helpers
 import src.mainUI as mainUI
 import src.variables as variables
 import src.settings as settings
+import src.capture as capture
+import src.inferenceService as inferenceService
 import os
 import cv2
 import numpy as np
@@ -104,7 +108,7 @@ def onEnable():
     pass
 
 def onDisable():
-    pass
+    inferenceService.Forget("LSTRLaneDetection")
 
 # The main file runs the "plugin" function each time the plugin is called
 # The data variable contains the data from the mainloop, plugins can freely add and modify data as needed
@@ -120,14 +124,27 @@ def plugin(data):
                 modelName = discover_models()[0]
             print("Model successful: " + str(load_model(modelName)))
             
+        try:
+            paused = data["api"]["pause"] == True
+        except:
+            paused = False
+        if paused:
+            # Don't steer with lanes from before the pause once the game is running again
+            inferenceService.Forget("LSTRLaneDetection")
+            return data
+            
         if model is not None:
-            points, ids, difference = detect_lanes(frame)
+            # Runs in the background, the lanes can be from an older frame until the model is done
+            result, resultSequence = inferenceService.Infer("LSTRLaneDetection", detect_lanes, frame, data.get("frameSequence"), maxAge=1)
+            if result == None:
+                return data
+            points, ids, difference = result
             
             data["LSTR"] = {}
             data["LSTR"]["points"] = points
             data["LSTR"]["ids"] = ids
             
-            frame = data["frame"]
+            frame = capture.Writable(data)
             # Add a point for the middle of the lane
             try:
                 cv2.circle(frame, (int(difference), int(frame.shape[0]- 10)), 5, (0,0,255), -1, cv2.LINE_AA)
@@ -14,7 +14,9 @@ PluginInfo = PluginInformation(
     author="Tumppi066",
     url="https://github.com/Tumppi066/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", # = Panel
-    dynamicOrder="before controller" # Will run the plugin before anything else in the mainloop (data will be empty)
+    dynamicOrder="before controller", # Will run the plugin before anything else in the mainloop (data will be empty)
+    threadSafe=True,
+    maxExecTime=0
 )
 
 import tkinter as tk
@@ -13,26 +13,83 @@ PluginInfo = PluginInformation(
     url="https://github.com/Tumppi066/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", # = Panel
     dynamicOrder="before lane detection", # Will run the plugin before anything else in the mainloop (data will be empty)
-    exclusive="ScreenCapture" # Will disable the other screen capture plugins
+    exclusive="ScreenCapture", # Will disable the other screen capture plugins
+    reads=[],
+    writes=["frameFull", "frame", "frameOriginal", "frameTimestamp", "frameSequence"],
+    maxExecTime=0,
+    threadSafe=True
 )
 
 import src.settings as settings
 import src.helpers as helpers
+import src.capture as capture
 from src.logger import print
 from PIL import Image
 import tkinter as tk
 import numpy as np
+import threading
 import pyautogui
+import time
 import mss
 import cv2
 
 sct = mss.mss()
+local = threading.local()
+sequence = 0
+
+def GetSct():
+    # mss instances can't be shared between threads, a lazy frameFull can be read from the pipeline threads
+    if threading.current_thread() is threading.main_thread():
+        return sct
+    if not hasattr(local, "sct"):
+        local.sct = mss.mss()
+    return local.sct
+
+def GrabRect(screen, rect, out=None):
+    """Capture a rectangle of the screen as BGR.
+
+    Args:
+        screen (dict): The mss monitor.
+        rect (tuple): (left, top, right, bottom) on the monitor.
+        out (np.ndarray, optional): Buffer to convert the pixels into, if it has the right shape.
+
+    Returns:
+        np.ndarray: The pixels.
+    """
+    if rect[2] <= rect[0] or rect[3] <= rect[1]:
+        return np.zeros((max(0, rect[3] - rect[1]), max(0, rect[2] - rect[0]), 3), np.uint8)
+    area = {"left": screen["left"] + rect[0], "top": screen["top"] + rect[1], "width": rect[2] - rect[0], "height": rect[3] - rect[1]}
+    pixels = np.asarray(GetSct().grab(area))
+    if out is not None and out.shape == (area["height"], area["width"], 3):
+        return cv2.cvtColor(pixels, cv2.COLOR_BGRA2BGR, dst=out)
+    return cv2.cvtColor(pixels, cv2.COLOR_BGRA2BGR)
+
+def GrabRegions(buffers):
+    """Capture the selected area and the regions other plugins have requested.
+
+    Args:
+        buffers (list): Buffers from the last time, see capture.captureThread.
+
+    Returns:
+        tuple: (arrays, (screen, rects, ownRegion))
+    """
+    screen = GetSct().monitors[(display + 1)]
+    ownRegion = capture.ClampRegion(monitor, screen["width"], screen["height"])
+    rects = capture.MergeRegions([ownRegion] + [capture.ClampRegion(region, screen["width"], screen["height"]) for region in list(capture.regions.values())])
+    arrays = []
+    for i, rect in enumerate(rects):
+        out = buffers[i] if buffers != None and i < len(buffers) else None
+        arrays.append(GrabRect(screen, rect, out))
+    return arrays, (screen, rects, ownRegion)
+
+capturer = capture.captureThread(GrabRegions, name="MSSScreenCapture")
 
 def CreateCamera():
     global width
     global height
     global display
     global monitor
+    global threaded
     
     width = settings.GetSettings("bettercam", "width")
     if width == None:
@@ -59,6 +116,8 @@ def CreateCamera():
         settings.CreateSettings("bettercam", "display", 0)
         display = 0
 
+    threaded = settings.GetSettings("bettercam", "threaded", True)
+
     left, top = x, y
     right, bottom = left + width, top + height
     monitor = (left,top,right,bottom)
@@ -69,7 +128,7 @@ def onEnable():
     pass
 
 def onDisable():
-    pass
+    capturer.Stop()
 
 # The main file runs the "plugin" function each time the plugin is called
 # The data variable contains the data from the mainloop, plugins can freely add and modify data as needed
@@ -83,14 +142,32 @@ def plugin(data):
         CreateCamera()
     
     try:
-        # Capture full screen once
-        frame = cv2.cvtColor(np.array(sct.grab(sct.monitors[(display + 1)])), cv2.COLOR_BGRA2BGR)
-        # Save the full frame
-        data["frameFull"] = frame
-        # Crop the frame to the selected area and save
-        data["frame"] = frame[monitor[1]:monitor[3], monitor[0]:monitor[2]]
-        # Save a copy of the original cropped frame
-        data["frameOriginal"] = data["frame"].copy()
+        global sequence
+        if threaded:
+            # The frames are captured in the background, only take the newest one
+            capturer.Start()
+            arrays, info, timestamp, frameSequence = capturer.Latest()
+            if arrays is None:
+                # Wait for the first frame
+                arrays, info, timestamp, frameSequence = capturer.Wait(0, timeout=1)
+                if arrays is None:
+                    return data
+        else:
+            capturer.Stop()
+            arrays, info = GrabRegions(None)
+            timestamp = time.time()
+            sequence += 1
+            frameSequence = sequence
+
+        screen, rects, ownRegion = info
+        # The full frame is only captured if a plugin uses the parts that aren't in the regions
+        frameFull = capture.regionFrame(screen["width"], screen["height"], lambda rect: GrabRect(screen, rect), zip(rects, [capture.ReadOnly(array) for array in arrays]))
+        data["frameFull"] = frameFull
+        data["frame"] = frameFull.Region(ownRegion)
+        # The frame is read-only, plugins that draw on it make a copy with capture.Writable()
+        data["frameOriginal"] = data["frame"]
+        data["frameTimestamp"] = timestamp
+        data["frameSequence"] = frameSequence
         return data
     except Exception as ex:
         print(ex)
@@ -15,7 +15,9 @@ PluginInfo = PluginInformation(
     url="https://github.com/Tumppi066/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", # = Panel
     dynamicOrder="lane detection", # Will run the plugin before anything else in the mainloop (data will be empty)
-    noUI=True
+    noUI=True,
+    reads=["api", "last"],
+    writes=["GPS"]
 )
 
 # TODO: We could maybe use the direction the road is moving to rotate the prefabs the correct way?
@@ -106,7 +108,10 @@ def plugin(data):
         cv2.resizeWindow("Roads", 1000, 1000)
         cv2.waitKey(1)
     
-    if useExternalVisualization:
+    # The truck hasn't moved since the last frame, so the roads around it are the same as well
+    if useExternalVisualization and not data["api"].get("fresh", True) and "GPS" in data["last"]:
+        data["GPS"] = data["last"]["GPS"]
+    elif useExternalVisualization:
         x = data["api"]["truckPlacement"]["coordinateX"]
         y = -data["api"]["truckPlacement"]["coordinateZ"]
         
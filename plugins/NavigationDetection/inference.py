@@ -0,0 +1,211 @@
+"""
+Preprocessing and inference for NavigationDetectionAI.
+
+The preprocessor keeps its buffers and the input tensor between frames, so each frame only fills them
+instead of allocating new ones. The model can be run with PyTorch or, if onnxruntime is installed,
+with an ONNX Runtime CPU session exported from the TorchScript model:
+```python
+settings.GetSettings("NavigationDetection", "AIBackend", "torch") # "torch" or "onnx"
+```
+
+The backends can be compared with the benchmark:
+```
+python -m plugins.NavigationDetection.inference <model.pt> <image width> <image height> [route advisor image]
+```
+"""
+from src.logger import print
+import numpy as np
+import time
+import sys
+import cv2
+import os
+
+lower_red = np.array([0, 0, 160])
+upper_red = np.array([110, 110, 255])
+
+class preprocessor:
+    """Turns the captured route advisor into the input of the AI model.
+
+    Args:
+        imageWidth (int): Width of the model input.
+        imageHeight (int): Height of the model input.
+        device (torch.device): Where the input tensor is used.
+    """
+    def __init__(self, imageWidth, imageHeight, device):
+        import torch
+        self.size = (imageWidth, imageHeight)
+        self.device = device
+        self.mask = None
+        self.resized = np.empty((imageHeight, imageWidth), np.uint8)
+        self.input = torch.empty((1, 1, imageHeight, imageWidth), dtype=torch.float32)
+        self.inputArray = self.input.numpy()[0, 0]
+        """The input tensor as a numpy array, they share the same memory."""
+        if str(device) == "cpu":
+            self.deviceInput = self.input
+        else:
+            self.input = self.input.pin_memory()
+            self.inputArray = self.input.numpy()[0, 0]
+            self.deviceInput = torch.empty((1, 1, imageHeight, imageWidth), dtype=torch.float32, device=device)
+
+    def Mask(self, frame):
+        """Find the red navigation line.
+
+        Args:
+            frame (np.ndarray): The captured route advisor (BGR).
+
+        Returns:
+            np.ndarray: The mask, it's overwritten on the next call.
+        """
+        height, width = frame.shape[:2]
+        if self.mask is None or self.mask.shape != (height, width):
+            self.mask = np.empty((height, width), np.uint8)
+        cv2.inRange(frame, lower_red, upper_red, dst=self.mask)
+        # The corners of the route advisor are ignored (the same areas that used to be blacked out with cv2.rectangle)
+        self.mask[0:round(height/3) + 1, 0:round(width/6) + 1] = 0
+        self.mask[0:round(height/3) + 1, round(width - width/6):width] = 0
+        return self.mask
+
+    def Input(self, mask):
+        """Resize and normalize the mask into the input tensor.
+
+        Returns:
+            torch.Tensor: The input tensor (1, 1, height, width), it's overwritten on the next call.
+        """
+        cv2.resize(mask, self.size, dst=self.resized)
+        np.divide(self.resized, np.float32(255), out=self.inputArray)
+        if self.deviceInput is not self.input:
+            self.deviceInput.copy_(self.input, non_blocking=True)
+        return self.deviceInput
+
+class torchBackend:
+    """Runs the TorchScript model with PyTorch.
+
+    Args:
+        model (torch.jit.ScriptModule): The loaded model.
+        device (torch.device): The device the model is on.
+    """
+    name = "torch"
+    def __init__(self, model, device):
+        self.model = model
+        self.device = device
+
+    def Run(self, input):
+        import torch
+        with torch.inference_mode():
+            return self.model(input).tolist()
+
+class onnxBackend:
+    """Runs the model with an ONNX Runtime CPU session. The model is exported next to the
+    TorchScript file the first time (and again if the TorchScript file is newer).
+
+    Args:
+        model (torch.jit.ScriptModule): The loaded model.
+        modelPath (str): Path to the TorchScript file.
+        imageWidth (int): Width of the model input.
+        imageHeight (int): Height of the model input.
+        device (torch.device): The device the model is on.
+    """
+    name = "onnx"
+    def __init__(self, model, modelPath, imageWidth, imageHeight, device):
+        import onnxruntime
+        import torch
+        path = os.path.splitext(modelPath)[0] + ".onnx"
+        if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(modelPath):
+            print("Exporting the AI model to ONNX...")
+            with torch.inference_mode():
+                torch.onnx.export(model, torch.zeros((1, 1, imageHeight, imageWidth), dtype=torch.float32, device=device), path, input_names=["image"], output_names=["output"])
+        self.session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+        self.inputName = self.session.get_inputs()[0].name
+        self.device = torch.device("cpu")
+
+    def Run(self, input):
+        return self.session.run(None, {self.inputName: input.numpy()})[0].tolist()
+
+def CreateBackend(name, model, modelPath, imageWidth, imageHeight, device):
+    """Create the backend with the given name, falls back to PyTorch if it's not available.
+
+    Args:
+        name (str): "torch" or "onnx".
+
+    Returns:
+        torchBackend | onnxBackend: The backend.
+    """
+    if name == "onnx":
+        try:
+            return onnxBackend(model, modelPath, imageWidth, imageHeight, device)
+        except Exception as ex:
+            print(f"Failed to create the ONNX Runtime session, using PyTorch instead: {ex}")
+    return torchBackend(model, device)
+
+def Benchmark(backends, imageWidth, imageHeight, frame, runs=200):
+    """Measure the end to end latency (preprocessing and inference) of each backend.
+
+    Args:
+        backends (list): The backends to compare.
+        imageWidth (int): Width of the model input.
+        imageHeight (int): Height of the model input.
+        frame (np.ndarray): A captured route advisor (BGR).
+        runs (int, optional): How many frames to run through each backend. Defaults to 200.
+
+    Returns:
+        dict: backend name -> {"preprocess", "inference", "total"} average milliseconds per frame.
+    """
+    import torch
+    results = {}
+    for backend in backends:
+        pre = preprocessor(imageWidth, imageHeight, backend.device)
+        # The first runs are slower (allocations, lazy initialization), they are not counted
+        for i in range(10):
+            backend.Run(pre.Input(pre.Mask(frame)))
+
+        preprocessTime = 0
+        inferenceTime = 0
+        for i in range(runs):
+            start = time.perf_counter()
+            input = pre.Input(pre.Mask(frame))
+            if str(backend.device) != "cpu":
+                torch.cuda.synchronize()
+            preprocessed = time.perf_counter()
+            backend.Run(input)
+            end = time.perf_counter()
+            preprocessTime += preprocessed - start
+            inferenceTime += end - preprocessed
+
+        results[backend.name] = {
+            "preprocess": preprocessTime / runs * 1000,
+            "inference": inferenceTime / runs * 1000,
+            "total": (preprocessTime + inferenceTime) / runs * 1000
+        }
+    return results
+
+if __name__ == "__main__":
+    import torch
+    if len(sys.argv) < 4:
+        print("Usage: python -m plugins.NavigationDetection.inference <model.pt> <image width> <image height> [route advisor image]")
+        sys.exit(1)
+
+    modelPath = sys.argv[1]
+    imageWidth = int(sys.argv[2])
+    imageHeight = int(sys.argv[3])
+    if len(sys.argv) > 4:
+        frame = cv2.imread(sys.argv[4])
+    else:
+        # A red line through the middle of an empty route advisor
+        frame = np.zeros((300, 400, 3), np.uint8)
+        cv2.line(frame, (200, 300), (180, 0), (0, 0, 255), 12)
+
+    device = torch.device("cpu")
+    model = torch.jit.load(modelPath, map_location=device)
+    model.eval()
+    backends = [torchBackend(model, device)]
+    if torch.cuda.is_available():
+        cudaDevice = torch.device("cuda")
+        backends.append(torchBackend(torch.jit.load(modelPath, map_location=cudaDevice).eval(), cudaDevice))
+        backends[-1].name = "torch (cuda)"
+    try:
+        backends.append(onnxBackend(model, modelPath, imageWidth, imageHeight, device))
+    except Exception as ex:
+        print(f"ONNX Runtime not available: {ex}")
+
+    for name, result in Benchmark(backends, imageWidth, imageHeight, frame).items():
+        print(f"{name}: {result['total']:.2f} ms ({result['preprocess']:.2f} ms preprocessing, {result['inference']:.2f} ms inference)")
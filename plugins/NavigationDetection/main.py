@@ -8,7 +8,11 @@ PluginInfo = PluginInformation(
     type="dynamic",
     dynamicOrder="lane detection",
     exclusive="LaneDetection",
-    requires=["DefaultSteering", "bettercamScreenCapture", "TruckSimAPI", "SDKController"]
+    requires=["DefaultSteering", "bettercamScreenCapture", "TruckSimAPI", "SDKController"],
+    reads=["frame", "frameFull", "api", "TrafficLightDetection", "sdk"],
+    writes=["frame", "LaneDetection", "NavigationDetection", "sdk"],
+    maxExecTime=0,
+    threadSafe=True
 )
 
 from src.mainUI import switchSelectedPlugin
@@ -17,6 +21,8 @@ from src.translator import Translate
 from src.mainUI import resizeWindow
 import src.variables as variables
 import src.settings as settings
+import src.capture as capture
+import src.inferenceService as inferenceService
 import src.controls as controls
 import src.console as console
 import src.helpers as helpers
@@ -27,6 +33,7 @@ from tkinter import ttk
 import tkinter as tk
 
 import plugins.DefaultSteering.main as DefaultSteering
+import plugins.NavigationDetection.inference as inference
 import subprocess
 import threading
 import traceback
@@ -270,14 +277,19 @@ def get_text_size(text="NONE", text_width=100, max_text_height=100):
     return text, fontscale, thickness, textsize[0], textsize[1]
 
 
-def preprocess_image(image):
-    image = np.array(image)
-    image = cv2.resize(image, (IMG_WIDTH, IMG_HEIGHT))
-    image = np.array(image, dtype=np.float32) / 255.0
-    transform = transforms.Compose([
-        transforms.ToTensor(),
-    ])
-    return transform(image).unsqueeze(0).to(AIDevice)
+AIPreprocessor = None
+AIBackend = None
+def GetAIPreprocessor():
+    """Get the preprocessor for the current model, a new one is made if the model input size or device changed."""
+    global AIPreprocessor
+    device = AIBackend.device if AIBackend != None else AIDevice
+    if AIPreprocessor == None or AIPreprocessor.size != (IMG_WIDTH, IMG_HEIGHT) or AIPreprocessor.device != device:
+        AIPreprocessor = inference.preprocessor(IMG_WIDTH, IMG_HEIGHT, device)
+    return AIPreprocessor
+
+def RunAIModel(mask):
+    # Run by the inference service, only this uses the input buffers of the preprocessor
+    return AIBackend.Run(GetAIPreprocessor().Input(mask))
 
 
 def HandleCorruptedAIModel():
@@ -300,6 +312,7 @@ def LoadAIModel():
                 global LoadAIProgress
                 global AIModel
                 global AIModelLoaded
+                global AIBackend
 
                 CheckForAIModelUpdates()
                 while AIModelUpdateThread.is_alive(): time.sleep(0.1)
@@ -317,11 +330,15 @@ def LoadAIModel():
                 ModelFileCorrupted = False
 
                 try:
-                    AIModel = torch.jit.load(os.path.join(f"{variables.PATH}plugins/NavigationDetection/AIModel", GetAIModelName()), map_location=AIDevice)
+                    modelPath = os.path.join(f"{variables.PATH}plugins/NavigationDetection/AIModel", GetAIModelName())
+                    AIModel = torch.jit.load(modelPath, map_location=AIDevice)
                     AIModel.eval()
                 except:
                     ModelFileCorrupted = True
 
+                if ModelFileCorrupted == False:
+                    AIBackend = inference.CreateBackend(settings.GetSettings("NavigationDetection", "AIBackend", "torch"), AIModel, modelPath, IMG_WIDTH, IMG_HEIGHT, AIDevice)
+
                 if ModelFileCorrupted == False:
                     print("\033[92m" + f"Successfully loaded the AI model!" + "\033[0m")
                     AIModelLoaded = True
@@ -547,6 +564,56 @@ if UseAI:
         console.RestoreConsole()
 
 
+sampleLines = {}
+"""(width, height, y, navigationsymbol_x, x_offset, tilt) -> (xs, ys) of the tilted lines the lanes are searched on."""
+
+def GetSampleLine(width, height, y_coordinate, navigationsymbol_x, x_offset, tilt):
+    key = (width, height, y_coordinate, navigationsymbol_x, x_offset, tilt)
+    line = sampleLines.get(key)
+    if line is None:
+        xs = np.arange(int(width))
+        # np.rint rounds halves to even like round()
+        ys = np.rint(y_coordinate + (navigationsymbol_x - xs + x_offset) * tilt).astype(np.intp)
+        np.clip(ys, 0, height - 1, out=ys)
+        if len(sampleLines) > 32:
+            # The offsets change when changing lanes, don't keep the old lines forever
+            sampleLines.clear()
+        line = (xs, ys)
+        sampleLines[key] = line
+    return line
+
+def GetLaneEdges(frame_gray, white_limit, y_coordinate, navigationsymbol_x, x_offset, tilt):
+    """Find where the navigation lines start and end on a (tilted) horizontal line.
+
+    Returns:
+        list: The x coordinates of the edges (minus x_offset), a start and an end for each line.
+        If there are less than two edges the width of the frame is added to the end.
+    """
+    height, width = frame_gray.shape[:2]
+    xs, ys = GetSampleLine(width, height, y_coordinate, navigationsymbol_x, x_offset, tilt)
+    profile = (frame_gray[ys, xs] >= white_limit).view(np.int8)
+    # Each change between 0 and 1 is an edge, the line can already be white at x = 0
+    edges = np.flatnonzero(np.diff(profile, prepend=np.int8(0)))
+    laneEdges = (edges - x_offset).tolist()
+    if len(laneEdges) < 2:
+        laneEdges.append(width)
+    return laneEdges
+
+def GetColumnRun(frame_gray, white_limit, x):
+    """Find the first run of white pixels in a column, going up from the bottom.
+
+    Returns:
+        tuple: (upper, lower) the y of the bottom and top end of the run, (0, 0) if there is none.
+    """
+    column = frame_gray[::-1, x] >= white_limit
+    if not column.any():
+        return 0, 0
+    start = int(np.argmax(column))
+    rest = column[start:]
+    length = len(rest) if rest.all() else int(np.argmin(rest))
+    height = frame_gray.shape[0]
+    return height - 1 - start, height - start - length
+
 ############################################################################################################################
 # Code
 ############################################################################################################################
@@ -769,32 +836,7 @@ def plugin(data):
         automatic_x_offset = round(width/2-navigationsymbol_y)
 
         def GetArrayOfLaneEdges(y_coordinate_of_detection, tilt, x_offset, y_offset):
-            detectingLane = False
-            laneEdges = []
-
-            for x in range(0, int(width)):
-                
-                y = round(y_coordinate_of_detection + y_offset + (navigationsymbol_x - x + x_offset) * tilt)
-                if y < 0:
-                    y = 0
-                if y > height - 1:
-                    y = height - 1
-
-                pixel = frame_gray[y, x]
-                if (white_limit <= pixel):
-                    
-                    if not detectingLane:
-                        detectingLane = True
-                        laneEdges.append(x - x_offset)
-                else:
-                    if detectingLane:
-                        detectingLane = False
-                        laneEdges.append(x - x_offset)
-
-            if len(laneEdges) < 2:
-                laneEdges.append(width)
-
-            return laneEdges
+            return GetLaneEdges(frame_gray, white_limit, y_coordinate_of_detection + y_offset, navigationsymbol_x, x_offset, tilt)
         
         
         if turnincoming_direction != None:
@@ -864,38 +906,14 @@ def plugin(data):
             approve_x_left = width - 1
         if approve_x_left < 0:
             approve_x_left = 0
-        approve_upper_y_left = 0
-        approve_lower_y_left = 0
-        for y in range(height-1, -1, -1):
-            pixel = frame_gray[y, approve_x_left]
-            if (white_limit <= pixel):
-                if approve_upper_y_left == 0:
-                    approve_upper_y_left = y
-                    approve_lower_y_left = y
-                else:
-                    approve_lower_y_left = y
-            else:
-                if approve_upper_y_left != 0:
-                    break
+        approve_upper_y_left, approve_lower_y_left = GetColumnRun(frame_gray, white_limit, approve_x_left)
 
         approve_x_right = round(navigationsymbol_x + width/4)
         if approve_x_right >= width:
             approve_x_right = width - 1
         if approve_x_right < 0:
             approve_x_right = 0
-        approve_upper_y_right = 0
-        approve_lower_y_right = 0
-        for y in range(height-1, -1, -1):
-            pixel = frame_gray[y, approve_x_right]
-            if (white_limit <= pixel):
-                if approve_upper_y_right == 0:
-                    approve_upper_y_right = y
-                    approve_lower_y_right = y
-                else:
-                    approve_lower_y_right = y
-            else:
-                if approve_upper_y_right != 0:
-                    break
+        approve_upper_y_right, approve_lower_y_right = GetColumnRun(frame_gray, white_limit, approve_x_right)
         
         if approve_lower_y_left != 0 and approve_lower_y_right != 0:
             current_color = (0, 0, 255)
@@ -1334,36 +1352,33 @@ def plugin(data):
                 gamepaused = False
                 speed = 0
 
-            cv2.rectangle(frame, (0, 0), (round(frame.shape[1]/6), round(frame.shape[0]/3)), (0, 0, 0), -1)
-            cv2.rectangle(frame, (frame.shape[1] ,0), (round(frame.shape[1]-frame.shape[1]/6), round(frame.shape[0]/3)), (0, 0, 0), -1)
-            lower_red = np.array([0, 0, 160])
-            upper_red = np.array([110, 110, 255])
-            mask = cv2.inRange(frame, lower_red, upper_red)
-            frame_with_mask = cv2.bitwise_and(frame, frame, mask=mask)
-            frame = cv2.cvtColor(frame_with_mask, cv2.COLOR_BGR2GRAY)
-
-            if cv2.countNonZero(frame) / (frame.shape[0] * frame.shape[1]) > 0.03:
-                lane_detected = True
-            else:
-                lane_detected = False
-
             try:
-                AIFrame = preprocess_image(mask)
+                preprocessor = GetAIPreprocessor()
             except:
                 GetAIModelProperties()
                 if IMG_WIDTH == "UNKNOWN" or IMG_HEIGHT == "UNKNOWN":
                     print(f"NavigationDetection - Unable to read the AI model image size. Make sure you didn't change the model file name. The code wont run the NavigationDetectionAI.")
                     console.RestoreConsole()
                     return data
-                AIFrame = preprocess_image(mask)
+                preprocessor = GetAIPreprocessor()
+
+            # The mask ignores the corners of the route advisor, so the frame doesn't have to be copied to black them out
+            mask = preprocessor.Mask(frame)
+            lane_detected = cv2.countNonZero(mask) / (mask.shape[0] * mask.shape[1]) > 0.03
+            frame = cv2.cvtColor(cv2.bitwise_and(frame, frame, mask=mask), cv2.COLOR_BGR2GRAY)
 
             output = [[0, 0, 0, 0, 0, 0, 0, 0]]
 
             if DefaultSteering.enabled == True and gamepaused == False:
                 if AIModelLoaded == True:
-                    with torch.no_grad():
-                        output = AIModel(AIFrame)
-                        output = output.tolist()
+                    # The mask is reused on the next frame, so the model gets its own copy.
+                    # Until the model is done the result from an older frame is used.
+                    result, resultSequence = inferenceService.Infer("NavigationDetection", RunAIModel, mask.copy(), data.get("frameSequence"), maxAge=1)
+                    if result != None:
+                        output = result
+            else:
+                # Don't steer with a result from before the pause once steering is back on
+                inferenceService.Forget("NavigationDetection")
 
             steering = float(output[0][0]) / -30
             left_indicator = bool(float(output[0][1]) > 0.15)
@@ -1435,7 +1450,7 @@ def onEnable():
     pass
 
 def onDisable():
-    pass
+    inferenceService.Forget("NavigationDetection")
 
 
 class UI():
@@ -163,7 +163,24 @@ class UI():
                         # Take into account the width to make the values line up 
                         listObject = f"{plugin}:"
                         listObject += " "*(50-len(listObject))
-                        listObject += f"{int(data['executionTimes'][plugin]*1000)} ms"
+                        if type(data["executionTimes"][plugin]) == int: # Counters
+                            listObject += f"{data['executionTimes'][plugin]}"
+                        else:
+                            listObject += f"{int(data['executionTimes'][plugin]*1000)} ms"
+                        self.list.insert("end", listObject + "\n")
+                    
+                    # Latency of each stage when the pipelined main loop is enabled
+                    if "pipeline" in data:
+                        for stage in data["pipeline"]:
+                            if type(data["pipeline"][stage]) != dict:
+                                continue
+                            listObject = f"Pipeline {stage} latency:"
+                            listObject += " "*(50-len(listObject))
+                            listObject += f"{int(data['pipeline'][stage]['latency']*1000)} ms"
+                            self.list.insert("end", listObject + "\n")
+                        listObject = "Pipeline latency:"
+                        listObject += " "*(50-len(listObject))
+                        listObject += f"{int(data['pipeline']['latency']*1000)} ms"
                         self.list.insert("end", listObject + "\n")
 
                 try:
@@ -13,7 +13,8 @@ PluginInfo = PluginInformation(
     author="Tumppi066",
     url="https://github.com/Tumppi066/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", # = Panel
-    dynamicOrder="before UI" # Will run the plugin before anything else in the mainloop (data will be empty)
+    dynamicOrder="before UI", # Will run the plugin before anything else in the mainloop (data will be empty)
+    maxExecTime=0
 )
 
 import tkinter as tk
@@ -31,12 +32,10 @@ import mmap
 
 controls.RegisterKeybind("Test SDK button", notBoundInfo="This is intended for developers.", description="Will test the button selected in the SDK Controller UI.")
 
-mmName = r"Local\SCSControls"
-floatCount = 4
-floatSize = 4
-boolCount = 38
-boolSize = 1
-size = floatCount * floatSize + boolCount * boolSize
+from plugins.SDKController.writer import controlsWriter, buttonNames
+
+writer = controlsWriter()
+"""Other plugins can also use writer.Request() to send a value with the next write."""
 
 def tryExceptDefault(data, dataPath, default):
     """Tries to get data from the data variable, if it fails returns the default value."""
@@ -97,48 +96,6 @@ Show Mirrors, 40, bool, showmirrors
 Hazard Lights, 41, bool, flasher4way
 """
 
-# This is used for the UI to test each button.
-buttonNames = [
-    "Pause",
-    "ParkingBrake",
-    "Wipers",
-    "CruiseControl",
-    "CruiseControlIncrease",
-    "CruiseControlDecrease",
-    "CruiseControlReset",
-    "Lights",
-    "HighBeams",
-    "LeftBlinker",
-    "RightBlinker",
-    "Quickpark",
-    "Drive",
-    "Reverse",
-    "CycleZoom",
-    "TripReset",
-    "WipersBack",
-    "Wipers0",
-    "Wipers1",
-    "Wipers2",
-    "Wipers3",
-    "Wipers4",
-    "Horn",
-    "Airhorn",
-    "LightHorn",
-    "Cam1",
-    "Cam2",
-    "Cam3",
-    "Cam4",
-    "Cam5",
-    "Cam6",
-    "Cam7",
-    "Cam8",
-    "MapZoomIn",
-    "MapZoomOut",
-    "ACCMode",
-    "ShowMirrors",
-    "Hazards"
-]
-
 # The main file runs the "plugin" function each time the plugin is called
 # The data variable contains the data from the mainloop, plugins can freely add and modify data as needed
 # The data from the last frame is contained under data["last"]
@@ -195,84 +152,32 @@ def plugin(data):
         messagebox.showinfo("SDK Controller", Translate("IMPORTANT NOTE:\nIf the plugin has been added by an update, and you've not run the first time setup after updating. Please either run it, or copy the file from the\n'plugins/FirstTimeSetup/sdkPlugin'\nfolder to the game plugin folder.\n\nThis can be found by opening steam, right clicking on the game, manage, browse local files, and then opening the bin/win_x64/plugins folder.\n\nIf you've already run the first time setup, you can ignore this message."))
         settings.CreateSettings("sdk", "firstTime", False)
     
-    global lastPress
-    buf = None
-
-    try:
-        buf = mmap.mmap(0, size, "Local\SCSControls")  # 3 floats, 4 bytes each
-    except:
-        return data
-    
-    if buf == None:
-        return data
-
+    # Only the controls that are set are given to the writer, the rest are 0 / False unless
+    # another plugin has set them with writer.Request()
+    values = {}
     # For steering accel and brake we have to support the old controller system data variable
-    try:
-        steering = data["sdk"]["steering"]
-    except:
-        steering = tryExceptDefault(data, ["controller","leftStick"], 0.0)
+    for name, controllerName in [("steering", "leftStick"), ("acceleration", "righttrigger"), ("brake", "lefttrigger")]:
+        value = tryExceptDefault(data, ["sdk",name], tryExceptDefault(data, ["controller",controllerName], None))
+        if value != None:
+            values[name] = value
+    clutch = tryExceptDefault(data, ["sdk","Clutch"], tryExceptDefault(data, ["sdk","clutch"], None))
+    if clutch != None:
+        values["clutch"] = clutch
+    # Get bools
+    for name in buttonNames:
+        value = tryExceptDefault(data, ["sdk",name], None)
+        if value != None:
+            values[name] = value
     
+    # Only the values that changed since the last frame are written
     try:
-        acceleration = data["sdk"]["acceleration"]
-    except:
-        acceleration = tryExceptDefault(data, ["controller","righttrigger"], 0.0)
-        
-    try:
-        brake = data["sdk"]["brake"]
+        writer.Write(values)
     except:
-        brake = tryExceptDefault(data, ["controller","lefttrigger"], 0.0)
-    
-    clutch = tryExceptDefault(data, ["sdk","Clutch"], 0.0)
+        writer.close()
+        return data
     
-    # Get bools
-    pause = tryExceptDefault(data, ["sdk","Pause"], False)
-    parkingbrake = tryExceptDefault(data, ["sdk","ParkingBrake"], False)
-    wipers = tryExceptDefault(data, ["sdk","Wipers"], False)
-    cruiectrl = tryExceptDefault(data, ["sdk","CruiseControl"], False)
-    cruiectrlinc = tryExceptDefault(data, ["sdk","CruiseControlIncrease"], False)
-    cruiectrldec = tryExceptDefault(data, ["sdk","CruiseControlDecrease"], False)
-    cruiectrlres = tryExceptDefault(data, ["sdk","CruiseControlReset"], False)
-    light = tryExceptDefault(data, ["sdk","Lights"], False)
-    hblight = tryExceptDefault(data, ["sdk","HighBeams"], False)
-    lblinker = tryExceptDefault(data, ["sdk","LeftBlinker"], False)
-    rblinker = tryExceptDefault(data, ["sdk","RightBlinker"], False)
-    quickpark = tryExceptDefault(data, ["sdk","Quickpark"], False)
-    drive = tryExceptDefault(data, ["sdk","Drive"], False)
-    reverse = tryExceptDefault(data, ["sdk","Reverse"], False)
-    cycl_zoom = tryExceptDefault(data, ["sdk","CycleZoom"], False)
-    tripreset = tryExceptDefault(data, ["sdk","TripReset"], False)
-    wipersback = tryExceptDefault(data, ["sdk","WipersBack"], False)
-    wipers0 = tryExceptDefault(data, ["sdk","Wipers0"], False)
-    wipers1 = tryExceptDefault(data, ["sdk","Wipers1"], False)
-    wipers2 = tryExceptDefault(data, ["sdk","Wipers2"], False)
-    wipers3 = tryExceptDefault(data, ["sdk","Wipers3"], False)
-    wipers4 = tryExceptDefault(data, ["sdk","Wipers4"], False)
-    horn = tryExceptDefault(data, ["sdk","Horn"], False)
-    airhorn = tryExceptDefault(data, ["sdk","Airhorn"], False)
-    lighthorn = tryExceptDefault(data, ["sdk","LightHorn"], False)
-    cam1 = tryExceptDefault(data, ["sdk","Cam1"], False)
-    cam2 = tryExceptDefault(data, ["sdk","Cam2"], False)
-    cam3 = tryExceptDefault(data, ["sdk","Cam3"], False)
-    cam4 = tryExceptDefault(data, ["sdk","Cam4"], False)
-    cam5 = tryExceptDefault(data, ["sdk","Cam5"], False)
-    cam6 = tryExceptDefault(data, ["sdk","Cam6"], False)
-    cam7 = tryExceptDefault(data, ["sdk","Cam7"], False)
-    cam8 = tryExceptDefault(data, ["sdk","Cam8"], False)
-    mapzoom_in = tryExceptDefault(data, ["sdk","MapZoomIn"], False)
-    mapzoom_out = tryExceptDefault(data, ["sdk","MapZoomOut"], False)
-    accmode = tryExceptDefault(data, ["sdk","ACCMode"], False)
-    showmirrors = tryExceptDefault(data, ["sdk","ShowMirrors"], False)
-    hazards = tryExceptDefault(data, ["sdk","Hazards"], False)
+    data["executionTimes"]["SDKController writes"] = writer.writes
     
-    # Write three floats to memory
-    buf[:] = struct.pack('ffff38?', steering, acceleration, brake, clutch,
-                         pause, parkingbrake, wipers, cruiectrl, cruiectrlinc, cruiectrldec, 
-                         cruiectrlres, light, hblight, lblinker, rblinker, quickpark, drive, 
-                         reverse, cycl_zoom, tripreset, wipersback, wipers0, wipers1, wipers2,
-                         wipers3, wipers4, horn, airhorn, lighthorn, cam1, cam2, cam3, cam4,
-                         cam5, cam6, cam7, cam8, mapzoom_in, mapzoom_out, accmode, showmirrors,
-                         hazards)
-
     return data # Plugins need to ALWAYS return the data
 
 
@@ -282,7 +187,7 @@ def onEnable():
     pass
 
 def onDisable():
-    pass
+    writer.close()
 
 lastPress = time.time()
 class UI():
@@ -0,0 +1,177 @@
+"""
+Writes the controls to the game's SDK plugin through shared memory.
+
+The writer keeps the mapping open and remembers what is already in the shared memory,
+so only the values that changed since the last frame are written.
+
+```python
+writer = controlsWriter()
+writer.Request("LeftBlinker", True) # From anywhere, applied with the next write
+writer.Write({"steering": 0.1, "acceleration": 0.5})
+print(writer.writes, writer.bytesWritten) # Amount of writes and bytes during the last Write()
+```
+"""
+from src.logger import print
+import struct
+import mmap
+import time
+
+mmName = r"Local\SCSControls"
+floatCount = 4
+floatSize = 4
+boolCount = 38
+boolSize = 1
+size = floatCount * floatSize + boolCount * boolSize
+boolOffset = floatCount * floatSize
+
+floatNames = ["steering", "acceleration", "brake", "clutch"]
+"""The float values in the order they are in the shared memory."""
+
+floatStruct = struct.Struct(f"{floatCount}f")
+
+# This is used for the UI to test each button.
+buttonNames = [
+    "Pause",
+    "ParkingBrake",
+    "Wipers",
+    "CruiseControl",
+    "CruiseControlIncrease",
+    "CruiseControlDecrease",
+    "CruiseControlReset",
+    "Lights",
+    "HighBeams",
+    "LeftBlinker",
+    "RightBlinker",
+    "Quickpark",
+    "Drive",
+    "Reverse",
+    "CycleZoom",
+    "TripReset",
+    "WipersBack",
+    "Wipers0",
+    "Wipers1",
+    "Wipers2",
+    "Wipers3",
+    "Wipers4",
+    "Horn",
+    "Airhorn",
+    "LightHorn",
+    "Cam1",
+    "Cam2",
+    "Cam3",
+    "Cam4",
+    "Cam5",
+    "Cam6",
+    "Cam7",
+    "Cam8",
+    "MapZoomIn",
+    "MapZoomOut",
+    "ACCMode",
+    "ShowMirrors",
+    "Hazards"
+]
+
+class controlsWriter:
+    """Writes the controls to the shared memory, only touching the bytes that changed.
+
+    Args:
+        resyncInterval (float, optional): How often (in seconds) to write the whole block anyway,
+            in case something else has changed the shared memory. Defaults to 1.
+    """
+    def __init__(self, resyncInterval=1):
+        self.mm = None
+        self.buffer = bytearray(size)
+        """The values for this frame."""
+        self.written = None
+        """What is currently in the shared memory, None if it's unknown."""
+        self.requests = {}
+        """Values requested with Request() since the last write."""
+        self.resyncInterval = resyncInterval
+        self.lastResync = 0
+
+        self.writes = 0
+        """Amount of separate writes to the shared memory during the last Write()."""
+        self.bytesWritten = 0
+        """Amount of bytes written to the shared memory during the last Write()."""
+
+    def connect(self):
+        """Open the shared memory, the mapping is kept open between frames.
+
+        Returns:
+            mmap: The shared memory mapping.
+        """
+        if self.mm == None or self.mm.closed:
+            self.mm = mmap.mmap(0, size, mmName)
+            self.written = None
+        return self.mm
+
+    def close(self):
+        try:
+            self.mm.close()
+        except: pass
+        self.mm = None
+        self.written = None
+
+    def Request(self, name, value):
+        """Request a value for the next write. Requests are used for the controls that are not in
+        the values given to Write(), the values given to Write() take priority.
+
+        Args:
+            name (str): Name of the control, one of floatNames or buttonNames.
+            value (float | bool): The value.
+        """
+        self.requests[name] = value
+
+    def Write(self, values):
+        """Write the controls for this frame. Controls that are not set (or requested) will be 0 / False.
+
+        Args:
+            values (dict): Control name -> value. Uses the same names as data["sdk"], only the controls that were set should be included.
+
+        Returns:
+            int: Amount of separate writes to the shared memory.
+        """
+        buf = self.connect()
+
+        if self.requests != {}:
+            values = {**self.requests, **values}
+            self.requests = {}
+
+        floatStruct.pack_into(self.buffer, 0, *[float(values.get(name, 0.0)) for name in floatNames])
+        for i, name in enumerate(buttonNames):
+            self.buffer[boolOffset + i] = 1 if values.get(name, False) else 0
+
+        self.writes = 0
+        self.bytesWritten = 0
+
+        if self.written == None or time.time() - self.lastResync > self.resyncInterval:
+            buf[:] = self.buffer
+            self.written = bytearray(self.buffer)
+            self.lastResync = time.time()
+            self.writes = 1
+            self.bytesWritten = size
+            return self.writes
+
+        if self.buffer == self.written:
+            return self.writes
+
+        # Find the changed byte ranges and write each of them at once
+        start = None
+        for i in range(size + 1):
+            changed = i < size and self.buffer[i] != self.written[i]
+            if changed and start == None:
+                start = i
+            elif not changed and start != None:
+                # Floats have to be written whole, so that the game never sees half of an old value
+                if start < boolOffset:
+                    start -= start % floatSize
+                end = i
+                if end < boolOffset and end % floatSize != 0:
+                    end += floatSize - end % floatSize
+                buf[start:end] = self.buffer[start:end]
+                self.written[start:end] = self.buffer[start:end]
+                self.writes += 1
+                self.bytesWritten += end - start
+                start = None
+
+        return self.writes
@@ -6,7 +6,9 @@ PluginInfo = PluginInformation(
     author="Glas42",
     url="https://github.com/Glas42/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic",
-    dynamicOrder="before lane detection"
+    dynamicOrder="before lane detection",
+    reads=["frameFull", "api"],
+    writes=["TrafficLightDetection"]
 )
 
 from src.mainUI import switchSelectedPlugin, resizeWindow
@@ -16,6 +18,8 @@ import src.variables as variables
 import src.settings as settings
 import src.console as console
 import src.helpers as helpers
+import src.capture as capture
+import src.inferenceService as inferenceService
 import src.pytorch as pytorch
 from src.logger import print
 from tkinter import ttk
@@ -37,7 +41,6 @@ import mss
 import os
 
 try:
-    from torchvision import transforms
     from bs4 import BeautifulSoup
     import requests
     import torch
@@ -114,6 +117,126 @@ def SendImage(image, x, y, w, h):
 
 
 
+shapePoints = np.array([(0.05, 0.05), (0.5, 0.2), (0.95, 0.05), (0.3, 0.6), (0.5, 0.5), (0.7, 0.6), (0.05, 0.95), (0.5, 0.8), (0.95, 0.95)])
+"""The points of the 9-point shape mask, relative to the rectangle of a candidate."""
+shapeExpected = np.array([False, True, False, True, True, True, False, True, False])
+"""Whether each point of the shape mask is expected to be on the light."""
+
+segmentationColors = []
+"""(name, lower, upper, offset) of the colors that are detected, lower and upper are RGB. The tracked point
+is y + h * offset, the position the middle of the traffic light would be at."""
+colorLUT = None
+segmentationBuffers = None
+"""(looked up frame, its channels, labels), reused between frames, allocating them each frame would take longer than the segmentation itself."""
+
+def CreateColorLUT(colors):
+    """Create the lookup table that labels the pixels with their colors.
+
+    The color ranges are boxes in the color cube, so each one can be split into a range for each channel.
+    The table has the bit 1 << i set for the channel values that are in the range of color i, and a
+    pixel is in the range of the color if the bit is set for all three of its channels.
+
+    Args:
+        colors (list): (name, lower, upper, offset) of each color, see segmentationColors.
+
+    Returns:
+        np.ndarray: (256, 1, 3) table for cv2.LUT, in BGR order.
+    """
+    lut = np.zeros((256, 1, 3), np.uint8)
+    values = np.arange(256)
+    for i, (name, lower, upper, offset) in enumerate(colors):
+        for channel in range(3):
+            # The ranges are RGB and the frame is BGR
+            rgbChannel = 2 - channel
+            lut[(values >= lower[rgbChannel]) & (values <= upper[rgbChannel]), 0, channel] |= 1 << i
+    return lut
+
+def SegmentColors(frame):
+    """Label each pixel of the frame with the colors it's in the range of.
+
+    Args:
+        frame (np.ndarray): The BGR frame.
+
+    Returns:
+        np.ndarray: The labels, bit 1 << i is set for the pixels in the range of segmentationColors[i].
+        With only one color the mask from cv2.inRange is used as is (255 has the bit set). It's overwritten on the next call.
+    """
+    global segmentationBuffers
+    height, width = frame.shape[:2]
+    if segmentationBuffers is None or segmentationBuffers[2].shape != (height, width):
+        segmentationBuffers = (np.empty((height, width, 3), np.uint8), [np.empty((height, width), np.uint8) for i in range(3)], np.empty((height, width), np.uint8))
+    looked, channels, labels = segmentationBuffers
+
+    if len(segmentationColors) == 1:
+        name, lower, upper, offset = segmentationColors[0]
+        return cv2.inRange(frame, lower[::-1], upper[::-1], dst=labels)
+
+    # One lookup for all colors, then the bits of the three channels are combined
+    cv2.LUT(frame, colorLUT, dst=looked)
+    cv2.split(looked, channels)
+    cv2.bitwise_and(channels[0], channels[1], dst=labels)
+    cv2.bitwise_and(labels, channels[2], dst=labels)
+    return labels
+
+def FindTrafficLights(labels):
+    """Find the blobs in the labels that look like traffic lights. The filters are run on all of the
+    candidates at once.
+
+    Args:
+        labels (np.ndarray): The labels from SegmentColors().
+
+    Returns:
+        list: (x, y, w, h, color) of each traffic light, x and y are the point that is tracked.
+    """
+    contours, _ = cv2.findContours(labels, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if len(contours) == 0:
+        return []
+    x, y, w, h = np.array([cv2.boundingRect(contour) for contour in contours]).T
+
+    # The filters can only be turned off in the advanced mode
+    keep = np.ones(len(x), bool)
+    if advancedmode == False or rectsizefilter == True:
+        keep &= (min_rect_size < w) & (max_rect_size > w) & (min_rect_size < h) & (max_rect_size > h)
+    if advancedmode == False or widthheightratiofilter == True:
+        ratio = w / h - 1
+        keep &= (ratio < width_height_ratio * 2) & (ratio > -width_height_ratio)
+    x, y, w, h = x[keep], y[keep], w[keep], h[keep]
+    if len(x) == 0:
+        return []
+
+    # How much of the rectangle of each candidate is covered by each color
+    ratios = np.empty((len(x), len(segmentationColors)))
+    for i in range(len(x)):
+        region = labels[y[i]:y[i]+h[i], x[i]:x[i]+w[i]]
+        for j in range(len(segmentationColors)):
+            ratios[i, j] = np.count_nonzero(region & (1 << j))
+    ratios /= (w * h)[:, np.newaxis]
+
+    keep = np.ones(len(x), bool)
+    if advancedmode == False or pixelpercentagefilter == True:
+        # One color has to fill about a circle in the rectangle and the other colors have to be almost missing
+        circle = (ratios < circleplusoffset) & (ratios > circleminusoffset)
+        missing = ratios < 0.1
+        othersMissing = np.sum(missing, axis=1)[:, np.newaxis] - missing == len(segmentationColors) - 1
+        keep &= np.any(circle & othersMissing, axis=1)
+    if advancedmode == False or pixelblobshapefilter == True:
+        pointsX = np.clip(np.round(x[:, np.newaxis] + w[:, np.newaxis] * shapePoints[:, 0]).astype(int), 0, labels.shape[1] - 1)
+        pointsY = np.clip(np.round(y[:, np.newaxis] + h[:, np.newaxis] * shapePoints[:, 1]).astype(int), 0, labels.shape[0] - 1)
+        # Only the points that should be outside of the light can reject a candidate
+        keep &= ~np.any((labels[pointsY, pointsX] != 0) & ~shapeExpected, axis=1)
+
+    # The color with the highest share, red if there is a tie
+    colors = np.zeros(len(x), int)
+    for j in range(1, len(segmentationColors)):
+        colors[ratios[:, j] > np.max(np.delete(ratios, j, axis=1), axis=1)] = j
+
+    trafficLights = []
+    for i in np.flatnonzero(keep):
+        name, lower, upper, offset = segmentationColors[colors[i]]
+        trafficLights.append((round(int(x[i]) + int(w[i]) * 0.5), round(int(y[i]) + int(h[i]) * offset), int(w[i]), int(h[i]), name))
+    return trafficLights
+
+
 def UpdateSettings():
     global send_traffic_light_images  # Code to send traffic light images to drive if enabled
 
@@ -182,6 +305,9 @@ def UpdateSettings():
     global lower_yellow_advanced
     global upper_yellow_advanced
 
+    global segmentationColors
+    global colorLUT
+
     if 'UseAI' in globals():
         if UseAI == False and settings.GetSettings("TrafficLightDetection", "UseAI", False) == True:
             if TorchAvailable == True:
@@ -360,6 +486,16 @@ def UpdateSettings():
     lower_yellow_advanced = np.array([lyr, lyg, lyb])
     upper_green_advanced = np.array([ugr, ugg, ugb])
     lower_green_advanced = np.array([lgr, lgg, lgb])
+
+    if advancedmode == False:
+        segmentationColors = [("Red", lower_red, upper_red, 2), ("Green", lower_green, upper_green, -1), ("Yellow", lower_yellow, upper_yellow, 0.5)]
+    else:
+        segmentationColors = [("Red", lower_red_advanced, upper_red_advanced, 2), ("Green", lower_green_advanced, upper_green_advanced, -1), ("Yellow", lower_yellow_advanced, upper_yellow_advanced, 0.5)]
+    if performancemode == True:
+        segmentationColors = segmentationColors[:1]
+    elif detectyellowlight == False:
+        segmentationColors = segmentationColors[:2]
+    colorLUT = CreateColorLUT(segmentationColors)
 UpdateSettings()
 
 
@@ -380,13 +516,12 @@ def get_text_size(text="NONE", text_width=100, max_text_height=100):
     return text, fontscale, thickness, textsize[0], textsize[1]
 
 
-def ClassifyImage(image):
-    try:
-        if AIModelUpdateThread.is_alive(): return True
-        if AIModelLoadThread.is_alive(): return True
-    except:
-        return True
+def PreprocessClassification(image):
+    """Turn a traffic light candidate into the input of the classification model.
 
+    Returns:
+        np.ndarray: The image as (channels, height, width), float32 from 0 to 1.
+    """
     image = np.array(image, dtype=np.float32)
     if IMG_CHANNELS == 'Grayscale' or IMG_CHANNELS == 'Binarize':
         image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -400,23 +535,127 @@ def ClassifyImage(image):
         image = np.stack((image[:, :, 0], image[:, :, 2]), axis=2)
     elif IMG_CHANNELS == 'R':
         image = image[:, :, 0]
-        image = np.expand_dims(image, axis=2)
     elif IMG_CHANNELS == 'G':
         image = image[:, :, 1]
-        image = np.expand_dims(image, axis=2)
     elif IMG_CHANNELS == 'B':
         image = image[:, :, 2]
-        image = np.expand_dims(image, axis=2)
     image = cv2.resize(image, (IMG_WIDTH, IMG_HEIGHT))
-    image = image / 255.0
+    image /= 255.0
     if IMG_CHANNELS == 'Binarize':
         image = cv2.threshold(image, 0.5, 1.0, cv2.THRESH_BINARY)[1]
 
-    image = transforms.ToTensor()(image).unsqueeze(0).to(AIDevice)
-    with torch.no_grad():
-        output = np.array(AIModel(image)[0].tolist())
-    obj_class = np.argmax(output)
-    return True if obj_class != 3 else False
+    if image.ndim == 2:
+        return image[np.newaxis]
+    return image.transpose(2, 0, 1)
+
+
+classificationBatch = None
+"""The preallocated input tensor of the classification model, it's only made bigger when more candidates are classified at once."""
+
+def ClassifyImages(images):
+    """Classify traffic light candidates with a single forward pass of the model.
+
+    Args:
+        images (list[np.ndarray]): The BGR images of the candidates.
+
+    Returns:
+        list[bool]: True for each candidate that is a traffic light (also while the model is loading). Candidates
+            that can't be classified (for example cropped to nothing at the edge of the frame) are False.
+    """
+    global classificationBatch
+    try:
+        if AIModelUpdateThread.is_alive(): return [True] * len(images)
+        if AIModelLoadThread.is_alive(): return [True] * len(images)
+    except:
+        return [True] * len(images)
+    if len(images) == 0:
+        return []
+
+    # One broken candidate only affects its own result, not the whole batch
+    indices = []
+    inputs = []
+    for i, image in enumerate(images):
+        try:
+            if image.size == 0:
+                continue
+            inputs.append(PreprocessClassification(image))
+            indices.append(i)
+        except:
+            pass
+    results = [False] * len(images)
+    if len(inputs) == 0:
+        return results
+
+    if classificationBatch is None or classificationBatch.shape[0] < len(inputs) or tuple(classificationBatch.shape[1:]) != inputs[0].shape:
+        classificationBatch = torch.empty((max(len(inputs), 8),) + inputs[0].shape, dtype=torch.float32)
+    batch = classificationBatch[:len(inputs)]
+    batchArray = batch.numpy()
+    for i, input in enumerate(inputs):
+        batchArray[i] = input
+
+    with torch.inference_mode():
+        classes = torch.argmax(AIModel(batch.to(AIDevice)), dim=1).tolist()
+    for i, obj_class in zip(indices, classes):
+        results[i] = obj_class != 3
+    return results
+
+def ClassifyImage(image):
+    return ClassifyImages([image])[0]
+
+
+unclassified = {}
+"""traffic light id -> (candidate number, image) of the traffic lights that haven't been classified yet."""
+submittedCandidates = set()
+"""The candidate numbers in the last submitted batch."""
+candidateCount = 0
+classificationCount = 0
+
+def AddCandidate(id, image):
+    """Queue a new traffic light for classification, ClassifyCandidates() classifies all of them at once.
+    The traffic light keeps its result for as long as it's tracked, so it's never classified again."""
+    global candidateCount
+    candidateCount += 1
+    # Copied so the captured frame isn't kept alive while waiting for the classification
+    unclassified[id] = (candidateCount, np.array(image))
+
+def ClassifyBatch(candidates):
+    numbers, images = candidates
+    return dict(zip(numbers, ClassifyImages(images)))
+
+def ClassifyCandidates():
+    """Classify the queued traffic lights in one batch with the inference service. A batch is only
+    submitted when there are candidates that aren't in the last one, or when the last one failed."""
+    global classificationCount
+    results, sequence, finished = inferenceService.Latest("TrafficLightDetection")
+    if sequence != classificationCount and not inferenceService.Running("TrafficLightDetection"):
+        # The last batch failed, so its candidates are submitted again
+        submittedCandidates.clear()
+    numbers = [number for number, image in unclassified.values()]
+    if all(number in submittedCandidates for number in numbers):
+        return
+    classificationCount += 1
+    submittedCandidates.clear()
+    submittedCandidates.update(numbers)
+    # The batch contains all unclassified candidates, so the ones in a batch that was replaced before it was run aren't lost
+    inferenceService.Infer("TrafficLightDetection", ClassifyBatch, (numbers, [image for number, image in unclassified.values()]), classificationCount)
+
+def UpdateClassifications():
+    """Set the results of the finished classifications to the traffic lights."""
+    results, sequence, finished = inferenceService.Latest("TrafficLightDetection")
+    ids = set()
+    for i, (coord, position, id, approved) in enumerate(trafficlights):
+        ids.add(id)
+        if results != None and approved == None and id in unclassified:
+            # The results are by candidate number, ids are reused so an old result can't end up on a new traffic light
+            number = unclassified[id][0]
+            if number in results:
+                trafficlights[i] = (coord, position, id, results[number])
+                del unclassified[id]
+
+    # The traffic lights that were lost before they were classified
+    for id in list(unclassified):
+        if id not in ids:
+            del unclassified[id]
 
 
 def HandleCorruptedAIModel():
@@ -722,15 +961,24 @@ def ConvertToAngle(x, y):
     return angle_x, angle_y
 
 
+lastResult = None
 def plugin(data):
     global coordinates
     global trafficlights
     global reset_window
 
     global last_traffic_light_image  # Code to send traffic light images to drive if enabled
+    global lastResult
+
+    # The screen hasn't been captured again since the last frame, use the old result
+    if not capture.IsNewFrame("TrafficLightDetection", data):
+        if lastResult != None:
+            data["TrafficLightDetection"] = lastResult
+        return data
 
     try:
-        frameFull = data["frameFull"].copy()
+        # Only read from, so no copy is needed (the frame is read-only, and with MSSScreenCapture the copy would also capture the whole screen)
+        frameFull = data["frameFull"]
         if x1 < x2 and y1 < y2:
             frame = frameFull[y1:y1+(y2-y1), x1:x1+(x2-x1)]
         else:
@@ -739,7 +987,6 @@ def plugin(data):
         return data
 
     if frame is None: return data
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
 
     try:
@@ -810,377 +1057,15 @@ def plugin(data):
         head_z = 0
 
 
-    # ALL CASES:
-
-    # True: --- False: advancedmode, performancemode, detectyellowlight
-    # True: detectyellowlight --- False: advancedmode, performancemode
-    # True: performancemode --- False: advancedmode
-    # True: advancedmode --- False: performancemode, detectyellowlight
-    # True: advancedmode, detectyellowlight --- False: performancemode
-    # True: advancedmode, performancemode --- False: 
-
-
     last_coordinates = coordinates.copy()
-    coordinates = []
-    if advancedmode == False:
-        if performancemode == False:
-            if detectyellowlight == False:
-                # True: --- False: advancedmode, performancemode, detectyellowlight
-                mask_red = cv2.inRange(rgb_frame, lower_red, upper_red)
-                mask_green = cv2.inRange(rgb_frame, lower_green, upper_green)
-                filtered_frame_colored = cv2.bitwise_or(cv2.bitwise_and(frame, frame, mask=mask_red), cv2.bitwise_and(frame, frame, mask=mask_green))
-                filtered_frame_bw = cv2.cvtColor(filtered_frame_colored, cv2.COLOR_BGR2GRAY)
-                final_frame = frame
-                contours, _ = cv2.findContours(filtered_frame_bw, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                for contour in contours:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    if min_rect_size < w and max_rect_size > w and min_rect_size < h and max_rect_size > h:
-                        if w / h - 1 < width_height_ratio * 2 and w / h - 1 > -width_height_ratio:
-                            red_pixel_count = cv2.countNonZero(mask_red[y:y+h, x:x+w])
-                            green_pixel_count = cv2.countNonZero(mask_green[y:y+h, x:x+w])
-                            total_pixels = w * h
-                            red_ratio = red_pixel_count / total_pixels
-                            green_ratio = green_pixel_count / total_pixels
-                            if green_ratio < circleplusoffset and green_ratio > circleminusoffset and red_ratio < 0.1 or red_ratio < circleplusoffset and red_ratio > circleminusoffset and green_ratio < 0.1:
-                                if red_ratio > green_ratio:
-                                    colorstr = "Red"
-                                    offset = y + h * 2
-                                elif green_ratio > red_ratio:
-                                    colorstr = "Green"
-                                    offset = y - h
-                                else:
-                                    colorstr = "Red"
-                                    offset = y + h * 2
-                                point_mask = []
-                                point_mask.append((round(x + w * 0.05), round(y + h * 0.05), False))
-                                point_mask.append((round(x + w * 0.5), round(y + h * 0.2), True))
-                                point_mask.append((round(x + w * 0.95), round(y + h * 0.05), False))
-                                point_mask.append((round(x + w * 0.3), round(y + h * 0.6), True))
-                                point_mask.append((round(x + w * 0.5), round(y + h * 0.5), True))
-                                point_mask.append((round(x + w * 0.7), round(y + h * 0.6), True))
-                                point_mask.append((round(x + w * 0.05), round(y + h * 0.95), False))
-                                point_mask.append((round(x + w * 0.5), round(y + h * 0.8), True))
-                                point_mask.append((round(x + w * 0.95), round(y + h * 0.95), False))
-                                as_expected = True
-                                for i in range(len(point_mask)):
-                                    point_x, point_y, expected = point_mask[i]
-                                    color = filtered_frame_bw[point_y, point_x]
-                                    color = True if color != 0 else False
-                                    if color != 0 == expected:
-                                        as_expected = False
-                                        break
-                                if as_expected:
-                                    coordinates.append((round(x + w * 0.5), round(offset), w, h, colorstr))
-
-            else:
-                # True: detectyellowlight --- False: advancedmode, performancemode
-                mask_red = cv2.inRange(rgb_frame, lower_red, upper_red)
-                mask_green = cv2.inRange(rgb_frame, lower_green, upper_green)
-                mask_yellow = cv2.inRange(rgb_frame, lower_yellow, upper_yellow)
-                combined_mask = cv2.bitwise_or(mask_red, cv2.bitwise_or(mask_green, mask_yellow))
-                filtered_frame_colored = cv2.bitwise_and(frame, frame, mask=combined_mask)
-                filtered_frame_bw = cv2.cvtColor(filtered_frame_colored, cv2.COLOR_BGR2GRAY)
-                final_frame = frame
-                contours, _ = cv2.findContours(filtered_frame_bw, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                for contour in contours:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    if min_rect_size < w and max_rect_size > w and min_rect_size < h and max_rect_size > h:
-                        if w / h - 1 < width_height_ratio * 2 and w / h - 1 > -width_height_ratio:
-                            red_pixel_count = cv2.countNonZero(mask_red[y:y+h, x:x+w])
-                            green_pixel_count = cv2.countNonZero(mask_green[y:y+h, x:x+w])
-                            yellow_pixel_count = cv2.countNonZero(mask_yellow[y:y+h, x:x+w])
-                            total_pixels = w * h
-                            red_ratio = red_pixel_count / total_pixels
-                            green_ratio = green_pixel_count / total_pixels
-                            yellow_ratio = yellow_pixel_count / total_pixels
-                            if (green_ratio < circleplusoffset and green_ratio > circleminusoffset and red_ratio < 0.1 and yellow_ratio < 0.1 or 
-                                red_ratio < circleplusoffset and red_ratio > circleminusoffset and green_ratio < 0.1 and yellow_ratio < 0.1 or 
-                                yellow_ratio < circleplusoffset and yellow_ratio > circleminusoffset and green_ratio < 0.1 and red_ratio < 0.1):
-                                if red_ratio > green_ratio and red_ratio > yellow_ratio:
-                                    colorstr = "Red"
-                                    offset = y + h * 2
-                                elif yellow_ratio > red_ratio and yellow_ratio > green_ratio:
-                                    colorstr = "Yellow"
-                                    offset = y + h * 0.5
-                                elif green_ratio > red_ratio and green_ratio > yellow_ratio:
-                                    colorstr = "Green"
-                                    offset = y - h
-                                else:
-                                    colorstr = "Red"
-                                    offset = y + h * 2
-                                point_mask = []
-                                point_mask.append((round(x + w * 0.05), round(y + h * 0.05), False))
-                                point_mask.append((round(x + w * 0.5), round(y + h * 0.2), True))
-                                point_mask.append((round(x + w * 0.95), round(y + h * 0.05), False))
-                                point_mask.append((round(x + w * 0.3), round(y + h * 0.6), True))
-                                point_mask.append((round(x + w * 0.5), round(y + h * 0.5), True))
-                                point_mask.append((round(x + w * 0.7), round(y + h * 0.6), True))
-                                point_mask.append((round(x + w * 0.05), round(y + h * 0.95), False))
-                                point_mask.append((round(x + w * 0.5), round(y + h * 0.8), True))
-                                point_mask.append((round(x + w * 0.95), round(y + h * 0.95), False))
-                                as_expected = True
-                                for i in range(len(point_mask)):
-                                    point_x, point_y, expected = point_mask[i]
-                                    color = filtered_frame_bw[point_y, point_x]
-                                    color = True if color != 0 else False
-                                    if color != 0 == expected:
-                                        as_expected = False
-                                        break
-                                if as_expected:
-                                    coordinates.append((round(x + w * 0.5), round(offset), w, h, colorstr))
-        else:
-            # True: performancemode --- False: advancedmode
-            mask_red = cv2.inRange(rgb_frame, lower_red, upper_red)
-            filtered_frame_bw = mask_red.copy()
-            final_frame = frame
-            contours, _ = cv2.findContours(mask_red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            for contour in contours:
-                x, y, w, h = cv2.boundingRect(contour)
-                if min_rect_size < w and max_rect_size > w and min_rect_size < h and max_rect_size > h:
-                    if w / h - 1 < width_height_ratio * 2 and w / h - 1 > -width_height_ratio:
-                        red_pixel_count = cv2.countNonZero(mask_red[y:y+h, x:x+w])
-                        total_pixels = w * h
-                        red_ratio = red_pixel_count / total_pixels
-                        if red_ratio < circleplusoffset and red_ratio > circleminusoffset:
-                            colorstr = "Red"
-                            offset = y + h * 2
-                            point_mask = []
-                            point_mask.append((round(x + w * 0.05), round(y + h * 0.05), False))
-                            point_mask.append((round(x + w * 0.5), round(y + h * 0.2), True))
-                            point_mask.append((round(x + w * 0.95), round(y + h * 0.05), False))
-                            point_mask.append((round(x + w * 0.3), round(y + h * 0.6), True))
-                            point_mask.append((round(x + w * 0.5), round(y + h * 0.5), True))
-                            point_mask.append((round(x + w * 0.7), round(y + h * 0.6), True))
-                            point_mask.append((round(x + w * 0.05), round(y + h * 0.95), False))
-                            point_mask.append((round(x + w * 0.5), round(y + h * 0.8), True))
-                            point_mask.append((round(x + w * 0.95), round(y + h * 0.95), False))
-                            as_expected = True
-                            for i in range(len(point_mask)):
-                                point_x, point_y, expected = point_mask[i]
-                                color = filtered_frame_bw[point_y, point_x]
-                                color = True if color != 0 else False
-                                if color != 0 == expected:
-                                    as_expected = False
-                                    break
-                            if as_expected:
-                                coordinates.append((round(x + w * 0.5), round(offset), w, h, colorstr))
-
-    else:
-
-        if performancemode == False:
-            if detectyellowlight == False:
-                # True: advancedmode --- False: performancemode, detectyellowlight
-                mask_red = cv2.inRange(rgb_frame, lower_red_advanced, upper_red_advanced)
-                mask_green = cv2.inRange(rgb_frame, lower_green_advanced, upper_green_advanced)
-                filtered_frame_colored = cv2.bitwise_or(cv2.bitwise_and(frame, frame, mask=mask_red), cv2.bitwise_and(frame, frame, mask=mask_green))
-                filtered_frame_bw = cv2.cvtColor(filtered_frame_colored, cv2.COLOR_BGR2GRAY)
-                final_frame = frame
-                contours, _ = cv2.findContours(filtered_frame_bw, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                for contour in contours:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    istrue = False
-                    if rectsizefilter == True:
-                        if min_rect_size < w and max_rect_size > w and min_rect_size < h and max_rect_size > h:
-                            istrue = True
-                    else:
-                        istrue = True
-                    if istrue == True:
-                        istrue = False
-                        if widthheightratiofilter == True:
-                            if w / h - 1 < width_height_ratio * 2 and w / h - 1 > -width_height_ratio:
-                                istrue = True
-                        else:
-                            istrue = True
-                        if istrue == True:
-                            red_pixel_count = cv2.countNonZero(mask_red[y:y+h, x:x+w])
-                            green_pixel_count = cv2.countNonZero(mask_green[y:y+h, x:x+w])
-                            total_pixels = w * h
-                            red_ratio = red_pixel_count / total_pixels
-                            green_ratio = green_pixel_count / total_pixels
-                            istrue = False
-                            if pixelpercentagefilter == True:
-                                if green_ratio < circleplusoffset and green_ratio > circleminusoffset and red_ratio < 0.1 or red_ratio < circleplusoffset and red_ratio > circleminusoffset and green_ratio < 0.1:
-                                    istrue = True
-                            else:
-                                istrue = True
-                            if istrue == True:
-                                if red_ratio > green_ratio:
-                                    colorstr = "Red"
-                                    offset = y + h * 2
-                                elif green_ratio > red_ratio:
-                                    colorstr = "Green"
-                                    offset = y - h
-                                else:
-                                    colorstr = "Red"
-                                    offset = y + h * 2
-                                istrue = False
-                                if pixelblobshapefilter == True:
-                                    point_mask = []
-                                    point_mask.append((round(x + w * 0.05), round(y + h * 0.05), False))
-                                    point_mask.append((round(x + w * 0.5), round(y + h * 0.2), True))
-                                    point_mask.append((round(x + w * 0.95), round(y + h * 0.05), False))
-                                    point_mask.append((round(x + w * 0.3), round(y + h * 0.6), True))
-                                    point_mask.append((round(x + w * 0.5), round(y + h * 0.5), True))
-                                    point_mask.append((round(x + w * 0.7), round(y + h * 0.6), True))
-                                    point_mask.append((round(x + w * 0.05), round(y + h * 0.95), False))
-                                    point_mask.append((round(x + w * 0.5), round(y + h * 0.8), True))
-                                    point_mask.append((round(x + w * 0.95), round(y + h * 0.95), False))
-                                    as_expected = True
-                                    for i in range(len(point_mask)):
-                                        point_x, point_y, expected = point_mask[i]
-                                        color = filtered_frame_bw[point_y, point_x]
-                                        color = True if color != 0 else False
-                                        if color != 0 == expected:
-                                            as_expected = False
-                                            break
-                                    if as_expected:
-                                        istrue = True
-                                else:
-                                    istrue = True
-                                if istrue == True:
-                                    coordinates.append((round(x + w * 0.5), round(offset), w, h, colorstr))
+    labels = SegmentColors(frame)
+    coordinates = FindTrafficLights(labels)
 
-            else:
-                # True: advancedmode, detectyellowlight --- False: performancemode
-                mask_red = cv2.inRange(rgb_frame, lower_red_advanced, upper_red_advanced)
-                mask_green = cv2.inRange(rgb_frame, lower_green_advanced, upper_green_advanced)
-                mask_yellow = cv2.inRange(rgb_frame, lower_yellow_advanced, upper_yellow_advanced)
-                combined_mask = cv2.bitwise_or(mask_red, cv2.bitwise_or(mask_green, mask_yellow))
-                filtered_frame_colored = cv2.bitwise_and(frame, frame, mask=combined_mask)
-                filtered_frame_bw = cv2.cvtColor(filtered_frame_colored, cv2.COLOR_BGR2GRAY)
-                final_frame = frame
-                contours, _ = cv2.findContours(filtered_frame_bw, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                for contour in contours:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    istrue = False
-                    if rectsizefilter == True:
-                        if min_rect_size < w and max_rect_size > w and min_rect_size < h and max_rect_size > h:
-                            istrue = True
-                    else:
-                        istrue = True
-                    if istrue == True:
-                        istrue = False
-                        if widthheightratiofilter == True:
-                            if w / h - 1 < width_height_ratio * 2 and w / h - 1 > -width_height_ratio:
-                                istrue = True
-                        else:
-                            istrue = True
-                        if istrue == True:
-                            red_pixel_count = cv2.countNonZero(mask_red[y:y+h, x:x+w])
-                            green_pixel_count = cv2.countNonZero(mask_green[y:y+h, x:x+w])
-                            yellow_pixel_count = cv2.countNonZero(mask_yellow[y:y+h, x:x+w])
-                            total_pixels = w * h
-                            red_ratio = red_pixel_count / total_pixels
-                            green_ratio = green_pixel_count / total_pixels
-                            yellow_ratio = yellow_pixel_count / total_pixels
-                            istrue = False
-                            if pixelpercentagefilter == True:
-                                if (green_ratio < circleplusoffset and green_ratio > circleminusoffset and red_ratio < 0.1 and yellow_ratio < 0.1 or 
-                                    red_ratio < circleplusoffset and red_ratio > circleminusoffset and green_ratio < 0.1 and yellow_ratio < 0.1 or 
-                                    yellow_ratio < circleplusoffset and yellow_ratio > circleminusoffset and green_ratio < 0.1 and red_ratio < 0.1):
-                                    istrue = True
-                            else:
-                                istrue = True
-                            if istrue == True:
-                                if red_ratio > green_ratio and red_ratio > yellow_ratio:
-                                    colorstr = "Red"
-                                    offset = y + h * 2
-                                elif yellow_ratio > red_ratio and yellow_ratio > green_ratio:
-                                    colorstr = "Yellow"
-                                    offset = y + h * 0.5
-                                elif green_ratio > red_ratio and green_ratio > yellow_ratio:
-                                    colorstr = "Green"
-                                    offset = y - h
-                                else:
-                                    colorstr = "Red"
-                                    offset = y + h * 2
-                                istrue = False
-                                if pixelblobshapefilter == True:
-                                    point_mask = []
-                                    point_mask.append((round(x + w * 0.05), round(y + h * 0.05), False))
-                                    point_mask.append((round(x + w * 0.5), round(y + h * 0.2), True))
-                                    point_mask.append((round(x + w * 0.95), round(y + h * 0.05), False))
-                                    point_mask.append((round(x + w * 0.3), round(y + h * 0.6), True))
-                                    point_mask.append((round(x + w * 0.5), round(y + h * 0.5), True))
-                                    point_mask.append((round(x + w * 0.7), round(y + h * 0.6), True))
-                                    point_mask.append((round(x + w * 0.05), round(y + h * 0.95), False))
-                                    point_mask.append((round(x + w * 0.5), round(y + h * 0.8), True))
-                                    point_mask.append((round(x + w * 0.95), round(y + h * 0.95), False))
-                                    as_expected = True
-                                    for i in range(len(point_mask)):
-                                        point_x, point_y, expected = point_mask[i]
-                                        color = filtered_frame_bw[point_y, point_x]
-                                        color = True if color != 0 else False
-                                        if color != 0 == expected:
-                                            as_expected = False
-                                            break
-                                    if as_expected:
-                                        istrue = True
-                                else:
-                                    istrue = True
-                                if istrue == True:
-                                    coordinates.append((round(x + w * 0.5), round(offset), w, h, colorstr))
-                    
-        else:
-            # True: advancedmode, performancemode --- False:     
-            mask_red = cv2.inRange(rgb_frame, lower_red_advanced, upper_red_advanced)
-            filtered_frame_bw = mask_red.copy()
-            final_frame = frame
-            contours, _ = cv2.findContours(mask_red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            for contour in contours:
-                x, y, w, h = cv2.boundingRect(contour)
-                istrue = False
-                if rectsizefilter == True:
-                    if min_rect_size < w and max_rect_size > w and min_rect_size < h and max_rect_size > h:
-                        istrue = True
-                else:
-                    istrue = True
-                if istrue == True:
-                    istrue = False
-                    if widthheightratiofilter == True:
-                        if w / h - 1 < width_height_ratio * 2 and w / h - 1 > -width_height_ratio:
-                            istrue = True
-                    else:
-                        istrue = True
-                    if istrue == True:
-                        red_pixel_count = cv2.countNonZero(mask_red[y:y+h, x:x+w])
-                        total_pixels = w * h
-                        red_ratio = red_pixel_count / total_pixels
-                        istrue = False
-                        if pixelpercentagefilter == True:
-                            if red_ratio < circleplusoffset and red_ratio > circleminusoffset:
-                                istrue = True
-                        else:
-                            istrue = True
-                        if istrue == True:
-                            colorstr = "Red"
-                            offset = y + h * 2
-                            istrue = False
-                            if pixelblobshapefilter == True:
-                                point_mask = []
-                                point_mask.append((round(x + w * 0.05), round(y + h * 0.05), False))
-                                point_mask.append((round(x + w * 0.5), round(y + h * 0.2), True))
-                                point_mask.append((round(x + w * 0.95), round(y + h * 0.05), False))
-                                point_mask.append((round(x + w * 0.3), round(y + h * 0.6), True))
-                                point_mask.append((round(x + w * 0.5), round(y + h * 0.5), True))
-                                point_mask.append((round(x + w * 0.7), round(y + h * 0.6), True))
-                                point_mask.append((round(x + w * 0.05), round(y + h * 0.95), False))
-                                point_mask.append((round(x + w * 0.5), round(y + h * 0.8), True))
-                                point_mask.append((round(x + w * 0.95), round(y + h * 0.95), False))
-                                as_expected = True
-                                for i in range(len(point_mask)):
-                                    point_x, point_y, expected = point_mask[i]
-                                    color = filtered_frame_bw[point_y, point_x]
-                                    color = True if color != 0 else False
-                                    if color != 0 == expected:
-                                        as_expected = False
-                                        break
-                                if as_expected:
-                                    istrue = True
-                            else:
-                                istrue = True
-                            if istrue == True:
-                                coordinates.append((round(x + w * 0.5), round(offset), w, h, colorstr))
+    # The frame is read-only, the windows get their own copies to draw on
+    final_frame = frame.copy() if finalwindow == True else frame
+    if grayscalewindow == True:
+        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        filtered_frame_bw = cv2.bitwise_and(gray_frame, gray_frame, mask=labels)
 
 
     try:
@@ -1247,7 +1132,9 @@ def plugin(data):
                             elif x2_classification > frameFull.shape[1]:
                                 x2_classification = frameFull.shape[1]
                             image_classification = frameFull[y1_classification:y2_classification, x1_classification:x2_classification]
-                            approved = ClassifyImage(image_classification)
+                            # Not approved until the classification is done
+                            approved = None
+                            AddCandidate(new_id, image_classification)
                         else:
                             approved = True
 
@@ -1301,6 +1188,10 @@ def plugin(data):
         for i, (_, _, id, _) in enumerate(trafficlights):
             if id not in exists:
                 del trafficlights[i]
+
+        if UseAI == True:
+            ClassifyCandidates()
+            UpdateClassifications()
     except Exception as e:
         exc = traceback.format_exc()
         SendCrashReport("TrafficLightDetection - Tracking/AI Error.", str(exc))
@@ -1384,22 +1275,22 @@ def plugin(data):
                 if approved == True:
                     if state == "Red":
                         color = (0, 0, 255)
-                        cv2.rectangle(final_frame, (round(x - w * 1.1), round(y - h * 2.5)), (round(x + w * 1.1), round(y + h * 2.5)), color, radius)
                         if finalwindow == True:
+                            cv2.rectangle(final_frame, (round(x - w * 1.1), round(y - h * 2.5)), (round(x + w * 1.1), round(y + h * 2.5)), color, radius)
                             cv2.rectangle(final_frame, (round(x - w * 0.5), round(y - h * 2)), (round(x + w * 0.5), round(y - h)), (150, 150, 150), thickness)
                             cv2.rectangle(final_frame, (round(x - w * 0.5), round(y - h * 0.5)), (round(x + w * 0.5), round(y + h * 0.5)), (150, 150, 150), thickness)
                             cv2.rectangle(final_frame, (round(x + w * 0.5), round(y + h * 2)), (round(x - w * 0.5), round(y + h)), (150, 150, 150), thickness)
                     if state == "Yellow":
                         color = (0, 255, 255)
-                        cv2.rectangle(final_frame, (round(x - w * 1.1), round(y - h * 2.5)), (round(x + w * 1.1), round(y + h * 2.5)), color, radius)
                         if finalwindow == True:
+                            cv2.rectangle(final_frame, (round(x - w * 1.1), round(y - h * 2.5)), (round(x + w * 1.1), round(y + h * 2.5)), color, radius)
                             cv2.rectangle(final_frame, (round(x - w * 0.5), round(y - h * 2)), (round(x + w * 0.5), round(y - h)), (150, 150, 150), thickness)
                             cv2.rectangle(final_frame, (round(x - w * 0.5), round(y - h * 0.5)), (round(x + w * 0.5), round(y + h * 0.5)), (150, 150, 150), thickness)
                             cv2.rectangle(final_frame, (round(x + w * 0.5), round(y + h * 2)), (round(x - w * 0.5), round(y + h)), (150, 150, 150), thickness)
                     if state == "Green":
                         color = (0, 255, 0)
-                        cv2.rectangle(final_frame, (round(x - w * 1.1), round(y - h * 2.5)), (round(x + w * 1.1), round(y + h * 2.5)), color, radius)
                         if finalwindow == True:
+                            cv2.rectangle(final_frame, (round(x - w * 1.1), round(y - h * 2.5)), (round(x + w * 1.1), round(y + h * 2.5)), color, radius)
                             cv2.rectangle(final_frame, (round(x - w * 0.5), round(y - h * 2)), (round(x + w * 0.5), round(y - h)), (150, 150, 150), thickness)
                             cv2.rectangle(final_frame, (round(x - w * 0.5), round(y - h * 0.5)), (round(x + w * 0.5), round(y + h * 0.5)), (150, 150, 150), thickness)
                             cv2.rectangle(final_frame, (round(x + w * 0.5), round(y + h * 2)), (round(x - w * 0.5), round(y + h)), (150, 150, 150), thickness)
@@ -1458,6 +1349,7 @@ def plugin(data):
         data["TrafficLightDetection"] = {}
         data["TrafficLightDetection"]["simple"] = data_simple
         data["TrafficLightDetection"]["detailed"] = trafficlights
+        lastResult = data["TrafficLightDetection"]
     except Exception as e:
         exc = traceback.format_exc()
         SendCrashReport("TrafficLightDetection - Data Error.", str(exc))
@@ -1525,11 +1417,17 @@ def plugin(data):
     return data
 
 
-def onEnable():
+def SettingsChanged(tldSettings):
     UpdateSettings()
+    # Let the screen capture know which part of the screen is used
+    capture.RequestRegion("TrafficLightDetection", (x1, y1, x2, y2))
+
+def onEnable():
+    settings.Subscribe("TrafficLightDetection", SettingsChanged)
 
 def onDisable():
-    pass
+    settings.Unsubscribe("TrafficLightDetection", SettingsChanged)
+    capture.ReleaseRegion("TrafficLightDetection")
 
 
 class UI():
@@ -1550,11 +1448,9 @@ class UI():
         def UpdateSliderValue_scale(self):
             self.OutputWindowscale.set(self.OutputWindowscaleSlider.get())
             settings.CreateSettings("TrafficLightDetection", "scale", self.OutputWindowscaleSlider.get())
-            UpdateSettings()
         def UpdateSliderValue_posestscale(self):
             self.PosEstWindowscale.set(self.PosEstWindowscaleSlider.get())
             settings.CreateSettings("TrafficLightDetection", "posestscale", self.PosEstWindowscaleSlider.get())
-            UpdateSettings()
         def UpdateSliderValue_x1ofsc(self):
             self.x1ofsc.set(self.x1ofscSlider.get())
             if self.x1ofscSlider.get() >= self.x2ofscSlider.get():
@@ -1566,7 +1462,6 @@ class UI():
                     self.x2ofscSlider.set(self.x2ofsc.get())
                     settings.CreateSettings("TrafficLightDetection", "x2ofsc", self.x2ofscSlider.get())
             settings.CreateSettings("TrafficLightDetection", "x1ofsc", self.x1ofscSlider.get())
-            UpdateSettings()
         def UpdateSliderValue_y1ofsc(self):
             self.y1ofsc.set(self.y1ofscSlider.get())
             if self.y1ofscSlider.get() >= self.y2ofscSlider.get():
@@ -1578,7 +1473,6 @@ class UI():
                     self.y2ofscSlider.set(self.y2ofsc.get())
                     settings.CreateSettings("TrafficLightDetection", "y2ofsc", self.y2ofscSlider.get())
             settings.CreateSettings("TrafficLightDetection", "y1ofsc", self.y1ofscSlider.get())
-            UpdateSettings()
         def UpdateSliderValue_x2ofsc(self):
             self.x2ofsc.set(self.x2ofscSlider.get())
             if self.x2ofscSlider.get() <= self.x1ofscSlider.get():
@@ -1590,7 +1484,6 @@ class UI():
                     self.x1ofscSlider.set(self.x1ofsc.get())
                     settings.CreateSettings("TrafficLightDetection", "x1ofsc", self.x1ofscSlider.get())
             settings.CreateSettings("TrafficLightDetection", "x2ofsc", self.x2ofscSlider.get())
-            UpdateSettings()
         def UpdateSliderValue_y2ofsc(self):
             self.y2ofsc.set(self.y2ofscSlider.get())
             if self.y2ofscSlider.get() <= self.y1ofscSlider.get():
@@ -1602,15 +1495,12 @@ class UI():
                     self.y1ofscSlider.set(self.y1ofsc.get())
                     settings.CreateSettings("TrafficLightDetection", "y1ofsc", self.y1ofscSlider.get())
             settings.CreateSettings("TrafficLightDetection", "y2ofsc", self.y2ofscSlider.get())
-            UpdateSettings()
         def UpdateSliderValue_minrectsize(self):
             self.minrectsize.set(self.minrectsizeSlider.get())
             settings.CreateSettings("TrafficLightDetection", "minrectsize", self.minrectsizeSlider.get())
-            UpdateSettings()
         def UpdateSliderValue_maxrectsize(self):
             self.maxrectsize.set(self.maxrectsizeSlider.get())
             settings.CreateSettings("TrafficLightDetection", "maxrectsize", self.maxrectsizeSlider.get())
-            UpdateSettings()
         
         def exampleFunction(self):
             
@@ -1703,11 +1593,11 @@ class UI():
 
 
             helpers.MakeEmptyLine(outputwindowFrame,1,0)
-            helpers.MakeCheckButton(outputwindowFrame, "Final Window\n--------------------\nIf enabled, the app creates a window with the result of the traffic light detection.", "TrafficLightDetection", "finalwindow", 2, 0, width=80, callback=lambda:UpdateSettings())
-            helpers.MakeCheckButton(outputwindowFrame, "Grayscale Window\n---------------------------\nIf enabled, the app creates a window with the color masks combined in a grayscaled frame.", "TrafficLightDetection", "grayscalewindow", 3, 0, width=80, callback=lambda:UpdateSettings())
+            helpers.MakeCheckButton(outputwindowFrame, "Final Window\n--------------------\nIf enabled, the app creates a window with the result of the traffic light detection.", "TrafficLightDetection", "finalwindow", 2, 0, width=80)
+            helpers.MakeCheckButton(outputwindowFrame, "Grayscale Window\n---------------------------\nIf enabled, the app creates a window with the color masks combined in a grayscaled frame.", "TrafficLightDetection", "grayscalewindow", 3, 0, width=80)
             helpers.MakeEmptyLine(outputwindowFrame,5,0)
             helpers.MakeEmptyLine(outputwindowFrame,6,0)
-            helpers.MakeCheckButton(outputwindowFrame, "Position Estimation Window\n----------------------------------\nIf enabled, the app creates a window which shows the estimated position of the traffic light.", "TrafficLightDetection", "positionestimationwindow", 7, 0, width=80, callback=lambda:UpdateSettings())
+            helpers.MakeCheckButton(outputwindowFrame, "Position Estimation Window\n----------------------------------\nIf enabled, the app creates a window which shows the estimated position of the traffic light.", "TrafficLightDetection", "positionestimationwindow", 7, 0, width=80)
 
 
 
@@ -1728,7 +1618,7 @@ class UI():
                 image_label.grid(row=3, column=0, padx=10, pady=10, sticky="nw" if i == 0 else "n" if i == 1 else "ne")
                 image_label.image = photo
             helpers.MakeEmptyLine(tld_datasetFrame, 4, 0)
-            helpers.MakeCheckButton(tld_datasetFrame, "Help collecting anonymous traffic light images", "TrafficLightDetection", "send_traffic_light_images", 5, 0, width=80, callback=lambda:UpdateSettings())
+            helpers.MakeCheckButton(tld_datasetFrame, "Help collecting anonymous traffic light images", "TrafficLightDetection", "send_traffic_light_images", 5, 0, width=80)
             helpers.MakeButton(tld_datasetFrame, "Open Website", lambda: OpenWebsite(), 6, 0, width=100, sticky="nw")
             def OpenWebsite():
                 browser = helpers.Dialog("Traffic Light Detection Dataset","In which brower should the website be opened?", ["In-app browser", "External browser"], "In-app browser", "External Browser")
@@ -1745,9 +1635,9 @@ class UI():
 
 
 
-            helpers.MakeCheckButton(generalFrame, "Yellow Light Detection (not recommended)\n-------------------------------------------------------------\nIf enabled, the trafficlight detection tries to detect yellow traffic\nlights, but it is not recommended because it causes more wrong\ndetected traffic lights.", "TrafficLightDetection", "detectyellowlight", 4, 0, width=60, callback=lambda:UpdateSettings())
-            helpers.MakeCheckButton(generalFrame, "Performance Mode (recommended)\n---------------------------------------------------\nIf enabled, the traffic light detection only detects red traffic lights,\nwhich increases performance, but does not reduce detection accuracy.", "TrafficLightDetection", "performancemode", 5, 0, width=60, callback=lambda:UpdateSettings())
-            helpers.MakeCheckButton(generalFrame, "Advanced Settings\n---------------------------\nIf enabled, the traffic light detection uses the settings you set in\nthe Advanced tab. (could have a bad impact on performance)", "TrafficLightDetection", "advancedmode", 6, 0, width=60, callback=lambda:UpdateSettings())
+            helpers.MakeCheckButton(generalFrame, "Yellow Light Detection (not recommended)\n-------------------------------------------------------------\nIf enabled, the trafficlight detection tries to detect yellow traffic\nlights, but it is not recommended because it causes more wrong\ndetected traffic lights.", "TrafficLightDetection", "detectyellowlight", 4, 0, width=60)
+            helpers.MakeCheckButton(generalFrame, "Performance Mode (recommended)\n---------------------------------------------------\nIf enabled, the traffic light detection only detects red traffic lights,\nwhich increases performance, but does not reduce detection accuracy.", "TrafficLightDetection", "performancemode", 5, 0, width=60)
+            helpers.MakeCheckButton(generalFrame, "Advanced Settings\n---------------------------\nIf enabled, the traffic light detection uses the settings you set in\nthe Advanced tab. (could have a bad impact on performance)", "TrafficLightDetection", "advancedmode", 6, 0, width=60)
             self.uifov = helpers.MakeComboEntry(generalFrame, 'FOV (Field of View)\n----------------------------\nYou need to set the field of view for the position estimation to work.\nYou can find the FOV in the game by pressing F4, then selecting "Adjust seats".', "TrafficLightDetection", "fov", 7, 0, labelwidth=80, width=9, isFloat=True)
             helpers.MakeButton(generalFrame, "Save FOV", lambda: settings.CreateSettings("TrafficLightDetection", "fov", self.uifov.get() if self.uifov.get() > 0 else 1), 7, 1, width=9, sticky="e")
             helpers.MakeEmptyLine(generalFrame,9,0)
@@ -1766,12 +1656,12 @@ class UI():
                     helpers.OpenInBrowser("https://wiki.ets2la.com/plugins/trafficlightdetection")
 
 
-            helpers.MakeCheckButton(filtersFrame, "Rect Size Filter", "TrafficLightDetection", "rectsizefilter", 3, 0, width=60, callback=lambda:UpdateSettings())
-            helpers.MakeCheckButton(filtersFrame, "Width Height Ratio Filter", "TrafficLightDetection", "widthheightratiofilter", 4, 0, width=60, callback=lambda:UpdateSettings())
-            helpers.MakeCheckButton(filtersFrame, "Pixel Percentage Filter", "TrafficLightDetection", "pixelpercentagefilter", 5, 0, width=60, callback=lambda:UpdateSettings())
-            helpers.MakeCheckButton(filtersFrame, "Pixel Blob Shape Filter", "TrafficLightDetection", "pixelblobshapefilter", 6, 0, width=60, callback=lambda:UpdateSettings())
+            helpers.MakeCheckButton(filtersFrame, "Rect Size Filter", "TrafficLightDetection", "rectsizefilter", 3, 0, width=60)
+            helpers.MakeCheckButton(filtersFrame, "Width Height Ratio Filter", "TrafficLightDetection", "widthheightratiofilter", 4, 0, width=60)
+            helpers.MakeCheckButton(filtersFrame, "Pixel Percentage Filter", "TrafficLightDetection", "pixelpercentagefilter", 5, 0, width=60)
+            helpers.MakeCheckButton(filtersFrame, "Pixel Blob Shape Filter", "TrafficLightDetection", "pixelblobshapefilter", 6, 0, width=60)
 
-            helpers.MakeCheckButton(trackeraiFrame, "Use AI to confirm traffic lights\n-------------------------------------------\nIf enabled, the app will confirm the detected traffic lights to minimize false detections.", "TrafficLightDetection", "UseAI", 3, 0, width=97, callback=lambda: UpdateSettings())
+            helpers.MakeCheckButton(trackeraiFrame, "Use AI to confirm traffic lights\n-------------------------------------------\nIf enabled, the app will confirm the detected traffic lights to minimize false detections.", "TrafficLightDetection", "UseAI", 3, 0, width=97)
             helpers.MakeCheckButton(trackeraiFrame, f"Try to use your GPU to run the AI\n-------------------------------------------------\nThis requires a NVIDIA GPU with CUDA installed. (Currently using {str(AIDevice).upper()})", "TrafficLightDetection", "UseCUDA", 4, 0, width=97, callback=lambda: {UpdateSettings(), self.exampleFunction()})
             def InstallCUDAPopup():
                 helpers.Dialog("Warning: CUDA is only available for NVIDIA GPUs!", f"1. Check on https://wikipedia.org/wiki/CUDA#GPUs_supported which CUDA version your GPU supports.\n2. Go to https://pytorch.org/ and copy the download command for the corresponding CUDA version which is compatible with your GPU.\n    (Select Stable, Windows, Pip, Python and the CUDA version you need)\n3. Open your file explorer and go to {os.path.dirname(os.path.dirname(variables.PATH))} and run the activate.bat\n4. Run this command in the terminal which opened after running the activate.bat: 'pip uninstall torch torchvision torchaudio'\n5. After the previous command finished, run the command you copied from the PyTorch website and wait for the installation to finish.\n6. Restart the app and the app should automatically detect CUDA as available and use your GPU for the AI.", ["Exit"], "Exit")
@@ -2022,7 +1912,6 @@ class UI():
             settings.CreateSettings("TrafficLightDetection", "lowergreen_r", self.lowergreenr.get())
             settings.CreateSettings("TrafficLightDetection", "lowergreen_g", self.lowergreeng.get())
             settings.CreateSettings("TrafficLightDetection", "lowergreen_b", self.lowergreenb.get())
-            UpdateSettings()
 
         
         def resetadvancedcolorstodefault(self):
@@ -2062,7 +1951,6 @@ class UI():
             self.lowergreenr.set(0)
             self.lowergreeng.set(200)
             self.lowergreenb.set(0)
-            UpdateSettings()
 
         def resetadvancedfilterstodefault(self):
             settings.CreateSettings("TrafficLightDetection", "rectsizefilter", True)
@@ -2077,7 +1965,6 @@ class UI():
             self.maxrectsizeSlider.set(round(screen_width / 10))
             self.maxrectsize.set(round(screen_width / 10))
             self.exampleFunction()
-            UpdateSettings()
 
         def resetalladvancedsettingstodefault(self):
             settings.CreateSettings("TrafficLightDetection", "rectsizefilter", True)
@@ -2125,7 +2012,6 @@ class UI():
             self.lowergreeng.set(200)
             self.lowergreenb.set(0)
             self.exampleFunction()
-            UpdateSettings()
 
         def open_screencapture_setup(self):
             import subprocess
@@ -10,7 +10,11 @@ PluginInfo = PluginInformation(
     author="Cloud-121",
     url="https://github.com/Cloud-121/ETS2-Python-Api",
     type="dynamic", # = Panel
-    dynamicOrder="before image capture" # Will run the plugin before anything else in the mainloop (data will be empty)
+    dynamicOrder="before image capture", # Will run the plugin before anything else in the mainloop (data will be empty)
+    reads=["last"],
+    writes=["api"],
+    maxExecTime=0,
+    threadSafe=True
 )
 
 import tkinter as tk
@@ -19,13 +23,17 @@ import src.helpers as helpers
 import src.mainUI as mainUI
 import src.variables as variables
 import src.settings as settings
+import src.capture as capture
 from src.loading import LoadingWindow
 from src.translator import Translate
 import src.mainUI as mainUI
 import time
+import threading
 import os
 import math
 from plugins.TruckSimAPI.scsPlugin import scsTelemetry
+import plugins.TruckSimAPI.sampler as sampler
+from plugins.TruckSimAPI.recording import telemetryRecorder
 
 # The main file runs the "plugin" function each time the plugin is called
 # The data variable contains the data from the mainloop, plugins can freely add and modify data as needed
@@ -35,10 +43,14 @@ lastX = 0
 lastY = 0
 isConnected = False
 popup = None
+popupQueued = False
+recorder = None
+lastReadTime = 0
 def plugin(data):
     global API
     global lastX
     global lastY
+    global lastReadTime
     
     try:
         checkAPI()
@@ -50,8 +62,25 @@ def plugin(data):
         traceback.print_exc()
         return data
     
+    # Record last frame's telemetry together with the frame that was captured for it
+    if recorder != None:
+        try:
+            recorder.Write(lastReadTime, data["last"]["api"].buffer, data["last"].get("frameFull"))
+        except: pass
+    
     apiData = API.update()    
+    lastReadTime = time.time()
     data["api"] = apiData
+    data["executionTimes"]["TruckSimAPI decodes saved"] = API.decodesSaved
+    
+    # The game hasn't written a new frame, so the truck hasn't moved either.
+    # Keep last frame's angle instead of smoothing it towards 0.
+    if not apiData.get("fresh", True):
+        try:
+            data["api"]["angle"] = data["last"]["api"]["angle"]
+            data["api"]["velocity"] = data["last"]["api"]["velocity"]
+        except: pass
+        return data
     
     # Calculate the current driving angle based on this and last frames coordinates
     try:
@@ -81,29 +110,77 @@ def plugin(data):
 
     return data # Plugins need to ALWAYS return the data
 
+def StartRecording():
+    """Start recording the telemetry to a new file in the recordings folder.
+    The recordings can be replayed with the VirtualSimAPI plugin."""
+    global recorder
+    if recorder != None:
+        return
+    
+    filename = os.path.join(variables.PATH, "recordings", f"telemetry-{time.strftime('%Y-%m-%d-%H-%M-%S')}.bin")
+    recorder = telemetryRecorder(filename, recordFrames=settings.GetSettings("TruckSimAPI", "recordFrames", False))
+    if recorder.recordFrames:
+        # The saved frame has to be the one captured with the telemetry, not captured later when it's saved
+        capture.RequestRegion("TruckSimAPI recording", (0, 0, 1000000, 1000000))
+    print(f"Recording telemetry to {filename}")
+
+def StopRecording():
+    global recorder
+    if recorder == None:
+        return
+    
+    recorder.Close()
+    capture.ReleaseRegion("TruckSimAPI recording")
+    print(f"Recorded {recorder.records} frames to {recorder.filename}")
+    recorder = None
+
 def checkAPI(dontClosePopup=False):
     global API
     global isConnected
     global popup
+    global popupQueued
     
     if API == None:
         API = scsTelemetry()
-        
-    data = API.update()
     
-    if data["scsValues"]["telemetryPluginRevision"] < 2: 
+    # Only read the header, the full snapshot is taken once in plugin()
+    header = API.readHeader()
+    
+    if header["telemetryPluginRevision"] < 2: 
         isConnected = False
-        if popup == None:
-            popup = helpers.ShowPopup("Waiting for ETS2 to connect\n\nIf you've just installed the SDK\nthen please restart the game.", "Telemetry Server", timeout=0, indeterminate=True, closeIfMainloopStopped=True if not dontClosePopup else False)
-        if popup.closed:
+        if popup != None and popup.closed:
             popup = None
+        if popup == None and not popupQueued:
+            popupQueued = True
+            RunInUIThread(lambda: ShowWaitingPopup(dontClosePopup))
     elif isConnected == False:
         isConnected = True
-        helpers.ShowPopup("\nETS2 connected", "Telemetry Server", timeout=2)
-        try:
-            popup.close()
-            popup = None
-        except: pass
+        RunInUIThread(ShowConnectedPopup)
+
+# The popups are Tk widgets, but checkAPI can be called from the pipeline threads (src/pipeline.py)
+def RunInUIThread(function):
+    if threading.current_thread() is threading.main_thread():
+        function()
+    else:
+        helpers.RunInMainThread(function)
+
+def ShowWaitingPopup(dontClosePopup=False):
+    global popup
+    global popupQueued
+    
+    popupQueued = False
+    if isConnected:
+        return
+    popup = helpers.ShowPopup("Waiting for ETS2 to connect\n\nIf you've just installed the SDK\nthen please restart the game.", "Telemetry Server", timeout=0, indeterminate=True, closeIfMainloopStopped=True if not dontClosePopup else False)
+
+def ShowConnectedPopup():
+    global popup
+    
+    helpers.ShowPopup("\nETS2 connected", "Telemetry Server", timeout=2)
+    try:
+        popup.close()
+        popup = None
+    except: pass
 
 
 # Plugins need to all also have the onEnable and onDisable functions
@@ -112,11 +189,20 @@ def onEnable():
     if API == None:
         API = scsTelemetry()
     
-    data = API.update()
+    API.readHeader()
+    
+    if settings.GetSettings("TruckSimAPI", "sampler", False):
+        sampler.StartSampler(settings.GetSettings("TruckSimAPI", "samplerRate", 250))
+    
+    if settings.GetSettings("TruckSimAPI", "record", False):
+        StartRecording()
 
 def onDisable():
     global popup
     
+    sampler.StopSampler()
+    StopRecording()
+    
     try:
         popup.close()
         popup = None
@@ -146,6 +232,18 @@ class UI():
                     self.list.insert(tk.END, key + ": " + str(value))
     
         
+        def toggleSampler(self):
+            if settings.GetSettings("TruckSimAPI", "sampler", False):
+                sampler.StartSampler(settings.GetSettings("TruckSimAPI", "samplerRate", 250))
+            else:
+                sampler.StopSampler()
+        
+        def toggleRecording(self):
+            if settings.GetSettings("TruckSimAPI", "record", False):
+                StartRecording()
+            else:
+                StopRecording()
+        
         def exampleFunction(self):
             
             try:
@@ -157,6 +255,13 @@ class UI():
             self.root.pack_propagate(0)
             
             
+            # MakeCheckButton uses grid, so it needs its own frame
+            samplerFrame = ttk.Frame(self.root)
+            samplerFrame.pack()
+            helpers.MakeCheckButton(samplerFrame, "Background sampler", "TruckSimAPI", "sampler", 0, 0, callback=lambda: self.toggleSampler(), tooltip="Read the speed, steering and position at a fixed rate on a separate thread.\nPlugins can then use the newest values even if the frame is slow.")
+            helpers.MakeCheckButton(samplerFrame, "Record telemetry", "TruckSimAPI", "record", 0, 1, callback=lambda: self.toggleRecording(), tooltip="Save the telemetry of each frame to the recordings folder.\nThe recording can be replayed with the VirtualSimAPI plugin.")
+            helpers.MakeCheckButton(samplerFrame, "Record frames", "TruckSimAPI", "recordFrames", 0, 2, tooltip="Also save the captured frames with the telemetry. Applies to the next recording.")
+            
             ttk.Button(self.root, text=Translate("Update Data"), command=self.updateData).pack()
             ttk.Label(self.root, text=Translate("Will only work when the app is enabled -> scrollable")).pack()
             # Create a list to hold all of the API data
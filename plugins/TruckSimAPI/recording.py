@@ -0,0 +1,192 @@
+"""
+Recording and reading of raw telemetry blocks.
+
+The recorder appends the raw telemetry snapshot of each frame (and optionally the captured frame)
+to a file. VirtualSimAPI can then replay the file through the real decoder, so the whole plugin
+pipeline can be tested and benchmarked without the game running.
+
+File layout:
+```
+header:  magic (8 bytes), version (uint32), snapshot size (uint32)
+records: timestamp (double), block length (uint32), frame length (uint32), zlib block, jpg frame
+```
+"""
+from src.logger import print
+from plugins.TruckSimAPI.scsPlugin import snapshotSize
+import threading
+import struct
+import queue
+import zlib
+import bisect
+import os
+
+magic = b"ETS2LATR"
+version = 1
+headerStruct = struct.Struct("<8sII")
+recordStruct = struct.Struct("<dII")
+
+class telemetryRecorder:
+    """Appends telemetry blocks to a recording file. If the file already has
+    recordings then the new ones are added to the end.
+
+    The records are compressed and written by a background thread, so encoding the frames
+    doesn't slow down the mainloop. If the thread falls behind by more than maxPending records,
+    the next records are saved without their frame until it catches up.
+
+    Args:
+        filename (str): Path to the recording.
+        recordFrames (bool, optional): Whether to also save the captured frames. Defaults to False.
+    """
+    maxPending = 30
+
+    def __init__(self, filename, recordFrames=False):
+        self.filename = filename
+        self.recordFrames = recordFrames
+        self.records = 0
+        """How many records have been written to the file."""
+        self.pending = queue.Queue()
+        """(timestamp, block, frame) of the records that haven't been written yet, None to stop the writer."""
+
+        folder = os.path.dirname(filename)
+        if folder != "" and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.file = open(filename, "ab")
+        if self.file.tell() == 0:
+            self.file.write(headerStruct.pack(magic, version, snapshotSize))
+
+        self.thread = threading.Thread(target=self.WriterThread, name="Telemetry recorder", daemon=True)
+        self.thread.start()
+
+    def Write(self, timestamp, block, frame=None):
+        """Queue a single record, it's written to the file in the background.
+
+        Args:
+            timestamp (float): When the block was read, in time.time() format.
+            block (bytes): The raw telemetry snapshot.
+            frame (np.ndarray | capture.regionFrame, optional): The captured frame. Only saved if recordFrames is enabled.
+                A capture.regionFrame is only saved if the whole frame was captured together with it
+                (see capture.RequestRegion), so the image is never from a later moment than the telemetry.
+        """
+        if not self.recordFrames or self.pending.qsize() >= self.maxPending:
+            frame = None
+        elif frame is not None and not hasattr(frame, "__array_interface__"):
+            frame = frame.Find((0, 0, frame.shape[1], frame.shape[0]))
+
+        # The snapshot buffer is reused for the next read, the frames are read-only so they can be kept as they are
+        self.pending.put((timestamp, bytes(block[:snapshotSize]), frame))
+
+    def WriteRecord(self, timestamp, block, frame):
+        compressed = zlib.compress(block, 1)
+
+        encodedFrame = b""
+        if frame is not None:
+            import cv2
+            success, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+            if success:
+                encodedFrame = encoded.tobytes()
+
+        self.file.write(recordStruct.pack(timestamp, len(compressed), len(encodedFrame)))
+        self.file.write(compressed)
+        self.file.write(encodedFrame)
+        self.records += 1
+
+    def WriterThread(self):
+        while True:
+            record = self.pending.get()
+            if record is None:
+                break
+            try:
+                self.WriteRecord(*record)
+            except Exception as ex:
+                print(f"Failed to write a telemetry record: {ex.args}")
+
+    def Close(self):
+        """Write the queued records and close the file."""
+        self.pending.put(None)
+        self.thread.join()
+        try:
+            self.file.close()
+        except: pass
+
+class telemetryRecording:
+    """Reads a recording made with telemetryRecorder. The records are indexed when
+    the file is opened, and only read from disk when they are requested.
+
+    Args:
+        filename (str): Path to the recording.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, "rb")
+
+        fileMagic, fileVersion, fileSnapshotSize = headerStruct.unpack(self.file.read(headerStruct.size))
+        if fileMagic != magic:
+            raise Exception(f"{filename} is not a telemetry recording.")
+        if fileVersion != version or fileSnapshotSize != snapshotSize:
+            raise Exception(f"{filename} was recorded with a different version of the telemetry layout.")
+
+        self.timestamps = []
+        """The timestamp of each record."""
+        self.offsets = []
+        """(offset, block length, frame length) of each record."""
+
+        fileSize = os.path.getsize(filename)
+        offset = headerStruct.size
+        while offset + recordStruct.size <= fileSize:
+            self.file.seek(offset)
+            timestamp, blockLength, frameLength = recordStruct.unpack(self.file.read(recordStruct.size))
+            end = offset + recordStruct.size + blockLength + frameLength
+            if end > fileSize:
+                print(f"Last record in {filename} is incomplete, ignoring it.")
+                break
+            self.timestamps.append(timestamp)
+            self.offsets.append((offset + recordStruct.size, blockLength, frameLength))
+            offset = end
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def Duration(self):
+        """Length of the recording in seconds."""
+        if len(self.timestamps) < 2:
+            return 0
+        return self.timestamps[-1] - self.timestamps[0]
+
+    def Read(self, index):
+        """Read a single record.
+
+        Args:
+            index (int): Index of the record.
+
+        Returns:
+            tuple: (timestamp, block, frame). frame is None if it wasn't recorded.
+        """
+        offset, blockLength, frameLength = self.offsets[index]
+        self.file.seek(offset)
+        block = zlib.decompress(self.file.read(blockLength))
+
+        frame = None
+        if frameLength > 0:
+            import cv2
+            import numpy as np
+            frame = cv2.imdecode(np.frombuffer(self.file.read(frameLength), dtype=np.uint8), cv2.IMREAD_COLOR)
+
+        return self.timestamps[index], block, frame
+
+    def IndexAt(self, elapsed):
+        """Get the index of the record that was current the given time after the start of the recording.
+
+        Args:
+            elapsed (float): Seconds since the first record.
+
+        Returns:
+            int: Index of the record.
+        """
+        index = bisect.bisect_right(self.timestamps, self.timestamps[0] + elapsed) - 1
+        return max(0, min(index, len(self.timestamps) - 1))
+
+    def Close(self):
+        try:
+            self.file.close()
+        except: pass
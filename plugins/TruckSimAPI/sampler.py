@@ -0,0 +1,208 @@
+"""
+Optional background sampler for the telemetry.
+
+The main loop reads the telemetry once per frame, so a slow frame also delays the speed and steering
+values that the controllers see. When enabled the sampler polls the shared memory on its own thread
+at a fixed rate and stores the most used values in a ring buffer. Plugins can then get the newest
+sample, or the values at any time in the last few seconds.
+
+```python
+from plugins.TruckSimAPI.sampler import GetSampler
+
+sampler = GetSampler()
+if sampler != None:
+    latest = sampler.Latest() # {"sampleTime": ..., "speed": ..., "gameSteer": ...}
+    before = sampler.At(time.time() - 0.05) # Interpolated values 50ms ago
+```
+"""
+from src.logger import print
+from plugins.TruckSimAPI.scsPlugin import scsTelemetry, findField, headerStruct
+import numpy as np
+import threading
+import time
+
+hotFields = [
+    (None, "time"),
+    ("truckPlacement", "coordinateX"),
+    ("truckPlacement", "coordinateY"),
+    ("truckPlacement", "coordinateZ"),
+    ("truckPlacement", "rotationX"),
+    ("truckPlacement", "rotationY"),
+    ("truckPlacement", "rotationZ"),
+    ("truckFloat", "speed"),
+    ("truckFloat", "userSteer"),
+    ("truckFloat", "gameSteer"),
+    ("truckFloat", "userThrottle"),
+    ("truckFloat", "gameThrottle"),
+]
+"""The values that are sampled, (category, name) in the telemetry data."""
+
+columns = ["sampleTime"] + [name for category, name in hotFields]
+"""Column names of the ring buffer. sampleTime is time.time() when the sample was taken."""
+
+headingColumn = columns.index("rotationX")
+"""The heading is in turns (0-1) and wraps around, so it needs special care when interpolating."""
+
+fieldReaders = [findField(category, name) for category, name in hotFields]
+
+class telemetrySampler:
+    """Polls the telemetry on a background thread and stores the hot values in a ring buffer.
+
+    There is only ever one writer (the sampler thread), which fills a row and then bumps the
+    write counter. Readers only look at rows that have been completely written, so no lock is needed.
+
+    Args:
+        rate (int, optional): How many times per second to poll the shared memory. Defaults to 250.
+        history (float, optional): How many seconds of samples to keep. Defaults to 4.
+    """
+    def __init__(self, rate=250, history=4):
+        self.rate = rate
+        self.size = max(int(rate * history), 2)
+        self.buffer = np.zeros((self.size, len(columns)), dtype=np.float64)
+        self.written = 0
+        """Total amount of samples written, the next sample goes to row written % size."""
+        self.running = False
+        self.thread = None
+        self.telemetry = scsTelemetry()
+
+    def Start(self):
+        """Start the sampler thread. Does nothing if it's already running."""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.SamplerThread, daemon=True)
+        self.thread.start()
+
+    def Stop(self):
+        """Stop the sampler thread and close the shared memory."""
+        self.running = False
+        if self.thread != None:
+            self.thread.join(1)
+            self.thread = None
+        self.telemetry.close()
+
+    def SamplerThread(self):
+        interval = 1 / self.rate
+        lastTimes = None
+        lastError = None
+        while self.running:
+            startTime = time.perf_counter()
+            try:
+                buffer = self.telemetry.connect()
+                sdkActive, pause, gameTime, simulatedTime, renderTime, revision = headerStruct.unpack_from(buffer, 0)
+                # Only store a new sample when the game has written a new frame,
+                # duplicates would turn the interpolation into steps.
+                if (gameTime, renderTime) != lastTimes:
+                    lastTimes = (gameTime, renderTime)
+                    row = self.buffer[self.written % self.size]
+                    row[0] = time.time()
+                    for i, (offset, reader) in enumerate(fieldReaders):
+                        row[i + 1] = reader.unpack_from(buffer, offset)[0]
+                    self.written += 1
+            except Exception as ex:
+                # The game isn't running, try again later
+                if ex.args != lastError:
+                    lastError = ex.args
+                    print(ex.args)
+                time.sleep(1)
+                continue
+
+            sleepTime = interval - (time.perf_counter() - startTime)
+            if sleepTime > 0:
+                time.sleep(sleepTime)
+
+    def ToDict(self, row):
+        return {name: float(value) for name, value in zip(columns, row)}
+
+    def Latest(self):
+        """Get the newest sample.
+
+        Returns:
+            dict | None: The sampled values, or None if nothing has been sampled yet.
+        """
+        written = self.written
+        if written == 0:
+            return None
+        return self.ToDict(self.buffer[(written - 1) % self.size].copy())
+
+    def History(self, seconds=None):
+        """Get the stored samples from oldest to newest.
+
+        Args:
+            seconds (float, optional): Only return samples from the last n seconds. Defaults to all samples.
+
+        Returns:
+            np.ndarray: The samples, one row per sample. Use the columns list for the column names.
+        """
+        written = self.written
+        # Leave out the oldest row when the buffer is full, it's the one being written next.
+        count = min(written, self.size - 1)
+        rows = self.buffer[np.arange(written - count, written) % self.size]
+        if seconds != None:
+            rows = rows[rows[:, 0] >= time.time() - seconds]
+        return rows
+
+    def At(self, timestamp):
+        """Get the values at a specific time, linearly interpolated between the two closest samples.
+        Times outside of the history return the closest sample.
+
+        Args:
+            timestamp (float): The time in time.time() format.
+
+        Returns:
+            dict | None: The interpolated values, or None if nothing has been sampled yet.
+        """
+        rows = self.History()
+        if len(rows) == 0:
+            return None
+
+        times = rows[:, 0]
+        if timestamp <= times[0]:
+            return self.ToDict(rows[0])
+        if timestamp >= times[-1]:
+            return self.ToDict(rows[-1])
+
+        index = int(np.searchsorted(times, timestamp))
+        before = rows[index - 1]
+        after = rows[index].copy()
+        # Take the shortest way around for the heading (0.99 -> 0.01 should not go through 0.5)
+        after[headingColumn] -= round(after[headingColumn] - before[headingColumn])
+
+        span = after[0] - before[0]
+        t = (timestamp - before[0]) / span if span > 0 else 0
+        values = before + (after - before) * t
+        values[headingColumn] %= 1
+
+        values[0] = timestamp
+        return self.ToDict(values)
+
+sampler = None
+"""The running sampler, if enabled in the TruckSimAPI settings."""
+
+def GetSampler():
+    """Get the running sampler.
+
+    Returns:
+        telemetrySampler | None: The sampler, or None if it's disabled.
+    """
+    return sampler
+
+def StartSampler(rate=250):
+    """Start the global sampler.
+
+    Args:
+        rate (int, optional): How many times per second to poll the shared memory. Defaults to 250.
+    """
+    global sampler
+    if sampler != None:
+        return
+    sampler = telemetrySampler(rate)
+    sampler.Start()
+
+def StopSampler():
+    """Stop the global sampler."""
+    global sampler
+    if sampler == None:
+        return
+    sampler.Stop()
+    sampler = None
@@ -1,5 +1,6 @@
 import mmap
 import struct
+import copy
 from src.logger import print
 
 # https://github.com/RenCloud/scs-sdk-plugin/blob/dev/scs-telemetry/inc/scs-telemetry-common.hpp
@@ -10,600 +11,811 @@ mmapSize = 32*1024
 stringSize = 64
 wheelSize = 14
 substanceSize = 25
+trailerCount = 10
+trailerOffset = 6000
+trailerSize = 1560
 
+# The shared memory block is a packed C struct, so every zone can be described as a list of
+# (category, name, type, count) entries. A category of None means the value is stored directly
+# under data[name], otherwise it's stored under data[category][name].
+# The layouts are compiled into one struct.Struct per zone below, which lets us decode a zone
+# with a single unpack_from call instead of reading the values one by one.
+typeFormats = {
+    "bool": "?",
+    "int": "i",
+    "game": "i",
+    "float": "f",
+    "double": "d",
+    "longlong": "Q",
+    "char": "s",
+    "stringArray": "s",
+}
 
-import time
+gameNames = {
+    1: "ETS2",
+    2: "ATS"
+}
 
-class scsTelemetry:
-    
-    # VARIABLE READING
-    
-    def readGame(self, offset):
-        int = struct.unpack('i', self.mm[offset:offset+4])[0]
-        if int == 1:
-            return "ETS2", offset+4
-        elif int == 2:
-            return "ATS", offset+4
-        else:
-            return "unknown", offset+4
-    
-    # SPECIAL READING
+# ALL OFFSETS EXTRACTED FROM https://github.com/RenCloud/scs-sdk-plugin/blob/dev/scs-telemetry/inc/scs-telemetry-common.hpp
+telemetryLayout = [
+    # ZONE 1 -> Offset 0
+    (0, [
+        (None, "sdkActive", "bool", 1),
+        (None, "placeHolder", "char", 3),
+        (None, "pause", "bool", 1),
+        (None, "placeHolder2", "char", 3),
+        (None, "time", "longlong", 1),
+        (None, "simulatedTime", "longlong", 1),
+        (None, "renderTime", "longlong", 1),
+        (None, "multiplayerTimeOffset", "longlong", 1),
+    ]),
+
+    # ZONE 2 -> Offset 40
+    # The second zone contains unsigned integers and is sorted in sub structures
+    (40, [
+        ("scsValues", "telemetryPluginRevision", "int", 1),
+        ("scsValues", "versionMajor", "int", 1),
+        ("scsValues", "versionMinor", "int", 1),
+        ("scsValues", "game", "game", 1),
+        ("scsValues", "telemetryVersionGameMajor", "int", 1),
+        ("scsValues", "telemetryVersionGameMinor", "int", 1),
+        ("commonUI", "timeAbs", "int", 1),
+        ("configUI", "gears", "int", 1),
+        ("configUI", "gearsReverse", "int", 1),
+        ("configUI", "retarderStepCount", "int", 1),
+        ("configUI", "truckWheelCount", "int", 1),
+        ("configUI", "selectorCount", "int", 1),
+        ("configUI", "timeAbsDelivery", "int", 1),
+        ("configUI", "maxTrailerCount", "int", 1),
+        ("configUI", "unitCount", "int", 1),
+        ("configUI", "plannedDistanceKm", "int", 1),
+        ("truckUI", "shifterSlot", "int", 1),
+        ("truckUI", "retarderBrake", "int", 1),
+        ("truckUI", "lightsAuxFront", "int", 1),
+        ("truckUI", "lightsAuxRoof", "int", 1),
+        ("truckUI", "truckWheelSubstance", "int", 16),
+        ("truckUI", "hshifterPosition", "int", 32),
+        ("truckUI", "hshifterBitmask", "int", 32),
+        ("gameplayUI", "jobDeliveredDeliveryTime", "int", 1),
+        ("gameplayUI", "jobStartingTime", "int", 1),
+        ("gameplayUI", "jobFinishedTime", "int", 1),
+        (None, "bufferUI", "char", 48),
+    ]),
+
+    # ZONE 3 -> Offset 500
+    # The third zone contains integers and is sorted in sub structures
+    (500, [
+        ("commonInt", "restStop", "int", 1),
+        ("truckInt", "gear", "int", 1),
+        ("truckInt", "gearDashboard", "int", 1),
+        ("truckInt", "hshifterResulting", "int", 32),
+        (None, "bufferInt", "char", 56),
+    ]),
+
+    # ZONE 4 -> Offset 700
+    # The fourth zone contains floats and is sorted in sub structures (4 bytes of padding before it)
+    (700, [
+        ("commonFloat", "scale", "float", 1),
+        ("configFloat", "fuelCapacity", "float", 1),
+        ("configFloat", "fuelWarningFactor", "float", 1),
+        ("configFloat", "adblueCapacity", "float", 1),
+        ("configFloat", "adblueWarningFactor", "float", 1),
+        ("configFloat", "airPressureWarning", "float", 1),
+        ("configFloat", "airPressureEmergency", "float", 1),
+        ("configFloat", "oilPressureWarning", "float", 1),
+        ("configFloat", "waterTemperatureWarning", "float", 1),
+        ("configFloat", "batteryVoltageWarning", "float", 1),
+        ("configFloat", "engineRpmMax", "float", 1),
+        ("configFloat", "gearDifferential", "float", 1),
+        ("configFloat", "cargoMass", "float", 1),
+        ("configFloat", "truckWheelRadius", "float", 16),
+        ("configFloat", "gearRatiosForward", "float", 24),
+        ("configFloat", "gearRatiosReverse", "float", 8),
+        ("configFloat", "unitMass", "float", 1),
+        ("truckFloat", "speed", "float", 1),
+        ("truckFloat", "engineRpm", "float", 1),
+        ("truckFloat", "userSteer", "float", 1),
+        ("truckFloat", "userThrottle", "float", 1),
+        ("truckFloat", "userBrake", "float", 1),
+        ("truckFloat", "userClutch", "float", 1),
+        ("truckFloat", "gameSteer", "float", 1),
+        ("truckFloat", "gameThrottle", "float", 1),
+        ("truckFloat", "gameBrake", "float", 1),
+        ("truckFloat", "gameClutch", "float", 1),
+        ("truckFloat", "cruiseControlSpeed", "float", 1),
+        ("truckFloat", "airPressure", "float", 1),
+        ("truckFloat", "brakeTemperature", "float", 1),
+        ("truckFloat", "fuel", "float", 1),
+        ("truckFloat", "fuelAvgConsumption", "float", 1),
+        ("truckFloat", "fuelRange", "float", 1),
+        ("truckFloat", "adblue", "float", 1),
+        ("truckFloat", "oilPressure", "float", 1),
+        ("truckFloat", "oilTemperature", "float", 1),
+        ("truckFloat", "waterTemperature", "float", 1),
+        ("truckFloat", "batteryVoltage", "float", 1),
+        ("truckFloat", "lightsDashboard", "float", 1),
+        ("truckFloat", "wearEngine", "float", 1),
+        ("truckFloat", "wearTransmission", "float", 1),
+        ("truckFloat", "wearCabin", "float", 1),
+        ("truckFloat", "wearChassis", "float", 1),
+        ("truckFloat", "wearWheels", "float", 1),
+        ("truckFloat", "truckOdometer", "float", 1),
+        ("truckFloat", "routeDistance", "float", 1),
+        ("truckFloat", "routeTime", "float", 1),
+        ("truckFloat", "speedLimit", "float", 1),
+        ("truckFloat", "truck_wheelSuspDeflection", "float", 16),
+        ("truckFloat", "truck_wheelVelocity", "float", 16),
+        ("truckFloat", "truck_wheelSteering", "float", 16),
+        ("truckFloat", "truck_wheelRotation", "float", 16),
+        ("truckFloat", "truck_wheelLift", "float", 16),
+        ("truckFloat", "truck_wheelLiftOffset", "float", 16),
+        ("gameplayFloat", "jobDeliveredCargoDamage", "float", 1),
+        ("gameplayFloat", "jobDeliveredDistanceKm", "float", 1),
+        ("gameplayFloat", "refuelAmount", "float", 1),
+        ("jobFloat", "cargoDamage", "float", 1),
+        (None, "bufferFloat", "char", 28),
+    ]),
+
+    # ZONE 5 -> Offset 1500
+    # The fifth zone contains bools and is sorted in sub structures
+    (1500, [
+        ("configBool", "truckWheelSteerable", "bool", 16),
+        ("configBool", "truckWheelSimulated", "bool", 16),
+        ("configBool", "truckWheelPowered", "bool", 16),
+        ("configBool", "truckWheelLiftable", "bool", 16),
+        ("configBool", "isCargoLoaded", "bool", 1),
+        ("configBool", "specialJob", "bool", 1),
+        ("truckBool", "parkBrake", "bool", 1),
+        ("truckBool", "motorBrake", "bool", 1),
+        ("truckBool", "airPressureWarning", "bool", 1),
+        ("truckBool", "airPressureEmergency", "bool", 1),
+        ("truckBool", "fuelWarning", "bool", 1),
+        ("truckBool", "adblueWarning", "bool", 1),
+        ("truckBool", "oilPressureWarning", "bool", 1),
+        ("truckBool", "waterTemperatureWarning", "bool", 1),
+        ("truckBool", "batteryVoltageWarning", "bool", 1),
+        ("truckBool", "electricEnabled", "bool", 1),
+        ("truckBool", "engineEnabled", "bool", 1),
+        ("truckBool", "wipers", "bool", 1),
+        ("truckBool", "blinkerLeftActive", "bool", 1),
+        ("truckBool", "blinkerRightActive", "bool", 1),
+        ("truckBool", "blinkerLeftOn", "bool", 1),
+        ("truckBool", "blinkerRightOn", "bool", 1),
+        ("truckBool", "lightsParking", "bool", 1),
+        ("truckBool", "lightsBeamLow", "bool", 1),
+        ("truckBool", "lightsBeamHigh", "bool", 1),
+        ("truckBool", "lightsBeacon", "bool", 1),
+        ("truckBool", "lightsBrake", "bool", 1),
+        ("truckBool", "lightsReverse", "bool", 1),
+        ("truckBool", "lightsHazard", "bool", 1),
+        ("truckBool", "cruiseControl", "bool", 1),
+        ("truckBool", "truck_wheelOnGround", "bool", 16),
+        ("truckBool", "shifterToggle", "bool", 2),
+        ("truckBool", "differentialLock", "bool", 1),
+        ("truckBool", "liftAxle", "bool", 1),
+        ("truckBool", "liftAxleIndicator", "bool", 1),
+        ("truckBool", "trailerLiftAxle", "bool", 1),
+        ("truckBool", "trailerLiftAxleIndicator", "bool", 1),
+        ("gameplayBool", "jobDeliveredAutoparkUsed", "bool", 1),
+        ("gameplayBool", "jobDeliveredAutoloadUsed", "bool", 1),
+        (None, "bufferBool", "char", 25),
+    ]),
+
+    # ZONE 6 -> Offset 1640
+    # The sixth zone contains fvectors and is sorted in sub structures
+    (1640, [
+        ("configVector", "cabinPositionX", "float", 1),
+        ("configVector", "cabinPositionY", "float", 1),
+        ("configVector", "cabinPositionZ", "float", 1),
+        ("configVector", "headPositionX", "float", 1),
+        ("configVector", "headPositionY", "float", 1),
+        ("configVector", "headPositionZ", "float", 1),
+        ("configVector", "truckHookPositionX", "float", 1),
+        ("configVector", "truckHookPositionY", "float", 1),
+        ("configVector", "truckHookPositionZ", "float", 1),
+        ("configVector", "truckWheelPositionX", "float", 16),
+        ("configVector", "truckWheelPositionY", "float", 16),
+        ("configVector", "truckWheelPositionZ", "float", 16),
+        ("truckVector", "lv_accelerationX", "float", 1),
+        ("truckVector", "lv_accelerationY", "float", 1),
+        ("truckVector", "lv_accelerationZ", "float", 1),
+        ("truckVector", "av_accelerationX", "float", 1),
+        ("truckVector", "av_accelerationY", "float", 1),
+        ("truckVector", "av_accelerationZ", "float", 1),
+        ("truckVector", "accelerationX", "float", 1),
+        ("truckVector", "accelerationY", "float", 1),
+        ("truckVector", "accelerationZ", "float", 1),
+        ("truckVector", "aa_accelerationX", "float", 1),
+        ("truckVector", "aa_accelerationY", "float", 1),
+        ("truckVector", "aa_accelerationZ", "float", 1),
+        ("truckVector", "cabinAVX", "float", 1),
+        ("truckVector", "cabinAVY", "float", 1),
+        ("truckVector", "cabinAVZ", "float", 1),
+        ("truckVector", "cabinAAX", "float", 1),
+        ("truckVector", "cabinAAY", "float", 1),
+        ("truckVector", "cabinAAZ", "float", 1),
+        (None, "bufferVector", "char", 60),
+    ]),
+
+    # ZONE 7 -> Offset 2000
+    # The 7th zone contains fplacement and is sorted in sub structures
+    (2000, [
+        ("headPlacement", "cabinOffsetX", "float", 1),
+        ("headPlacement", "cabinOffsetY", "float", 1),
+        ("headPlacement", "cabinOffsetZ", "float", 1),
+        ("headPlacement", "cabinOffsetrotationX", "float", 1),
+        ("headPlacement", "cabinOffsetrotationY", "float", 1),
+        ("headPlacement", "cabinOffsetrotationZ", "float", 1),
+        ("headPlacement", "headOffsetX", "float", 1),
+        ("headPlacement", "headOffsetY", "float", 1),
+        ("headPlacement", "headOffsetZ", "float", 1),
+        ("headPlacement", "headOffsetrotationX", "float", 1),
+        ("headPlacement", "headOffsetrotationY", "float", 1),
+        ("headPlacement", "headOffsetrotationZ", "float", 1),
+        (None, "bufferHeadPlacement", "char", 152),
+    ]),
+
+    # ZONE 8 -> Offset 2200
+    # The 8th zone contains dplacement
+    (2200, [
+        ("truckPlacement", "coordinateX", "double", 1),
+        ("truckPlacement", "coordinateY", "double", 1),
+        ("truckPlacement", "coordinateZ", "double", 1),
+        ("truckPlacement", "rotationX", "double", 1),
+        ("truckPlacement", "rotationY", "double", 1),
+        ("truckPlacement", "rotationZ", "double", 1),
+        (None, "bufferTruckPlacement", "char", 52),
+    ]),
+
+    # ZONE 9 -> Offset 2300
+    # The 9th zone contains strings and is sorted in sub structures
+    (2300, [
+        ("configString", "truckBrandId", "char", stringSize),
+        ("configString", "truckBrand", "char", stringSize),
+        ("configString", "truckId", "char", stringSize),
+        ("configString", "truckName", "char", stringSize),
+        ("configString", "cargoId", "char", stringSize),
+        ("configString", "cargo", "char", stringSize),
+        ("configString", "cityDstId", "char", stringSize),
+        ("configString", "cityDst", "char", stringSize),
+        ("configString", "compDstId", "char", stringSize),
+        ("configString", "compDst", "char", stringSize),
+        ("configString", "citySrcId", "char", stringSize),
+        ("configString", "citySrc", "char", stringSize),
+        ("configString", "compSrcId", "char", stringSize),
+        ("configString", "compSrc", "char", stringSize),
+        ("configString", "shifterType", "char", 16),
+        ("configString", "truckLicensePlate", "char", stringSize),
+        ("configString", "truckLicensePlateCountryId", "char", stringSize),
+        ("configString", "truckLicensePlateCountry", "char", stringSize),
+        ("configString", "jobMarket", "char", 32),
+        ("gameplayString", "fineOffence", "char", 32),
+        ("gameplayString", "ferrySourceName", "char", stringSize),
+        ("gameplayString", "ferryTargetName", "char", stringSize),
+        ("gameplayString", "ferrySourceId", "char", stringSize),
+        ("gameplayString", "ferryTargetId", "char", stringSize),
+        ("gameplayString", "trainSourceName", "char", stringSize),
+        ("gameplayString", "trainTargetName", "char", stringSize),
+        ("gameplayString", "trainSourceId", "char", stringSize),
+        ("gameplayString", "trainTargetId", "char", stringSize),
+        (None, "bufferString", "char", 20),
+    ]),
+
+    # ZONE 10 -> Offset 4000
+    # The 10th zone contains unsigned long long and is sorted in sub structures
+    (4000, [
+        ("configLongLong", "jobIncome", "longlong", 1),
+        (None, "bufferLongLong", "char", 192),
+    ]),
+
+    # ZONE 11 -> Offset 4200
+    # The 11th zone contains long long and is sorted in sub structures
+    (4200, [
+        ("gameplayLongLong", "jobCancelledPenalty", "longlong", 1),
+        ("gameplayLongLong", "jobDeliveredRevenue", "longlong", 1),
+        ("gameplayLongLong", "fineAmount", "longlong", 1),
+        ("gameplayLongLong", "tollgatePayAmount", "longlong", 1),
+        ("gameplayLongLong", "ferryPayAmount", "longlong", 1),
+        ("gameplayLongLong", "trainPayAmount", "longlong", 1),
+        (None, "bufferLongLong", "char", 52),
+    ]),
+
+    # ZONE 12 -> Offset 4300
+    # The 12th zone contains special events and is sorted in sub structures
+    (4300, [
+        ("specialBool", "onJob", "bool", 1),
+        ("specialBool", "jobFinished", "bool", 1),
+        ("specialBool", "jobCancelled", "bool", 1),
+        ("specialBool", "jobDelivered", "bool", 1),
+        ("specialBool", "fined", "bool", 1),
+        ("specialBool", "tollgate", "bool", 1),
+        ("specialBool", "ferry", "bool", 1),
+        ("specialBool", "train", "bool", 1),
+        ("specialBool", "refuel", "bool", 1),
+        ("specialBool", "refuelPayed", "bool", 1),
+        (None, "bufferSpecial", "char", 90),
+    ]),
+
+    # ZONE 13 -> Offset 4400
+    # The 13th zone contains the substance names
+    (4400, [
+        (None, "substances", "stringArray", substanceSize),
+    ]),
+]
+
+# Layout of a single trailer, the trailers start at offset 6000 (ZONE 14) and are trailerSize bytes each.
+trailerLayout = [
+    # FIRST ZONE -> Offset 0
+    (0, [
+        ("conBool", "wheelSteerable", "bool", 16),
+        ("conBool", "wheelSimulated", "bool", 16),
+        ("conBool", "wheelPowered", "bool", 16),
+        ("conBool", "wheelLiftable", "bool", 16),
+        ("comBool", "wheelOnGround", "bool", 16),
+        ("comBool", "attached", "bool", 1),
+        (None, "bufferBool", "char", 3),
+    ]),
+
+    # SECOND ZONE -> Offset 84
+    (84, [
+        ("comUI", "wheelSubstance", "int", 16),
+        ("conUI", "wheelCount", "int", 1),
+    ]),
+
+    # THIRD ZONE -> Offset 152
+    (152, [
+        ("comFloat", "cargoDamage", "float", 1),
+        ("comFloat", "wearChassis", "float", 1),
+        ("comFloat", "wearWheels", "float", 1),
+        ("comFloat", "wearBody", "float", 1),
+        ("comFloat", "wheelSuspDeflection", "float", 16),
+        ("comFloat", "wheelVelocity", "float", 16),
+        ("comFloat", "wheelSteering", "float", 16),
+        ("comFloat", "wheelRotation", "float", 16),
+        ("comFloat", "wheelLift", "float", 16),
+        ("comFloat", "wheelLiftOffset", "float", 16),
+        ("conFloat", "wheelRadius", "float", 16),
+    ]),
+
+    # FOURTH ZONE -> Offset 616
+    (616, [
+        ("comVector", "linearVelocityX", "float", 1),
+        ("comVector", "linearVelocityY", "float", 1),
+        ("comVector", "linearVelocityZ", "float", 1),
+        ("comVector", "angularVelocityX", "float", 1),
+        ("comVector", "angularVelocityY", "float", 1),
+        ("comVector", "angularVelocityZ", "float", 1),
+        ("comVector", "linearAccelerationX", "float", 1),
+        ("comVector", "linearAccelerationY", "float", 1),
+        ("comVector", "linearAccelerationZ", "float", 1),
+        ("comVector", "angularAccelerationX", "float", 1),
+        ("comVector", "angularAccelerationY", "float", 1),
+        ("comVector", "angularAccelerationZ", "float", 1),
+        ("conVector", "hookPositionX", "float", 1),
+        ("conVector", "hookPositionY", "float", 1),
+        ("conVector", "hookPositionZ", "float", 1),
+        ("conVector", "wheelPositionX", "float", 16),
+        ("conVector", "wheelPositionY", "float", 16),
+        ("conVector", "wheelPositionZ", "float", 16),
+        (None, "bufferVector", "char", 4),
+    ]),
+
+    # FIFTH ZONE -> Offset 872
+    (872, [
+        ("comDouble", "worldX", "double", 1),
+        ("comDouble", "worldY", "double", 1),
+        ("comDouble", "worldZ", "double", 1),
+        ("comDouble", "rotationX", "double", 1),
+        ("comDouble", "rotationY", "double", 1),
+        ("comDouble", "rotationZ", "double", 1),
+    ]),
+
+    # SIXTH ZONE -> Offset 920
+    (920, [
+        ("conString", "id", "char", stringSize),
+        ("conString", "cargoAcessoryId", "char", stringSize),
+        ("conString", "bodyType", "char", stringSize),
+        ("conString", "brandId", "char", stringSize),
+        ("conString", "brand", "char", stringSize),
+        ("conString", "name", "char", stringSize),
+        ("conString", "chainType", "char", stringSize),
+        ("conString", "licensePlate", "char", stringSize),
+        ("conString", "licensePlateCountry", "char", stringSize),
+        ("conString", "licensePlateCountryId", "char", stringSize),
+    ]),
+]
+
+def decodeString(raw):
+    """Convert a fixed size char array to a python string (null bytes are dropped)."""
+    return raw.replace(b"\x00", b"").decode("utf-8", errors="ignore")
+
+class telemetryZone:
+    """A single zone of the telemetry block compiled to one struct.Struct.
     
-    def readTrailer(self, offset, count=1):
-        trailers = []
-        for i in range(count):
-            data = {}
-            
-            # START OF FIRST ZONE AT OFFSET 0 
-            
-            data["conBool"] = {}
-            data["conBool"]["wheelSteerable"], offset = self.readBool(offset, count=16)
-            data["conBool"]["wheelSimulated"], offset = self.readBool(offset, count=16)
-            data["conBool"]["wheelPowered"], offset = self.readBool(offset, count=16)
-            data["conBool"]["wheelLiftable"], offset = self.readBool(offset, count=16)
-
-            data["comBool"] = {}
-            data["comBool"]["wheelOnGround"], offset = self.readBool(offset, count=16)
-            data["comBool"]["attached"], offset = self.readBool(offset)
-            
-            data["bufferBool"], offset = self.readChar(offset, count=3)
-            
-            # END OF FIRST ZONE -> Offset 84
-            
-            # START OF SECOND ZONE -> Offset 84
-            
-            data["comUI"] = {}
-            data["comUI"]["wheelSubstance"], offset = self.readInt(offset, count=16)
-            
-            data["conUI"] = {}
-            data["conUI"]["wheelCount"], offset = self.readInt(offset)
-            
-            # END OF SECOND ZONE -> Offset 152
-            
-            # START OF THIRD ZONE -> Offset 152
-            
-            data["comFloat"] = {}
-            data["comFloat"]["cargoDamage"], offset = self.readFloat(offset)
-            data["comFloat"]["wearChassis"], offset = self.readFloat(offset)
-            data["comFloat"]["wearWheels"], offset = self.readFloat(offset)
-            data["comFloat"]["wearBody"], offset = self.readFloat(offset)
-
-            data["comFloat"]["wheelSuspDeflection"], offset = self.readFloat(offset, count=16)
-            data["comFloat"]["wheelVelocity"], offset = self.readFloat(offset, count=16)
-            data["comFloat"]["wheelSteering"], offset = self.readFloat(offset, count=16)
-            data["comFloat"]["wheelRotation"], offset = self.readFloat(offset, count=16)
-            data["comFloat"]["wheelLift"], offset = self.readFloat(offset, count=16)
-            data["comFloat"]["wheelLiftOffset"], offset = self.readFloat(offset, count=16)
-
-            data["conFloat"] = {}
-            data["conFloat"]["wheelRadius"], offset = self.readFloat(offset, count=16)
-            
-            # END OF THIRD ZONE -> Offset 616
-            
-            # START OF FOURTH ZONE -> Offset 616
-            
-            data["comVector"] = {}
-            data["comVector"]["linearVelocityX"], offset = self.readFloat(offset)
-            data["comVector"]["linearVelocityY"], offset = self.readFloat(offset)
-            data["comVector"]["linearVelocityZ"], offset = self.readFloat(offset)
-            data["comVector"]["angularVelocityX"], offset = self.readFloat(offset)
-            data["comVector"]["angularVelocityY"], offset = self.readFloat(offset)
-            data["comVector"]["angularVelocityZ"], offset = self.readFloat(offset)
-            data["comVector"]["linearAccelerationX"], offset = self.readFloat(offset)
-            data["comVector"]["linearAccelerationY"], offset = self.readFloat(offset)
-            data["comVector"]["linearAccelerationZ"], offset = self.readFloat(offset)
-            data["comVector"]["angularAccelerationX"], offset = self.readFloat(offset)
-            data["comVector"]["angularAccelerationY"], offset = self.readFloat(offset)
-            data["comVector"]["angularAccelerationZ"], offset = self.readFloat(offset)
-
-            data["conVector"] = {}
-            data["conVector"]["hookPositionX"], offset = self.readFloat(offset)
-            data["conVector"]["hookPositionY"], offset = self.readFloat(offset)
-            data["conVector"]["hookPositionZ"], offset = self.readFloat(offset)
-            data["conVector"]["wheelPositionX"], offset = self.readFloat(offset, count=16)
-            data["conVector"]["wheelPositionY"], offset = self.readFloat(offset, count=16)
-            data["conVector"]["wheelPositionZ"], offset = self.readFloat(offset, count=16)
-
-            data["bufferVector"], offset = self.readChar(offset, count=4)
-            
-            # END OF FOURTH ZONE -> Offset 872
-            
-            # START OF FIFTH ZONE -> Offset 872
-            
-            data["comDouble"] = {}
-            data["comDouble"]["worldX"], offset = self.readDouble(offset)
-            data["comDouble"]["worldY"], offset = self.readDouble(offset)
-            data["comDouble"]["worldZ"], offset = self.readDouble(offset)
-            data["comDouble"]["rotationX"], offset = self.readDouble(offset)
-            data["comDouble"]["rotationY"], offset = self.readDouble(offset)
-            data["comDouble"]["rotationZ"], offset = self.readDouble(offset)
-            
-            # END OF FIFTH ZONE -> Offset 920
-            
-            # START OF SIXTH ZONE -> Offset 920
-            
-            data["conString"] = {}
-            data["conString"]["id"], offset = self.readChar(offset, count=stringSize)
-            data["conString"]["cargoAcessoryId"], offset = self.readChar(offset, count=stringSize)
-            data["conString"]["bodyType"], offset = self.readChar(offset, count=stringSize)
-            data["conString"]["brandId"], offset = self.readChar(offset, count=stringSize)
-            data["conString"]["brand"], offset = self.readChar(offset, count=stringSize)
-            data["conString"]["name"], offset = self.readChar(offset, count=stringSize)
-            data["conString"]["chainType"], offset = self.readChar(offset, count=stringSize)
-            data["conString"]["licensePlate"], offset = self.readChar(offset, count=stringSize)
-            data["conString"]["licensePlateCountry"], offset = self.readChar(offset, count=stringSize)
-            data["conString"]["licensePlateCountryId"], offset = self.readChar(offset, count=stringSize)
-            
-            # END OF SIXTH ZONE -> Offset 1560
+    Args:
+        offset (int): Offset of the zone from the start of the block (or trailer).
+        fields (list): List of (category, name, type, count) entries.
+    """
+    def __init__(self, offset, fields):
+        self.offset = offset
+        self.fields = []
+        self.categories = []
+        self.keys = []
+        self.fieldOffsets = {}
+        """Maps (category, name) to the offset of the first value from the start of the block."""
+        
+        format = "<" # Packed, little endian
+        index = 0
+        for category, name, valueType, count in fields:
+            self.fieldOffsets[(category, name)] = offset + struct.calcsize(format)
+            if valueType == "char":
+                format += f"{count}s"
+                values = 1
+            elif valueType == "stringArray":
+                format += f"{stringSize}s" * count
+                values = count
+            else:
+                format += f"{count}{typeFormats[valueType]}"
+                values = count
             
-            trailers.append(data)
+            self.fields.append((category, name, valueType, index, values))
+            index += values
             
-        return trailers, offset
+            key = name if category == None else category
+            if category != None and category not in self.categories:
+                self.categories.append(category)
+            if key not in self.keys:
+                self.keys.append(key)
+        
+        self.struct = struct.Struct(format)
+        self.size = self.struct.size
+        
+    def decode(self, buffer, data, baseOffset=0):
+        """Decode the zone from the buffer into the data dictionary.
+
+        Args:
+            buffer (mmap | bytes): Buffer containing the telemetry block.
+            data (dict): Dictionary to add the values to.
+            baseOffset (int, optional): Added to the zone offset, used for the trailers. Defaults to 0.
+
+        Returns:
+            dict: The data dictionary.
+        """
+        values = self.struct.unpack_from(buffer, baseOffset + self.offset)
+        
+        for category in self.categories:
+            data[category] = {}
+        
+        for category, name, valueType, index, count in self.fields:
+            if valueType == "char":
+                value = decodeString(values[index])
+            elif valueType == "stringArray":
+                value = [decodeString(string) for string in values[index:index+count]]
+            elif valueType == "game":
+                value = gameNames.get(values[index], "unknown")
+            elif count > 1:
+                value = list(values[index:index+count])
+            else:
+                value = values[index]
             
+            if category == None:
+                data[name] = value
+            else:
+                data[category][name] = value
+                
+        return data
+
+def compileLayout(layout, size):
+    """Compile a layout to a list of telemetryZone objects, and make sure that no zone overlaps the next one.
+
+    Args:
+        layout (list): List of (offset, fields) tuples.
+        size (int): Size of the entire layout in bytes.
+
+    Returns:
+        list[telemetryZone]: The compiled zones.
+    """
+    zones = [telemetryZone(offset, fields) for offset, fields in layout]
+    ends = [zone.offset for zone in zones[1:]] + [size]
+    for zone, end in zip(zones, ends):
+        if zone.offset + zone.size > end:
+            raise Exception(f"Telemetry zone at offset {zone.offset} is {zone.size} bytes and overlaps the next zone at offset {end}.")
     
-    # VALUE READING
-    
-    def readBool(self, offset, count=1):
-        if count == 1:
-            bool = struct.unpack('?', self.mm[offset:offset+1])[0]
-            return bool, offset+1
-        else:
-            bools = []
-            for i in range(count):
-                bools.append(struct.unpack('?', self.mm[offset+i:offset+i+1])[0])
-            return bools, offset+count
-            
+    # Some padding values share a name between zones (bufferLongLong). The last zone has always won,
+    # so drop the earlier ones. This way each key belongs to exactly one zone and the zones can be
+    # decoded in any order.
+    seen = []
+    for zone in reversed(zones):
+        for category in zone.categories:
+            if category in seen:
+                raise Exception(f"Telemetry category {category} is split between multiple zones.")
+        zone.fields = [field for field in zone.fields if field[0] != None or field[1] not in seen]
+        zone.keys = [key for key in zone.keys if key not in seen]
+        seen += zone.keys
     
-    def readInt(self, offset, count=1):
-        if count == 1:
-            int = struct.unpack('i', self.mm[offset:offset+4])[0]
-            return int, offset+4
-        else:
-            ints = []
-            for i in range(count):
-                ints.append(struct.unpack('i', self.mm[offset+i*4:offset+i*4+4])[0])
-            return ints, offset+count*4
-    
-    def readFloat(self, offset, count=1):
-        if count == 1:
-            float = struct.unpack('f', self.mm[offset:offset+4])[0]
-            return float, offset+4
-        else:
-            floats = []
-            for i in range(count):
-                floats.append(struct.unpack('f', self.mm[offset+i*4:offset+i*4+4])[0])
-            return floats, offset+count*4
-    
-    def readLong(self, offset, count=1):
-        if count == 1:
-            long = struct.unpack('q', self.mm[offset:offset+8])[0]
-        return long, offset+8
-    
-    def readLongLong(self, offset, count=1):
-        if count == 1:
-            longlong = struct.unpack('Q', self.mm[offset:offset+8])[0]
-        return longlong, offset+8
-    
-    def readChar(self, offset, count):
-        char = ""
-        newChar = ""
-        for i in range(count):
-            try:
-                newChar = struct.unpack('s', self.mm[offset+i:offset+i+1])[0].decode("utf-8")
-            except:
-                newChar == "\u0000"
-                
-            if newChar == "\u0000":
-                char += ""
-            else:
-                char += newChar 
-            
-        
-        char.replace(r"\u0000", "")
-        
-        return char, offset+count
-    
-    def readDouble(self, offset, count=1):
-        if count == 1:
-            double = struct.unpack('d', self.mm[offset:offset+8])[0]
-            return double, offset+8
-        else:
-            doubles = []
-            for i in range(count):
-                doubles.append(struct.unpack('d', self.mm[offset+i*8:offset+i*8+8])[0])
-            return doubles, offset+count*8
-    
-    def readStringArray(self, offset, count, stringSize):
-        strings = []
-        for i in range(count):
-            strings.append(self.readChar(offset+i*stringSize, stringSize)[0])
-        return strings, offset+count*stringSize
+    return zones
+
+telemetryZones = compileLayout(telemetryLayout, trailerOffset)
+trailerZones = compileLayout(trailerLayout, trailerSize)
+
+def decodeTelemetry(buffer, trailerData=False):
+    """Decode a full telemetry block.
+
+    Args:
+        buffer (mmap | bytes): Buffer containing the telemetry block.
+        trailerData (bool, optional): Whether to also decode the trailers. Defaults to False.
+
+    Returns:
+        dict: The decoded telemetry data.
+    """
+    data = {}
+    for zone in telemetryZones:
+        zone.decode(buffer, data)
+    
+    if trailerData:
+        data["trailers"] = [decodeTrailer(buffer, i) for i in range(trailerCount)]
+    
+    return data
+
+def decodeTrailer(buffer, index):
+    """Decode a single trailer from the telemetry block.
+
+    Args:
+        buffer (mmap | bytes): Buffer containing the telemetry block.
+        index (int): Index of the trailer (0-9).
+
+    Returns:
+        dict: The decoded trailer data.
+    """
+    trailer = {}
+    for zone in trailerZones:
+        zone.decode(buffer, trailer, baseOffset=trailerOffset + index * trailerSize)
+    return trailer
+
+zoneForKey = {}
+"""Maps each top level key of the telemetry data to the zone containing it."""
+for zone in telemetryZones:
+    for key in zone.keys:
+        zoneForKey[key] = zone
+
+def findField(category, name):
+    """Find where a single value is in the telemetry block. Used to read the value
+    without decoding the zone it's in.
+
+    Args:
+        category (str | None): Category of the value, None for top level values.
+        name (str): Name of the value.
+
+    Returns:
+        tuple: (offset, struct.Struct) of the value.
+    """
+    for zone in telemetryZones:
+        if (category, name) in zone.fieldOffsets:
+            for fieldCategory, fieldName, valueType, index, count in zone.fields:
+                if (fieldCategory, fieldName) == (category, name):
+                    return zone.fieldOffsets[(category, name)], struct.Struct("<" + typeFormats[valueType])
+    raise KeyError(f"{category}.{name}" if category != None else name)
+
+snapshotSize = trailerOffset + trailerCount * trailerSize
+"""Amount of bytes of the block that the layouts cover."""
+
+class telemetryView(dict):
+    """Dictionary of telemetry data that only decodes a zone when one of its values is first accessed.
+    Decoded zones are cached in the dictionary itself, so they are only decoded once per frame.
+    
+    It can be used like the normal data dictionary, iterating over it or converting it to a string will
+    decode everything that's left.
+    
+    Args:
+        buffer (bytes): Snapshot of the telemetry block, taken once per frame so that all zones are from the same game frame.
+        cache (dict, optional): Already decoded zones of the same snapshot, shared between views of the same block.
+    """
+    def __init__(self, buffer=None, cache=None):
+        super().__init__()
+        self.buffer = buffer
+        self.cache = cache if cache != None else {}
+        self.pendingZones = list(telemetryZones) if buffer != None else []
+        self.pendingTrailers = buffer != None
+    
+    def share(self):
+        """Create a new view of the same snapshot. Zones that have already been decoded are reused from the cache.
+
+        Returns:
+            telemetryView: The new view.
+        """
+        return telemetryView(self.buffer, self.cache)
+    
+    def decodeZone(self, zone):
+        if zone not in self.pendingZones:
+            return
+        self.pendingZones.remove(zone)
+        if zone not in self.cache:
+            self.cache[zone] = zone.decode(self.buffer, {})
+        for key, value in self.cache[zone].items():
+            # Don't overwrite values that plugins have already set
+            if not dict.__contains__(self, key):
+                dict.__setitem__(self, key, value)
+    
+    def decodeTrailers(self):
+        if not self.pendingTrailers:
+            return
+        self.pendingTrailers = False
+        if "trailers" not in self.cache:
+            self.cache["trailers"] = [decodeTrailer(self.buffer, i) for i in range(trailerCount)]
+        if not dict.__contains__(self, "trailers"):
+            dict.__setitem__(self, "trailers", self.cache["trailers"])
+    
+    def decodeKey(self, key):
+        if key == "trailers":
+            self.decodeTrailers()
+        elif key in zoneForKey:
+            self.decodeZone(zoneForKey[key])
+    
+    def decodeAll(self):
+        for zone in list(self.pendingZones):
+            self.decodeZone(zone)
+        self.decodeTrailers()
+    
+    def isPending(self, key):
+        if key == "trailers":
+            return self.pendingTrailers
+        return key in zoneForKey and zoneForKey[key] in self.pendingZones
+    
+    def __missing__(self, key):
+        if self.isPending(key):
+            self.decodeKey(key)
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+    
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or self.isPending(key)
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def pop(self, key, *args):
+        self.decodeKey(key)
+        return dict.pop(self, key, *args)
+    
+    def setdefault(self, key, default=None):
+        self.decodeKey(key)
+        return dict.setdefault(self, key, default)
+    
+    def __delitem__(self, key):
+        self.decodeKey(key)
+        dict.__delitem__(self, key)
+    
+    def __iter__(self):
+        self.decodeAll()
+        return dict.__iter__(self)
+    
+    def __len__(self):
+        self.decodeAll()
+        return dict.__len__(self)
+    
+    def __eq__(self, other):
+        if not isinstance(other, dict):
+            return NotImplemented
+        self.decodeAll()
+        return dict.__eq__(self, other)
+    
+    def __ne__(self, other):
+        if not isinstance(other, dict):
+            return NotImplemented
+        self.decodeAll()
+        return dict.__ne__(self, other)
+    
+    def __repr__(self):
+        self.decodeAll()
+        return dict.__repr__(self)
+    
+    def keys(self):
+        self.decodeAll()
+        return dict.keys(self)
+    
+    def values(self):
+        self.decodeAll()
+        return dict.values(self)
+    
+    def items(self):
+        self.decodeAll()
+        return dict.items(self)
+    
+    def copy(self):
+        self.decodeAll()
+        return dict(dict.items(self))
+    
+    def __reduce__(self):
+        # Copies and pickles are plain dictionaries, the snapshot and its zones (struct.Struct) can't be copied
+        return (dict, (self.copy(),))
+    
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.copy(), memo)
+
+# Only the values needed to check the connection and whether the block has changed.
+# sdkActive, pause, time, simulatedTime, renderTime, (multiplayerTimeOffset), telemetryPluginRevision
+headerStruct = struct.Struct("<?3x?3xQQQ8xi")
+
+class scsTelemetry:
+    
+    def __init__(self):
+        self.mm = None
+        self.lastView = None
+        self.lastTimes = None
+        self.decodesSaved = 0
+        """How many times update() has reused the last snapshot because the block hadn't changed."""
+    
+    def connect(self):
+        """Open the shared memory block. The mapping is kept open between frames,
+        so the game's writes are visible without having to reopen it.
+
+        Returns:
+            mmap: The shared memory mapping.
+        """
+        if self.mm == None or self.mm.closed:
+            self.mm = mmap.mmap(0, mmapSize, mmapName)
+        return self.mm
+    
+    def close(self):
+        """Close the shared memory mapping."""
+        try:
+            self.mm.close()
+        except: pass
+        self.mm = None
+    
+    def readHeader(self):
+        """Read only the start of the block. This is enough to check if the game is connected
+        without having to take a snapshot of the entire block.
+
+        Returns:
+            dict: sdkActive, pause, time, simulatedTime, renderTime and telemetryPluginRevision.
+        """
+        buffer = self.connect()
+        sdkActive, pause, time, simulatedTime, renderTime, revision = headerStruct.unpack_from(buffer, 0)
+        return {
+            "sdkActive": sdkActive,
+            "pause": pause,
+            "time": time,
+            "simulatedTime": simulatedTime,
+            "renderTime": renderTime,
+            "telemetryPluginRevision": revision
+        }
     
     def update(self, trailerData=False):
-        self.mm = mmap.mmap(0, mmapSize, mmapName)
+        """Read the telemetry data for this frame.
         
-        data = {}
-        offset = 0
+        The returned telemetryView only decodes the zones that are actually accessed, so the trailers,
+        strings and job data are skipped if no plugin reads them. The trailers are always available under
+        data["trailers"], trailerData is only kept for compatibility.
         
-        # ALL COMMENTS EXTRACTED FROM https://github.com/RenCloud/scs-sdk-plugin/blob/dev/scs-telemetry/inc/scs-telemetry-common.hpp
-        try:
-            # ZONE 1 -> Start at offset 0
-            
-            data["sdkActive"], offset = self.readBool(offset)
-            data["placeHolder"], offset = self.readChar(offset, 3)
-            data["pause"], offset = self.readBool(offset)
-            data["placeHolder2"], offset = self.readChar(offset, 3)
-            
-            data["time"], offset = self.readLongLong(offset)
-            data["simulatedTime"], offset = self.readLongLong(offset)
-            data["renderTime"], offset = self.readLongLong(offset)
-            data["multiplayerTimeOffset"], offset = self.readLongLong(offset)
-            
-            # END OF ZONE 1 -> Offset 40
-            
-            # START OF ZONE 2 -> Offset 40
-            # The Second zone contains unsigned integers and it sorted in sub structures
-            
-            data["scsValues"] = {}
-            data["scsValues"]["telemetryPluginRevision"], offset = self.readInt(offset)
-            data["scsValues"]["versionMajor"], offset = self.readInt(offset)
-            data["scsValues"]["versionMinor"], offset = self.readInt(offset)
-            data["scsValues"]["game"], offset = self.readGame(offset)
-            data["scsValues"]["telemetryVersionGameMajor"], offset = self.readInt(offset)
-            data["scsValues"]["telemetryVersionGameMinor"], offset = self.readInt(offset)
-            
-            data["commonUI"] = {}
-            data["commonUI"]["timeAbs"], offset = self.readInt(offset)
-            
-            data["configUI"] = {}
-            data["configUI"]["gears"], offset = self.readInt(offset)
-            data["configUI"]["gearsReverse"], offset = self.readInt(offset)
-            data["configUI"]["retarderStepCount"], offset = self.readInt(offset)
-            data["configUI"]["truckWheelCount"], offset = self.readInt(offset)
-            data["configUI"]["selectorCount"], offset = self.readInt(offset)
-            data["configUI"]["timeAbsDelivery"], offset = self.readInt(offset)
-            data["configUI"]["maxTrailerCount"], offset = self.readInt(offset)
-            data["configUI"]["unitCount"], offset = self.readInt(offset)
-            data["configUI"]["plannedDistanceKm"], offset = self.readInt(offset)
-            
-            data["truckUI"] = {}
-            data["truckUI"]["shifterSlot"], offset = self.readInt(offset)
-            data["truckUI"]["retarderBrake"], offset = self.readInt(offset)
-            data["truckUI"]["lightsAuxFront"], offset = self.readInt(offset)
-            data["truckUI"]["lightsAuxRoof"], offset = self.readInt(offset)
-            data["truckUI"]["truckWheelSubstance"], offset = self.readInt(offset, count=16)
-            data["truckUI"]["hshifterPosition"], offset = self.readInt(offset, count=32)
-            data["truckUI"]["hshifterBitmask"], offset = self.readInt(offset, count=32)
-            
-            data["gameplayUI"] = {}
-            data["gameplayUI"]["jobDeliveredDeliveryTime"], offset = self.readInt(offset)
-            data["gameplayUI"]["jobStartingTime"], offset = self.readInt(offset)
-            data["gameplayUI"]["jobFinishedTime"], offset = self.readInt(offset)
-            
-            data["bufferUI"], offset = self.readChar(offset, 48)
-            
-            # END OF ZONE 2 -> Offset 500
-            
-            # START OF ZONE 3 -> Offset 500
-            # The third zone contains integers and is sorted in sub structures
-            
-            data["commonInt"] = {}
-            data["commonInt"]["restStop"], offset = self.readInt(offset)
-            
-            data["truckInt"] = {}
-            data["truckInt"]["gear"], offset = self.readInt(offset)
-            data["truckInt"]["gearDashboard"], offset = self.readInt(offset)
-            data["truckInt"]["hshifterResulting"], offset = self.readInt(offset, count=32)
-            
-            data["bufferInt"], offset = self.readChar(offset, 56)
-            
-            # END OF ZONE 3 -> Offset 696
-            
-            offset += 4
-            
-            # START IF ZONE 4 -> Offset 700
-            # The fourth zone contains floats and is sorted in sub structures
-            
-            data["commonFloat"] = {}
-            data["commonFloat"]["scale"], offset = self.readFloat(offset)
-            
-            data["configFloat"] = {}
-            data["configFloat"]["fuelCapacity"], offset = self.readFloat(offset)
-            data["configFloat"]["fuelWarningFactor"], offset = self.readFloat(offset)
-            data["configFloat"]["adblueCapacity"], offset = self.readFloat(offset)
-            data["configFloat"]["adblueWarningFactor"], offset = self.readFloat(offset)
-            data["configFloat"]["airPressureWarning"], offset = self.readFloat(offset)
-            data["configFloat"]["airPressureEmergency"], offset = self.readFloat(offset)
-            data["configFloat"]["oilPressureWarning"], offset = self.readFloat(offset)
-            data["configFloat"]["waterTemperatureWarning"], offset = self.readFloat(offset)
-            data["configFloat"]["batteryVoltageWarning"], offset = self.readFloat(offset)
-            data["configFloat"]["engineRpmMax"], offset = self.readFloat(offset)
-            data["configFloat"]["gearDifferential"], offset = self.readFloat(offset)
-            data["configFloat"]["cargoMass"], offset = self.readFloat(offset)
-            data["configFloat"]["truckWheelRadius"], offset = self.readFloat(offset, count=16)
-            data["configFloat"]["gearRatiosForward"], offset = self.readFloat(offset, count=24)
-            data["configFloat"]["gearRatiosReverse"], offset = self.readFloat(offset, count=8)
-            data["configFloat"]["unitMass"], offset = self.readFloat(offset)
-            
-            data["truckFloat"] = {}
-            data["truckFloat"]["speed"], offset = self.readFloat(offset)
-            data["truckFloat"]["engineRpm"], offset = self.readFloat(offset)
-            data["truckFloat"]["userSteer"], offset = self.readFloat(offset)
-            data["truckFloat"]["userThrottle"], offset = self.readFloat(offset)
-            data["truckFloat"]["userBrake"], offset = self.readFloat(offset)
-            data["truckFloat"]["userClutch"], offset = self.readFloat(offset)
-            data["truckFloat"]["gameSteer"], offset = self.readFloat(offset)
-            data["truckFloat"]["gameThrottle"], offset = self.readFloat(offset)
-            data["truckFloat"]["gameBrake"], offset = self.readFloat(offset)
-            data["truckFloat"]["gameClutch"], offset = self.readFloat(offset)
-            data["truckFloat"]["cruiseControlSpeed"], offset = self.readFloat(offset)
-            data["truckFloat"]["airPressure"], offset = self.readFloat(offset)
-            data["truckFloat"]["brakeTemperature"], offset = self.readFloat(offset)
-            data["truckFloat"]["fuel"], offset = self.readFloat(offset)
-            data["truckFloat"]["fuelAvgConsumption"], offset = self.readFloat(offset)
-            data["truckFloat"]["fuelRange"], offset = self.readFloat(offset)
-            data["truckFloat"]["adblue"], offset = self.readFloat(offset)
-            data["truckFloat"]["oilPressure"], offset = self.readFloat(offset)
-            data["truckFloat"]["oilTemperature"], offset = self.readFloat(offset)
-            data["truckFloat"]["waterTemperature"], offset = self.readFloat(offset)
-            data["truckFloat"]["batteryVoltage"], offset = self.readFloat(offset)
-            data["truckFloat"]["lightsDashboard"], offset = self.readFloat(offset)
-            data["truckFloat"]["wearEngine"], offset = self.readFloat(offset)
-            data["truckFloat"]["wearTransmission"], offset = self.readFloat(offset)
-            data["truckFloat"]["wearCabin"], offset = self.readFloat(offset)
-            data["truckFloat"]["wearChassis"], offset = self.readFloat(offset)
-            data["truckFloat"]["wearWheels"], offset = self.readFloat(offset)
-            data["truckFloat"]["truckOdometer"], offset = self.readFloat(offset)
-            data["truckFloat"]["routeDistance"], offset = self.readFloat(offset)
-            data["truckFloat"]["routeTime"], offset = self.readFloat(offset)
-            data["truckFloat"]["speedLimit"], offset = self.readFloat(offset)
-            data["truckFloat"]["truck_wheelSuspDeflection"], offset = self.readFloat(offset, count=16)
-            data["truckFloat"]["truck_wheelVelocity"], offset = self.readFloat(offset, count=16)
-            data["truckFloat"]["truck_wheelSteering"], offset = self.readFloat(offset, count=16)
-            data["truckFloat"]["truck_wheelRotation"], offset = self.readFloat(offset, count=16)
-            data["truckFloat"]["truck_wheelLift"], offset = self.readFloat(offset, count=16)
-            data["truckFloat"]["truck_wheelLiftOffset"], offset = self.readFloat(offset, count=16)
-            
-            data["gameplayFloat"] = {}
-            data["gameplayFloat"]["jobDeliveredCargoDamage"], offset = self.readFloat(offset)
-            data["gameplayFloat"]["jobDeliveredDistanceKm"], offset = self.readFloat(offset)
-            data["gameplayFloat"]["refuelAmount"], offset = self.readFloat(offset)
-            
-            data["jobFloat"] = {}
-            data["jobFloat"]["cargoDamage"], offset = self.readFloat(offset)
-            
-            data["bufferFloat"], offset = self.readChar(offset, 28)
-            
-            # END OF ZONE 4 -> Offset 1500
-            
-            # START OF ZONE 5 -> Offset 1500
-            # The fifth zone contains bool and is sorted in sub structures
-            
-            data["configBool"] = {}
-            data["configBool"]["truckWheelSteerable"], offset = self.readBool(offset, count=16)
-            data["configBool"]["truckWheelSimulated"], offset = self.readBool(offset, count=16)
-            data["configBool"]["truckWheelPowered"], offset = self.readBool(offset, count=16)
-            data["configBool"]["truckWheelLiftable"], offset = self.readBool(offset, count=16)
-            data["configBool"]["isCargoLoaded"], offset = self.readBool(offset)
-            data["configBool"]["specialJob"], offset = self.readBool(offset)
-
-            data["truckBool"] = {}
-            data["truckBool"]["parkBrake"], offset = self.readBool(offset)
-            data["truckBool"]["motorBrake"], offset = self.readBool(offset)
-            data["truckBool"]["airPressureWarning"], offset = self.readBool(offset)
-            data["truckBool"]["airPressureEmergency"], offset = self.readBool(offset)
-            data["truckBool"]["fuelWarning"], offset = self.readBool(offset)
-            data["truckBool"]["adblueWarning"], offset = self.readBool(offset)
-            data["truckBool"]["oilPressureWarning"], offset = self.readBool(offset)
-            data["truckBool"]["waterTemperatureWarning"], offset = self.readBool(offset)
-            data["truckBool"]["batteryVoltageWarning"], offset = self.readBool(offset)
-            data["truckBool"]["electricEnabled"], offset = self.readBool(offset)
-            data["truckBool"]["engineEnabled"], offset = self.readBool(offset)
-            data["truckBool"]["wipers"], offset = self.readBool(offset)
-            data["truckBool"]["blinkerLeftActive"], offset = self.readBool(offset)
-            data["truckBool"]["blinkerRightActive"], offset = self.readBool(offset)
-            data["truckBool"]["blinkerLeftOn"], offset = self.readBool(offset)
-            data["truckBool"]["blinkerRightOn"], offset = self.readBool(offset)
-            data["truckBool"]["lightsParking"], offset = self.readBool(offset)
-            data["truckBool"]["lightsBeamLow"], offset = self.readBool(offset)
-            data["truckBool"]["lightsBeamHigh"], offset = self.readBool(offset)
-            data["truckBool"]["lightsBeacon"], offset = self.readBool(offset)
-            data["truckBool"]["lightsBrake"], offset = self.readBool(offset)
-            data["truckBool"]["lightsReverse"], offset = self.readBool(offset)
-            data["truckBool"]["lightsHazard"], offset = self.readBool(offset)
-            data["truckBool"]["cruiseControl"], offset = self.readBool(offset)
-            data["truckBool"]["truck_wheelOnGround"], offset = self.readBool(offset, count=16)
-            data["truckBool"]["shifterToggle"], offset = self.readBool(offset, count=2)
-            data["truckBool"]["differentialLock"], offset = self.readBool(offset)
-            data["truckBool"]["liftAxle"], offset = self.readBool(offset)
-            data["truckBool"]["liftAxleIndicator"], offset = self.readBool(offset)
-            data["truckBool"]["trailerLiftAxle"], offset = self.readBool(offset)
-            data["truckBool"]["trailerLiftAxleIndicator"], offset = self.readBool(offset)
-
-            data["gameplayBool"] = {}
-            data["gameplayBool"]["jobDeliveredAutoparkUsed"], offset = self.readBool(offset)
-            data["gameplayBool"]["jobDeliveredAutoloadUsed"], offset = self.readBool(offset)
-
-            data["bufferBool"], offset = self.readChar(offset, count=25)
-            
-            # END OF ZONE 5 -> Offset 1640
-            
-            # START OF ZONE 6 -> Offset 1640
-            # The sixth zone contains fvector and is sorted in sub structures
-            
-            data["configVector"] = {}
-            data["configVector"]["cabinPositionX"], offset = self.readFloat(offset)
-            data["configVector"]["cabinPositionY"], offset = self.readFloat(offset)
-            data["configVector"]["cabinPositionZ"], offset = self.readFloat(offset)
-            data["configVector"]["headPositionX"], offset = self.readFloat(offset)
-            data["configVector"]["headPositionY"], offset = self.readFloat(offset)
-            data["configVector"]["headPositionZ"], offset = self.readFloat(offset)
-            data["configVector"]["truckHookPositionX"], offset = self.readFloat(offset)
-            data["configVector"]["truckHookPositionY"], offset = self.readFloat(offset)
-            data["configVector"]["truckHookPositionZ"], offset = self.readFloat(offset)
-            data["configVector"]["truckWheelPositionX"], offset = self.readFloat(offset, count=16)
-            data["configVector"]["truckWheelPositionY"], offset = self.readFloat(offset, count=16)
-            data["configVector"]["truckWheelPositionZ"], offset = self.readFloat(offset, count=16)
-
-            data["truckVector"] = {}
-            data["truckVector"]["lv_accelerationX"], offset = self.readFloat(offset)
-            data["truckVector"]["lv_accelerationY"], offset = self.readFloat(offset)
-            data["truckVector"]["lv_accelerationZ"], offset = self.readFloat(offset)
-            data["truckVector"]["av_accelerationX"], offset = self.readFloat(offset)
-            data["truckVector"]["av_accelerationY"], offset = self.readFloat(offset)
-            data["truckVector"]["av_accelerationZ"], offset = self.readFloat(offset)
-            data["truckVector"]["accelerationX"], offset = self.readFloat(offset)
-            data["truckVector"]["accelerationY"], offset = self.readFloat(offset)
-            data["truckVector"]["accelerationZ"], offset = self.readFloat(offset)
-            data["truckVector"]["aa_accelerationX"], offset = self.readFloat(offset)
-            data["truckVector"]["aa_accelerationY"], offset = self.readFloat(offset)
-            data["truckVector"]["aa_accelerationZ"], offset = self.readFloat(offset)
-            data["truckVector"]["cabinAVX"], offset = self.readFloat(offset)
-            data["truckVector"]["cabinAVY"], offset = self.readFloat(offset)
-            data["truckVector"]["cabinAVZ"], offset = self.readFloat(offset)
-            data["truckVector"]["cabinAAX"], offset = self.readFloat(offset)
-            data["truckVector"]["cabinAAY"], offset = self.readFloat(offset)
-            data["truckVector"]["cabinAAZ"], offset = self.readFloat(offset)
-
-            data["bufferVector"], offset = self.readChar(offset, count=60)
-            
-            # END OF ZONE 6 -> Offset 2000
-            
-            # START OF ZONE 7 -> Offset 2000
-            # The 7th zone contains fplacement and is sorted in sub structures
-            data["headPlacement"] = {}
-            data["headPlacement"]["cabinOffsetX"], offset = self.readFloat(offset)
-            data["headPlacement"]["cabinOffsetY"], offset = self.readFloat(offset)
-            data["headPlacement"]["cabinOffsetZ"], offset = self.readFloat(offset)
-            data["headPlacement"]["cabinOffsetrotationX"], offset = self.readFloat(offset)
-            data["headPlacement"]["cabinOffsetrotationY"], offset = self.readFloat(offset)
-            data["headPlacement"]["cabinOffsetrotationZ"], offset = self.readFloat(offset)
-            data["headPlacement"]["headOffsetX"], offset = self.readFloat(offset)
-            data["headPlacement"]["headOffsetY"], offset = self.readFloat(offset)
-            data["headPlacement"]["headOffsetZ"], offset = self.readFloat(offset)
-            data["headPlacement"]["headOffsetrotationX"], offset = self.readFloat(offset)
-            data["headPlacement"]["headOffsetrotationY"], offset = self.readFloat(offset)
-            data["headPlacement"]["headOffsetrotationZ"], offset = self.readFloat(offset)
-
-            data["bufferHeadPlacement"], offset = self.readChar(offset, count=152)
-            
-            # END OF ZONE 7 -> Offset 2200
-            
-            # START OF ZONE 8 -> Offset 2200
-            
-            data["truckPlacement"] = {}
-            data["truckPlacement"]["coordinateX"], offset = self.readDouble(offset)
-            data["truckPlacement"]["coordinateY"], offset = self.readDouble(offset)
-            data["truckPlacement"]["coordinateZ"], offset = self.readDouble(offset)
-            data["truckPlacement"]["rotationX"], offset = self.readDouble(offset)
-            data["truckPlacement"]["rotationY"], offset = self.readDouble(offset)
-            data["truckPlacement"]["rotationZ"], offset = self.readDouble(offset)
-
-            data["bufferTruckPlacement"], offset = self.readChar(offset, count=52)
-            
-            # END OF ZONE 8 -> Offset 2300
-            
-            # START OF ZONE 9 -> Offset 2300
-            # The 9th zone contains strings and is sorted in sub structures
-            
-            data["configString"] = {}
-            data["configString"]["truckBrandId"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["truckBrand"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["truckId"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["truckName"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["cargoId"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["cargo"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["cityDstId"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["cityDst"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["compDstId"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["compDst"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["citySrcId"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["citySrc"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["compSrcId"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["compSrc"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["shifterType"], offset = self.readChar(offset, count=16)
-            data["configString"]["truckLicensePlate"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["truckLicensePlateCountryId"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["truckLicensePlateCountry"], offset = self.readChar(offset, count=stringSize)
-            data["configString"]["jobMarket"], offset = self.readChar(offset, count=32)
-
-            data["gameplayString"] = {}
-            data["gameplayString"]["fineOffence"], offset = self.readChar(offset, count=32)
-            data["gameplayString"]["ferrySourceName"], offset = self.readChar(offset, count=stringSize)
-            data["gameplayString"]["ferryTargetName"], offset = self.readChar(offset, count=stringSize)
-            data["gameplayString"]["ferrySourceId"], offset = self.readChar(offset, count=stringSize)
-            data["gameplayString"]["ferryTargetId"], offset = self.readChar(offset, count=stringSize)
-            data["gameplayString"]["trainSourceName"], offset = self.readChar(offset, count=stringSize)
-            data["gameplayString"]["trainTargetName"], offset = self.readChar(offset, count=stringSize)
-            data["gameplayString"]["trainSourceId"], offset = self.readChar(offset, count=stringSize)
-            data["gameplayString"]["trainTargetId"], offset = self.readChar(offset, count=stringSize)
-
-            data["bufferString"], offset = self.readChar(offset, count=20)
-            
-            # END OF ZONE 9 -> Offset 4000
-            
-            # START OF ZONE 10 -> Offset 4000
-            # The 10th zone contains unsigned long long and is sorted in sub structures
-            
-            data["configLongLong"] = {}
-            data["configLongLong"]["jobIncome"], offset = self.readLongLong(offset)
-            
-            data["bufferLongLong"], offset = self.readChar(offset, count=192)
-            
-            # END OF ZONE 10 -> Offset 4200
-            
-            # START OF ZONE 11 -> Offset 4200
-            # The 11th zone contains long long and is sorted in sub structures
-            
-            data["gameplayLongLong"] = {}
-            data["gameplayLongLong"]["jobCancelledPenalty"], offset = self.readLongLong(offset)
-            data["gameplayLongLong"]["jobDeliveredRevenue"], offset = self.readLongLong(offset)
-            data["gameplayLongLong"]["fineAmount"], offset = self.readLongLong(offset)
-            data["gameplayLongLong"]["tollgatePayAmount"], offset = self.readLongLong(offset)
-            data["gameplayLongLong"]["ferryPayAmount"], offset = self.readLongLong(offset)
-            data["gameplayLongLong"]["trainPayAmount"], offset = self.readLongLong(offset)
-
-            data["bufferLongLong"], offset = self.readChar(offset, count=52)
-            
-            # END OF ZONE 11 -> Offset 4300
-            
-            # START OF ZONE 12 -> Offset 4300
-            # The 12th zone contains special events and is sorted in sub structures
-            
-            data["specialBool"] = {}
-            data["specialBool"]["onJob"], offset = self.readBool(offset)
-            data["specialBool"]["jobFinished"], offset = self.readBool(offset)
-            data["specialBool"]["jobCancelled"], offset = self.readBool(offset)
-            data["specialBool"]["jobDelivered"], offset = self.readBool(offset)
-            data["specialBool"]["fined"], offset = self.readBool(offset)
-            data["specialBool"]["tollgate"], offset = self.readBool(offset)
-            data["specialBool"]["ferry"], offset = self.readBool(offset)
-            data["specialBool"]["train"], offset = self.readBool(offset)
-            data["specialBool"]["refuel"], offset = self.readBool(offset)
-            data["specialBool"]["refuelPayed"], offset = self.readBool(offset)
-
-            data["bufferSpecial"], offset = self.readChar(offset, count=90)
-            
-            # END OF ZONE 12 -> Offset 4400
-            
-            # START OF ZONE 13 -> Offset 4400
-            
-            data["substances"], offset = self.readStringArray(offset, count=substanceSize, stringSize=stringSize)
-            
-            # END OF ZONE 13 -> Offset 6000
-            
-            # START OF ZONE 14 -> Offset 6000
-            if trailerData:
-                data["trailers"], offset = self.readTrailer(offset, count=10)
+        If the game hasn't written a new frame since the last call (time, simulatedTime and renderTime
+        are the same) then the last snapshot and its decoded zones are reused, and data["fresh"] is set
+        to False. Plugins can use this to skip work that only depends on the telemetry.
+
+        Returns:
+            telemetryView: The telemetry data.
+        """
+        buffer = self.connect()
         
+        data = {}
+        try:
+            header = self.readHeader()
+            times = (header["time"], header["simulatedTime"], header["renderTime"])
+            if self.lastView is not None and times == self.lastTimes:
+                data = self.lastView.share()
+                data["fresh"] = False
+                self.decodesSaved += 1
+            else:
+                # Copying the block is much cheaper than decoding it, and makes sure that all the values
+                # are from the same frame even if they are read later on.
+                data = telemetryView(buffer[:snapshotSize])
+                data["fresh"] = True
+                self.lastTimes = times
+            self.lastView = data
         except Exception as e:
             print(e)
-            try:
-                print("Current offset : " + offset)
-            except:
-                pass
-        
-        self.mm.close()
         
         return data
-           
\ No newline at end of file
@@ -15,7 +15,9 @@ PluginInfo = PluginInformation(
     url="https://github.com/Tumppi066/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", # = Panel
     dynamicOrder="before lane detection", # Will run the plugin before anything else in the mainloop (data will be empty)
-    noUI=True # This plugin does not have a UI
+    noUI=True, # This plugin does not have a UI
+    maxExecTime=0,
+    threadSafe=True
 )
 
 import tkinter as tk
@@ -53,14 +55,24 @@ def CheckForTruckersMP():
 # The main file runs the "plugin" function each time the plugin is called
 # The data variable contains the data from the mainloop, plugins can freely add and modify data as needed
 # The data from the last frame is contained under data["last"]
+def AskToContinue():
+    global askQueued
+    if helpers.AskOkCancel("TruckersMP detected", "TruckersMP has been detected. Using ETS2LA in TMP is allowed, but you need to keep in mind you might get banned for reckless driving. Keep your eyes on the road, and hands on the steering wheel ready to take over.\nClicking cancel will close the app.\nClicking ok will disable this plugin."):
+        settings.RemoveFromList("Plugins", "Enabled", "TruckersMPLock")
+        variables.UpdatePlugins()
+    else:
+        mainUI.quit()
+    askQueued = False
+
+askQueued = False
 def plugin(data):
+    global askQueued
     
-    if CheckForTruckersMP():
-        if helpers.AskOkCancel("TruckersMP detected", "TruckersMP has been detected. Using ETS2LA in TMP is allowed, but you need to keep in mind you might get banned for reckless driving. Keep your eyes on the road, and hands on the steering wheel ready to take over.\nClicking cancel will close the app.\nClicking ok will disable this plugin."):
-            settings.RemoveFromList("Plugins", "Enabled", "TruckersMPLock")
-            variables.UpdatePlugins()
-        else:
-            mainUI.quit()
+    if not askQueued and CheckForTruckersMP():
+        # The dialog is a Tk widget, plugin() can run on the pipeline threads (src/pipeline.py).
+        # The main thread (and with it the controller output) waits for the answer.
+        askQueued = True
+        helpers.RunInMainThread(AskToContinue)
 
     return data # Plugins need to ALWAYS return the data
 
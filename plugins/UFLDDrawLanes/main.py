@@ -15,7 +15,8 @@ PluginInfo = PluginInformation(
     url="https://github.com/Tumppi066/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", # = Panel
     dynamicOrder="before game", # Will run the plugin before anything else in the mainloop (data will be empty)
-    noUI = True
+    noUI = True,
+    threadSafe=True
 )
 
 import tkinter as tk
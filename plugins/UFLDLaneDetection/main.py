@@ -14,7 +14,9 @@ PluginInfo = PluginInformation(
     type="dynamic", # = Panel
     dynamicOrder="before lane detection", # Will run the plugin before anything else in the mainloop (data will be empty)
     exclusive="LaneDetection", # Will disable the other lane detection plugins
-    noUI = True
+    noUI = True,
+    maxExecTime=0,
+    threadSafe=True
 )
 
 
@@ -28,6 +30,8 @@ import src.helpers as helpers
 import src.mainUI as mainUI
 import src.variables as variables
 import src.settings as settings
+import src.capture as capture
+import src.inferenceService as inferenceService
 import os
 
 import cv2
@@ -40,9 +44,7 @@ nvidiaPath = os.path.join(variables.PATH, nvidiaPath)
 
 os.environ["PATH"] = nvidiaPath
 
-def ProcessFrame(data):
-    image = data["frame"]
-    
+def ProcessFrame(image):
     input_tensor = laneDetector.prepare_input(image)
 
     # Perform inference on the image
@@ -60,6 +62,12 @@ def ProcessFrame(data):
 # The main file runs the "plugin" function each time the plugin is called
 # The data variable contains the data from the mainloop, plugins can freely add and modify data as needed
 # The data from the last frame is contained under data["last"]
+def DisableWithFailure():
+    # The failure window is a Tk widget, plugin() can run on the pipeline threads (src/pipeline.py)
+    helpers.RunInMainThread(lambda: helpers.ShowFailure("Could not load the model file. Most likely it's missing.\nUFLD will now disable itself.", title="UFLD Error"))
+    settings.RemoveFromList("Plugins", "Enabled", "UFLDLaneDetection")
+    variables.UpdatePlugins()
+
 laneDetector = None
 def plugin(data):
     global laneDetector
@@ -69,16 +77,25 @@ def plugin(data):
             if os.path.exists(model_path):
                 laneDetector = UltrafastLaneDetectorV2(model_path, model_type)
             else:
-                helpers.ShowFailure("Could not load the model file. Most likely it's missing.\nUFLD will now disable itself.", title="UFLD Error")
-                settings.RemoveFromList("Plugins", "Enabled", "UFLDLaneDetection")
-                variables.UpdatePlugins()
+                DisableWithFailure()
         except:
-            helpers.ShowFailure("Could not load the model file. Most likely it's missing.\nUFLD will now disable itself.", title="UFLD Error")
-            settings.RemoveFromList("Plugins", "Enabled", "UFLDLaneDetection")
-            variables.UpdatePlugins()
+            DisableWithFailure()
+    
+    try:
+        paused = data["api"]["pause"] == True
+    except:
+        paused = False
+    if paused:
+        # Don't steer with lanes from before the pause once the game is running again
+        inferenceService.Forget("UFLDLaneDetection")
+        return data
     
     try:
-        lanePoints, lanesDetected = ProcessFrame(data)
+        # Runs in the background, the lanes can be from an older frame until the model is done
+        result, resultSequence = inferenceService.Infer("UFLDLaneDetection", ProcessFrame, data["frame"], data.get("frameSequence"), maxAge=1)
+        if result == None:
+            return data
+        lanePoints, lanesDetected = result
         
         farLeftLane = lanePoints[0]
         leftLane = lanePoints[1]
@@ -100,7 +117,7 @@ def plugin(data):
         leftLaneX = np.mean(leftLanePoints, axis=0)[0]
         rightLaneX = np.mean(rightLanePoints, axis=0)[0]
         
-        frame = data["frame"]
+        frame = capture.Writable(data)
         
         w = frame.shape[1]
         h = frame.shape[0]
@@ -138,7 +155,7 @@ def onEnable():
     pass
 
 def onDisable():
-    pass
+    inferenceService.Forget("UFLDLaneDetection")
 
 # Plugins can also have UIs, this works the same as the panel example
 class UI():
@@ -15,7 +15,8 @@ PluginInfo = PluginInformation(
     url="https://github.com/Tumppi066/Euro-Truck-Simulator-2-Lane-Assist",
     type="dynamic", # = Panel
     dynamicOrder="before UI", # Will run the plugin before anything else in the mainloop (data will be empty)
-    noUI=True
+    noUI=True,
+    maxExecTime=0
 )
 
 import tkinter as tk
@@ -31,17 +32,12 @@ import time
 import threading
 import src.controls as controls
 
-timer = time.time()
 temporarilyDisablePausing = False
 def ToggleTemporarilyDisablePausing():
     global temporarilyDisablePausing
-    global timer
-    if time.time() - timer < 0.5:
-        return # Prevents double presses
     temporarilyDisablePausing = not temporarilyDisablePausing
-    timer = time.time()
 
-controls.RegisterKeybind("Temporarily allow steering while paused", description="This is needed during setup",defaultButtonIndex="m", callback=lambda: ToggleTemporarilyDisablePausing())
+controls.RegisterKeybind("Temporarily allow steering while paused", description="This is needed during setup",defaultButtonIndex="m", callback=lambda: ToggleTemporarilyDisablePausing(), debounce=0.5)
 
 gamepad = None
 def createController():
@@ -8,7 +8,11 @@ PluginInfo = PluginInformation(
     author="Tumppi066",
     url="https://github.com/Tumppi066/euro-truck-simulator-2-lane-assist",
     type="dynamic", # = Panel
-    dynamicOrder="before image capture" # Will run the plugin before anything else in the mainloop (data will be empty)
+    dynamicOrder="before image capture", # Will run the plugin before anything else in the mainloop (data will be empty)
+    reads=["last"],
+    writes=["api", "frameFull", "frame", "frameOriginal"],
+    maxExecTime=0,
+    threadSafe=True
 )
 
 import tkinter as tk
@@ -17,6 +21,7 @@ import src.helpers as helpers
 import src.mainUI as mainUI
 import src.variables as variables
 import src.settings as settings
+import src.capture as capture
 from src.loading import LoadingWindow
 from src.translator import Translate
 import src.mainUI as mainUI
@@ -25,6 +30,8 @@ import os
 import math
 from plugins.VirtualSimAPI.scsPlugin import scsTelemetry
 import plugins.VirtualSimAPI.scsPlugin as scsPlugin
+from plugins.TruckSimAPI.scsPlugin import telemetryView
+from plugins.TruckSimAPI.recording import telemetryRecording
 import keyboard as kb
 
 # The main file runs the "plugin" function each time the plugin is called
@@ -34,25 +41,145 @@ API = None
 lastX = 0
 lastY = 0
 isConnected = False
+replay = None
+replayStart = 0
+replayIndex = 0
+lastReplayIndex = -1
+lastReplayView = None
+lastReplayFrame = None
 
+def LoadReplay():
+    """Open the recording set in the VirtualSimAPI settings. Recordings are made with the TruckSimAPI plugin."""
+    global replay
+    global replaySpeed
+    global crop
+    
+    StopReplay()
+    filename = settings.GetSettings("VirtualSimAPI", "replayFile", "")
+    # 1 = original speed, 2 = twice as fast... 0 = advance one recorded frame each frame (deterministic)
+    replaySpeed = float(settings.GetSettings("VirtualSimAPI", "replaySpeed", 1.0))
+    if filename == "" or filename == None:
+        return
+    
+    try:
+        replay = telemetryRecording(filename)
+    except Exception as ex:
+        print(ex.args)
+        return
+    
+    if len(replay) == 0:
+        print(f"{filename} doesn't have any recorded frames.")
+        StopReplay()
+        return
+    
+    # The recorded frames are full screen, crop them the same way as the screen capture plugins
+    x = settings.GetSettings("bettercam", "x", 0)
+    y = settings.GetSettings("bettercam", "y", 0)
+    crop = (x, y, x + settings.GetSettings("bettercam", "width", 1280), y + settings.GetSettings("bettercam", "height", 720))
+    
+    RestartReplay()
+    print(f"Replaying {len(replay)} frames ({round(replay.Duration(), 1)}s) from {filename}")
+
+def RestartReplay():
+    global replayStart
+    global replayIndex
+    global lastReplayIndex
+    global lastReplayView
+    global lastReplayFrame
+    
+    replayStart = time.time()
+    replayIndex = 0
+    lastReplayIndex = -1
+    lastReplayView = None
+    lastReplayFrame = None
+
+def StopReplay():
+    global replay
+    
+    if replay != None:
+        replay.Close()
+    replay = None
+
+def ReplayFrame(data):
+    """Get the telemetry for this frame from the recording, and set the recorded frame if there is one.
+
+    Args:
+        data (dict): The data from the mainloop.
+
+    Returns:
+        telemetryView: The telemetry data, decoded with the TruckSimAPI decoder.
+    """
+    global replayIndex
+    global lastReplayIndex
+    global lastReplayView
+    global lastReplayFrame
+    
+    if replaySpeed > 0:
+        elapsed = (time.time() - replayStart) * replaySpeed
+        if elapsed > replay.Duration():
+            RestartReplay()
+            elapsed = 0
+        index = replay.IndexAt(elapsed)
+    else:
+        if replayIndex >= len(replay):
+            RestartReplay()
+        index = replayIndex
+        replayIndex += 1
+    
+    # The same record is used for multiple frames if the replay is slower than the mainloop
+    if index == lastReplayIndex and lastReplayView is not None:
+        apiData = lastReplayView.share()
+        apiData["fresh"] = False
+        # The data is new each frame, so the recorded frame has to be set again
+        SetReplayFrame(data, lastReplayFrame)
+        return apiData
+    
+    timestamp, block, frame = replay.Read(index)
+    apiData = telemetryView(block)
+    apiData["fresh"] = True
+    lastReplayIndex = index
+    lastReplayView = apiData
+    lastReplayFrame = capture.ReadOnly(frame) if frame is not None else None
+    SetReplayFrame(data, lastReplayFrame)
+    
+    return apiData
+
+def SetReplayFrame(data, frame):
+    if frame is None:
+        return
+    data["frameFull"] = frame
+    data["frame"] = frame[crop[1]:crop[3], crop[0]:crop[2]]
+    data["frameOriginal"] = data["frame"]
 
 def plugin(data):
     global API
     global lastX
     global lastY
     
-    apiData = API.update()    
+    if replay != None:
+        apiData = ReplayFrame(data)
+    else:
+        apiData = API.update()    
     data["api"] = apiData
     
+    # The replayed telemetry didn't change, keep last frame's angle
+    if not apiData.get("fresh", True):
+        try:
+            data["api"]["angle"] = data["last"]["api"]["angle"]
+            data["api"]["velocity"] = data["last"]["api"]["velocity"]
+        except: pass
+        return data
+    
     # Listen for the arrow keys and move the "truck" accordingly
-    if kb.is_pressed("up"):
-        scsPlugin.virtualZ += 10 * data["last"]["executionTimes"]["all"] * 40
-    if kb.is_pressed("down"):
-        scsPlugin.virtualZ -= 10 * data["last"]["executionTimes"]["all"] * 40
-    if kb.is_pressed("left"): 
-        scsPlugin.virtualX -= 10 * data["last"]["executionTimes"]["all"] * 40
-    if kb.is_pressed("right"): 
-        scsPlugin.virtualX += 10 * data["last"]["executionTimes"]["all"] * 40
+    if replay == None:
+        if kb.is_pressed("up"):
+            scsPlugin.virtualZ += 10 * data["last"]["executionTimes"]["all"] * 40
+        if kb.is_pressed("down"):
+            scsPlugin.virtualZ -= 10 * data["last"]["executionTimes"]["all"] * 40
+        if kb.is_pressed("left"): 
+            scsPlugin.virtualX -= 10 * data["last"]["executionTimes"]["all"] * 40
+        if kb.is_pressed("right"): 
+            scsPlugin.virtualX += 10 * data["last"]["executionTimes"]["all"] * 40
     
     # Calculate the current driving angle based on this and last frames coordinates
     try:
@@ -89,10 +216,13 @@ def onEnable():
     if API == None:
         API = scsTelemetry()
     
+    LoadReplay()
+    
 def onDisable():
     global stop
     global loading
     
+    StopReplay()
     stop = True
     try:
         loading.destroy()
@@ -121,6 +251,11 @@ class UI():
                 else:
                     self.list.insert(tk.END, key + ": " + str(value))
         
+        def loadReplay(self):
+            settings.CreateSettings("VirtualSimAPI", "replayFile", self.replayFile.get())
+            settings.CreateSettings("VirtualSimAPI", "replaySpeed", self.replaySpeed.get())
+            LoadReplay()
+        
         def exampleFunction(self):
             
             try:
@@ -132,6 +267,15 @@ class UI():
             self.root.pack_propagate(0)
             
             
+            # The helpers use grid, so they need their own frame
+            replayFrame = ttk.Frame(self.root)
+            replayFrame.pack()
+            # Recording made with the TruckSimAPI plugin, leave empty to use the default values
+            self.replayFile = helpers.MakeComboEntry(replayFrame, "Replay file", "VirtualSimAPI", "replayFile", 0, 0, width=40, isString=True)
+            # 1 = original speed, 2 = twice as fast, 0 = one recorded frame per frame for repeatable tests
+            self.replaySpeed = helpers.MakeComboEntry(replayFrame, "Replay speed", "VirtualSimAPI", "replaySpeed", 1, 0, isFloat=True, value=1.0)
+            helpers.MakeButton(replayFrame, "Load", lambda: self.loadReplay(), 2, 0)
+            
             ttk.Button(self.root, text=Translate("Update Data"), command=self.updateData).pack()
             ttk.Label(self.root, text=Translate("Will only work when the app is enabled -> scrollable")).pack()
             # Create a list to hold all of the API data
@@ -36,10 +36,16 @@ class PluginInformation():
         
         requires (list): List of plugins that are required for this plugin to work (plugin names) ["plugin1", "plugin2"]
     
-        maxExecTime (int): Maximum execution time in ms (if the plugin takes longer than this to execute then it will be skipped) (set to 0 to disable the limit, default:100)
+        maxExecTime (int): Maximum execution time in ms (if the plugin usually takes longer than this to execute and it's threadSafe then it will be run in the background and the data from its last run is used, see src/governor.py) (set to 0 to disable the limit, default:100)
+        
+        reads (list): Top level data keys the plugin reads ["frameFull", "api"]. Note that data["frameFull"] can be a capture.regionFrame instead of a numpy array, slice it or use np.asarray() before giving it to OpenCV (see src/capture.py). Plugins that set both reads and writes can be run in parallel with the other plugins in the same dynamicOrder that don't touch the same keys. (default: None, run on its own)
+        
+        writes (list): Top level data keys the plugin writes ["GPS"]. (default: None, run on its own)
+        
+        threadSafe (bool): If true then the plugin function doesn't use tkinter or OpenCV windows (or only through helpers.RunInMainThread), so it can be run outside of the main thread by the pipelined main loop (src/pipeline.py), in the background by the governor (src/governor.py) and in the thread pool of the parallel plugins (src/scheduler.py). (default: False)
     
     """
-    def __init__(self, name, description, version, author, url, type, image=None, dynamicOrder=None, disablePlugins=False, disableLoop=False, noUI=False, exclusive=None, requires=None, maxExecTime=100):
+    def __init__(self, name, description, version, author, url, type, image=None, dynamicOrder=None, disablePlugins=False, disableLoop=False, noUI=False, exclusive=None, requires=None, maxExecTime=100, reads=None, writes=None, threadSafe=False):
         self.name = name
         self.description = description
         self.version = version
@@ -53,4 +59,7 @@ class PluginInformation():
         self.noUI = noUI
         self.exclusive = exclusive
         self.requires = requires
-        self.maxExecTime = maxExecTime
\ No newline at end of file
+        self.maxExecTime = maxExecTime
+        self.reads = reads
+        self.writes = writes
+        self.threadSafe = threadSafe
\ No newline at end of file
@@ -0,0 +1,386 @@
+"""
+Helpers for the screen capture plugins.
+
+Plugins that only use a part of the screen can request it, so the capture plugins that support it
+(MSSScreenCapture) only grab and convert the requested regions instead of the whole monitor.
+data["frameFull"] is then a regionFrame, it can be sliced and has a shape like a normal full frame,
+but the pixels outside of the grabbed regions are only captured if someone asks for them.
+It isn't a numpy array, so OpenCV functions can't be given data["frameFull"] directly anymore,
+slice it or use np.asarray() first.
+
+```python
+# Will capture this region (left, top, right, bottom in monitor pixels) each frame.
+RequestRegion("TrafficLightDetection", (x1, y1, x2, y2))
+ReleaseRegion("TrafficLightDetection")
+
+frame = data["frameFull"][y1:y2, x1:x2] # Works with both numpy arrays and regionFrames
+frame = np.asarray(data["frameFull"]) # Always a full numpy frame (captures the rest of the screen if needed)
+```
+
+The screen capture plugins grab the frames on a background captureThread, the main loop only takes the newest
+one. The same frame can be given to the main loop more than once if it runs faster than the capture, so
+each frame has a sequence number and plugins can skip the frames they have already processed:
+```python
+data["frameSequence"] # Increases by one for each captured frame
+data["frameTimestamp"] # When the frame was captured, in time.time() format
+
+if not IsNewFrame("MyPlugin", data):
+    return data
+```
+
+The frames from the capture plugins are read-only, they are shared by all plugins (and with data["frameOriginal"])
+without copying them. Plugins that draw on the frame get their own copy with Writable(), it's only copied
+once per frame no matter how many plugins draw on it:
+```python
+frame = Writable(data) # data["frame"] is replaced with the writable copy
+cv2.putText(frame, ...)
+```
+"""
+from src.logger import print
+import numpy as np
+import threading
+import time
+import sys
+
+regions = {}
+"""name -> (left, top, right, bottom) of the regions plugins have requested."""
+
+def RequestRegion(name:str, region:tuple):
+    """Capture a region of the monitor each frame.
+
+    Args:
+        name (str): Name of the plugin (or part of it) that uses the region. Requesting again with the same name replaces the old region.
+        region (tuple): (left, top, right, bottom) in monitor pixels.
+    """
+    regions[name] = tuple(int(value) for value in region)
+
+def ReleaseRegion(name:str):
+    """Stop capturing a region requested with RequestRegion."""
+    regions.pop(name, None)
+
+def MergeRegions(rects):
+    """Merge the overlapping or touching rectangles, so each pixel is only grabbed once.
+
+    Args:
+        rects (list): (left, top, right, bottom) rectangles.
+
+    Returns:
+        list: The merged rectangles.
+    """
+    merged = [rect for rect in rects if rect[2] > rect[0] and rect[3] > rect[1]]
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                a = merged[i]
+                b = merged[j]
+                if a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]:
+                    merged[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del merged[j]
+                    changed = True
+                    break
+            if changed:
+                break
+    return merged
+
+def ClampRegion(rect, width, height):
+    return (max(0, min(rect[0], width)), max(0, min(rect[1], height)), max(0, min(rect[2], width)), max(0, min(rect[3], height)))
+
+class framePool:
+    """Reuses arrays of the same shape between frames, instead of allocating new ones each frame.
+
+    Args:
+        size (int, optional): How many arrays to keep at most. Defaults to 8.
+    """
+    def __init__(self, size=8):
+        self.size = size
+        self.arrays = []
+        self.lock = threading.Lock()
+
+    def Get(self, shape, dtype=np.uint8):
+        """Get an array that isn't used by anything anymore.
+
+        Args:
+            shape (tuple): Shape of the array.
+            dtype (np.dtype, optional): Defaults to np.uint8.
+
+        Returns:
+            np.ndarray: The array, the contents are whatever was left in it.
+        """
+        shape = tuple(shape)
+        with self.lock:
+            for i in range(len(self.arrays)):
+                if self.arrays[i].shape == shape and self.arrays[i].dtype == dtype and Reusable(self.arrays, i):
+                    return self.arrays[i]
+
+            array = np.empty(shape, dtype)
+            self.arrays.append(array)
+            if len(self.arrays) > self.size:
+                # The oldest one is still used by someone (or has the wrong shape), let it go
+                self.arrays.pop(0)
+            return array
+
+pool = framePool()
+
+def ReadOnly(array):
+    """Get a read-only view of an array, so it can be shared without copying.
+
+    Args:
+        array (np.ndarray): The array, anything else is returned as is.
+
+    Returns:
+        np.ndarray: The view.
+    """
+    if not isinstance(array, np.ndarray):
+        return array
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+def Writable(data:dict, key:str="frame"):
+    """Get a frame that can be drawn on (copy on write).
+
+    If the frame is read-only it's copied (into an array from the pool) and the copy replaces it
+    in the data, so the next plugin that draws on it uses the same copy.
+
+    Args:
+        data (dict): The data of the current frame.
+        key (str, optional): Which frame. Defaults to "frame".
+
+    Returns:
+        np.ndarray: The writable frame, or None if there is no frame.
+    """
+    frame = data.get(key)
+    if not isinstance(frame, np.ndarray) or frame.flags.writeable:
+        return frame
+    copy = pool.Get(frame.shape, frame.dtype)
+    np.copyto(copy, frame)
+    data[key] = copy
+    return copy
+
+class regionFrame:
+    """A full monitor frame where only some regions have been captured. The pixels are read-only.
+
+    Args:
+        width (int): Width of the monitor.
+        height (int): Height of the monitor.
+        grabRegion (function): Called as grabRegion((left, top, right, bottom)), returns the BGR pixels of that region.
+        grabbed (list, optional): (rect, pixels) of the regions that are already captured. Defaults to [].
+    """
+    def __init__(self, width, height, grabRegion, grabbed=[]):
+        self.shape = (height, width, 3)
+        self.dtype = np.uint8
+        self.grabRegion = grabRegion
+        self.grabbed = list(grabbed)
+        self.full = None
+
+    def Find(self, rect):
+        """Get the pixels of a region if it's inside one of the captured regions, otherwise None."""
+        if self.full is not None:
+            return self.full[rect[1]:rect[3], rect[0]:rect[2]]
+        for grabbedRect, pixels in self.grabbed:
+            if grabbedRect[0] <= rect[0] and grabbedRect[1] <= rect[1] and rect[2] <= grabbedRect[2] and rect[3] <= grabbedRect[3]:
+                return pixels[rect[1] - grabbedRect[1]:rect[3] - grabbedRect[1], rect[0] - grabbedRect[0]:rect[2] - grabbedRect[0]]
+        return None
+
+    def Region(self, rect):
+        """Get the pixels of a region, capturing it if it hasn't been captured yet.
+
+        Args:
+            rect (tuple): (left, top, right, bottom)
+
+        Returns:
+            np.ndarray: The pixels (a view into the captured region when possible).
+        """
+        rect = ClampRegion(rect, self.shape[1], self.shape[0])
+        pixels = self.Find(rect)
+        if pixels is None:
+            pixels = ReadOnly(self.grabRegion(rect))
+            self.grabbed.append((rect, pixels))
+        return pixels
+
+    def Full(self):
+        """Get the whole frame as a numpy array. Only captured once per frame."""
+        if self.full is None:
+            rect = (0, 0, self.shape[1], self.shape[0])
+            pixels = self.Find(rect)
+            self.full = pixels if pixels is not None else ReadOnly(self.grabRegion(rect))
+        return self.full
+
+    def __getitem__(self, key):
+        if type(key) != tuple:
+            key = (key,)
+        rows = key[0]
+        columns = key[1] if len(key) > 1 else slice(None)
+        if type(rows) != slice or type(columns) != slice or rows.step not in [None, 1] or columns.step not in [None, 1]:
+            return self.Full()[key]
+
+        top, bottom, _ = rows.indices(self.shape[0])
+        left, right, _ = columns.indices(self.shape[1])
+        pixels = self.Region((left, top, max(left, right), max(top, bottom)))
+        if len(key) > 2:
+            return pixels[(slice(None), slice(None)) + key[2:]]
+        return pixels
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype != None:
+            return self.Full().astype(dtype)
+        return self.Full()
+
+    def copy(self):
+        return self.Full().copy()
+
+def IsNewFrame(name:str, data:dict):
+    """Check if the frame in the data hasn't been processed by this plugin yet.
+
+    Args:
+        name (str): Name of the plugin.
+        data (dict): The data of the current frame.
+
+    Returns:
+        bool: False if the plugin has already been given this frame, True otherwise (also when the capture plugin doesn't set a sequence).
+    """
+    sequence = data.get("frameSequence")
+    if sequence == None:
+        return True
+    if lastSequences.get(name) == sequence:
+        return False
+    lastSequences[name] = sequence
+    return True
+
+lastSequences = {}
+"""name -> the last frameSequence given to IsNewFrame."""
+
+def Reusable(arrays:list, index:int):
+    """Check if a buffer isn't used anywhere else, so it can be overwritten with the next frame.
+
+    Args:
+        arrays (list): The buffers of a captureThread slot.
+        index (int): Which buffer to check.
+
+    Returns:
+        bool: True if the list is the only thing that references the buffer (or a view of it).
+    """
+    # One reference from the list and one from the argument of getrefcount
+    return sys.getrefcount(arrays[index]) <= 2
+
+class captureThread:
+    """Captures frames on a background thread, so the main loop doesn't have to wait for the grab.
+
+    The frames are captured into a pair of buffers. While the newest frame is published in one,
+    the next one is captured into the other. A buffer that is still used by a plugin (for example
+    the frame in data["last"]) is never overwritten, a new one is made in its place instead.
+
+    The capture is paced to the consumer: after a frame is published the next one isn't grabbed
+    until it has been taken, and the grab is timed so that it's done shortly before the consumer
+    is expected to ask for the next frame. So the thread doesn't keep a core busy grabbing frames
+    that nobody uses.
+
+    Args:
+        grab (function): Called as grab(buffers) with the buffers of the slot that is free (list of np.ndarray, the ones that are still in use are None, or None on the first call). It should capture into the buffers when their shape matches, and return (arrays, info) of the new frame, or None if there was no new frame. info can be anything the plugin needs to use the arrays (for example where on the screen they are).
+        name (str, optional): Name of the thread. Defaults to "Capture".
+    """
+    def __init__(self, grab, name="Capture"):
+        self.grab = grab
+        self.name = name
+        self.slots = [None, None]
+        self.latest = (None, None, 0, 0)
+        """(arrays, info, timestamp, sequence) of the newest frame."""
+        self.sequence = 0
+        self.takenSequence = 0
+        """Sequence of the newest frame that has been taken."""
+        self.lastTake = None
+        self.takeInterval = 0
+        """Rolling estimate of the seconds between the consumer taking new frames."""
+        self.grabTime = 0
+        """Rolling estimate of the seconds a grab takes."""
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def Start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.CaptureThread, name=self.name, daemon=True)
+        self.thread.start()
+
+    def Stop(self):
+        self.running = False
+        if self.thread != None:
+            self.thread.join(1)
+            self.thread = None
+
+    def CaptureThread(self):
+        index = 0
+        while self.running:
+            buffers = self.slots[index]
+            if buffers != None:
+                # Checked with the lock, so a Latest() call can't be taking the buffers at the same time
+                with self.condition:
+                    buffers = [buffers[i] if Reusable(buffers, i) else None for i in range(len(buffers))]
+
+            start = time.time()
+            try:
+                frame = self.grab(buffers)
+            except Exception as ex:
+                print(f"{self.name} failed to capture: {ex.args}")
+                time.sleep(0.1)
+                continue
+            if frame is None:
+                time.sleep(0.001)
+                continue
+            arrays, info = frame
+            self.grabTime += (time.time() - start - self.grabTime) * 0.2
+
+            self.slots[index] = arrays
+            with self.condition:
+                self.sequence += 1
+                self.latest = (arrays, info, time.time(), self.sequence)
+                self.condition.notify_all()
+                # Don't grab the next frame before this one has been used
+                while self.running and self.takenSequence < self.sequence:
+                    self.condition.wait(0.1)
+                # Use most of the time until the next frame is expected for waiting, the rest is left as
+                # a margin so the frame is ready even if the consumer is a bit early
+                delay = min((self.takeInterval - self.grabTime) * 0.75, 0.1)
+            if delay > 0:
+                time.sleep(delay)
+            # The next frame goes to the other buffer, the one that was just published is left alone
+            index = 1 - index
+
+    def Latest(self):
+        """Get the newest frame.
+
+        Returns:
+            tuple: (arrays, info, timestamp, sequence), arrays is None if nothing has been captured yet.
+        """
+        with self.condition:
+            return self.Take()
+
+    def Take(self):
+        arrays, info, timestamp, sequence = self.latest
+        if sequence > self.takenSequence:
+            now = time.time()
+            if self.lastTake != None:
+                self.takeInterval += (now - self.lastTake - self.takeInterval) * 0.2
+            self.lastTake = now
+            self.takenSequence = sequence
+            self.condition.notify_all()
+        # A new tuple references the arrays themselves, so the capture thread knows they are in use
+        return (tuple(arrays) if arrays is not None else None, info, timestamp, sequence)
+
+    def Wait(self, sequence:int, timeout:float=None):
+        """Wait for a frame newer than the given sequence.
+
+        Args:
+            sequence (int): The sequence of the last frame that was used.
+            timeout (float, optional): How long to wait. Defaults to forever.
+
+        Returns:
+            tuple: Same as Latest().
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.latest[3] > sequence or not self.running, timeout)
+            return self.Take()
@@ -8,6 +8,11 @@ RegisterKeybind(name, callback=None, description="")
 # Will get the value of a keybind.
 GetKeybindValue(name)
 ```
+
+The inputs are event based. Key presses come from a keyboard hook and the joystick buttons and axes
+from pygame's events, they are handled once per frame in plugin(). The callbacks are only called
+when a keybind is pressed or released (or each frame while it's held, if a holdCallback is given),
+and GetKeybindValue() just returns the newest state.
 """
 import tkinter as tk
 from tkinter import ttk
@@ -20,6 +25,8 @@ from plugins.plugin import PluginInformation
 import math
 import pygame
 import keyboard
+import queue
+import time
 from tktooltip import ToolTip
 from src.logger import print
 
@@ -34,15 +41,37 @@ PluginInfo = PluginInformation(
 
 KEYBOARD_GUID = 1
 KEYBINDS = []
-def RegisterKeybind(name:str, callback=None, notBoundInfo:str="", description:str="", axis:bool=False, defaultButtonIndex:int=-1, defaultAxisIndex:int=-1):
+keybindIndex = {}
+"""name -> index in KEYBINDS"""
+keybindInputs = []
+"""The input (see InputOf) each keybind in KEYBINDS is bound to."""
+inputBindings = {}
+"""input -> indices of the keybinds bound to it"""
+keybindPressed = []
+"""Whether each keybind in KEYBINDS is currently pressed."""
+lastPress = []
+"""When each keybind was last pressed, used for the debounce."""
+heldKeybinds = set()
+"""Indices of the pressed keybinds that have a holdCallback."""
+debouncedKeybinds = set()
+"""Indices of the pressed keybinds whose press was ignored, their release is ignored too."""
+inputState = {}
+"""input -> newest value, True / False for keys and buttons, float for axes."""
+AXIS_THRESHOLD = 0.4
+"""How far an axis has to be moved for it to count as pressed."""
+
+def RegisterKeybind(name:str, callback=None, notBoundInfo:str="", description:str="", axis:bool=False, defaultButtonIndex:int=-1, defaultAxisIndex:int=-1, releaseCallback=None, holdCallback=None, debounce:float=0.05):
     """Will register a keybind to the input manager. This is necessary to use the keybind.
 
     Args:
         name (str): Keybind name. This is used to identify the keybind.
-        callback (_type_, optional): Callback when the keybind is pressed. Defaults to None.
+        callback (_type_, optional): Callback when the keybind is pressed. Called once per press. Defaults to None.
         notBoundInfo (str, optional): Will be shown to the user when nothing is bound. Useful for notifying of optional keybinds. Defaults to "".
         description (str, optional): Additional description to the keybind. Defaults to "".
         axis (bool, optional): Should the keybind be an axis.
+        releaseCallback (_type_, optional): Callback when the keybind is released. Defaults to None.
+        holdCallback (_type_, optional): Callback each frame while the keybind is held down. Defaults to None.
+        debounce (float, optional): Presses closer than this (in seconds) to the last one are ignored. Defaults to 0.05.
     """
     
     keybind = GetKeybindFromName(name)
@@ -61,7 +90,10 @@ def RegisterKeybind(name:str, callback=None, notBoundInfo:str="", description:st
                          "buttonIndex": defaultButtonIndex, 
                          "axisIndex": defaultAxisIndex,
                          "shouldBeAxis": axis,
-                         "notBoundInfo": notBoundInfo})
+                         "notBoundInfo": notBoundInfo,
+                         "releaseCallback": releaseCallback,
+                         "holdCallback": holdCallback,
+                         "debounce": debounce})
     else: # We already have data for the keybind
         KEYBINDS.append({"name": name, 
                          "callback": callback, 
@@ -70,7 +102,55 @@ def RegisterKeybind(name:str, callback=None, notBoundInfo:str="", description:st
                          "buttonIndex": keybind["buttonIndex"], 
                          "axisIndex": keybind["axisIndex"],
                          "shouldBeAxis": axis,
-                         "notBoundInfo": notBoundInfo if notBoundInfo != keybind["notBoundInfo"] else keybind["notBoundInfo"]})
+                         "notBoundInfo": notBoundInfo if notBoundInfo != keybind["notBoundInfo"] else keybind["notBoundInfo"],
+                         "releaseCallback": releaseCallback,
+                         "holdCallback": holdCallback,
+                         "debounce": debounce})
+    IndexKeybinds()
+
+def InputOf(keybind):
+    """Get the input a keybind is bound to.
+
+    Returns:
+        tuple | None: ("key", name), (GUID, "button", index) or (GUID, "axis", index). None if it's not bound.
+    """
+    if keybind["deviceGUID"] == KEYBOARD_GUID:
+        return ("key", str(keybind["buttonIndex"]).lower())
+    if keybind["deviceGUID"] == -1:
+        return None
+    if keybind["buttonIndex"] != -1:
+        return (keybind["deviceGUID"], "button", keybind["buttonIndex"])
+    if keybind["axisIndex"] != -1:
+        return (keybind["deviceGUID"], "axis", keybind["axisIndex"])
+    return None
+
+def IndexKeybinds():
+    """Rebuild the lookups. Has to be called each time KEYBINDS is changed."""
+    global keybindIndex
+    global keybindInputs
+    global inputBindings
+    global keybindPressed
+    global lastPress
+    global heldKeybinds
+    global debouncedKeybinds
+    index = {}
+    inputs = []
+    bindings = {}
+    for i, keybind in enumerate(KEYBINDS):
+        # If a keybind is registered multiple times the first one is used
+        if keybind["name"] not in index:
+            index[keybind["name"]] = i
+        bound = InputOf(keybind)
+        inputs.append(bound)
+        if bound != None:
+            bindings.setdefault(bound, []).append(i)
+    keybindIndex = index
+    keybindInputs = inputs
+    inputBindings = bindings
+    keybindPressed = [False] * len(KEYBINDS)
+    lastPress = [0] * len(KEYBINDS)
+    heldKeybinds = set()
+    debouncedKeybinds = set()
 
 def ReadKeybindsVariable():
     """Returns the KEYBINDS variable."""
@@ -81,6 +161,7 @@ def WriteKeybindsVariable(value=[]):
     """Overwrites the KEYBINDS variable."""
     global KEYBINDS
     KEYBINDS = value
+    IndexKeybinds()
     
 def GetKeybindFromName(name):
     """Get a keybind from the settings file.
@@ -109,7 +190,115 @@ def SaveKeybind(name, description="", deviceGUID=-1, buttonIndex=-1, axisIndex=-
 
 pygame.init()
 pygame.joystick.init()
-joysticks = [pygame.joystick.Joystick(i) for i in range(pygame.joystick.get_count())]
+joysticks = []
+joysticksByGUID = {}
+"""GUID -> joystick, if there are multiple devices with the same GUID the first one is used."""
+guidByInstance = {}
+"""pygame instance id -> GUID, the joystick events only have the instance id."""
+
+def RefreshJoysticks():
+    """Get the connected joysticks again. Only needed when a device is connected or disconnected."""
+    global joysticks
+    global joysticksByGUID
+    joysticks = [pygame.joystick.Joystick(i) for i in range(pygame.joystick.get_count())]
+    global guidByInstance
+    joysticksByGUID = {}
+    guidByInstance = {}
+    for joystick in joysticks:
+        joysticksByGUID.setdefault(joystick.get_guid(), joystick)
+        guidByInstance[joystick.get_instance_id()] = joystick.get_guid()
+
+RefreshJoysticks()
+
+def ReadKeybind(keybind):
+    """Read the current value of a keybind from the device.
+
+    Returns:
+        float | bool: The axis value, or whether the button / key is pressed.
+    """
+    if keybind["deviceGUID"] == KEYBOARD_GUID:
+        try:
+            return True if keyboard.is_pressed(keybind["buttonIndex"]) else False
+        except:
+            return False
+
+    if keybind["buttonIndex"] == -1 and keybind["axisIndex"] == -1:
+        return False
+
+    joystick = joysticksByGUID.get(keybind["deviceGUID"])
+    if joystick == None:
+        return False
+    try:
+        if keybind["buttonIndex"] != -1:
+            return True if joystick.get_button(keybind["buttonIndex"]) == 1 else False
+        return joystick.get_axis(keybind["axisIndex"])
+    except:
+        return False
+
+keyEvents = queue.SimpleQueue()
+"""(key name, pressed) from the keyboard hook, handled on the next frame."""
+
+def KeyboardHook(event):
+    # Runs on the keyboard module's thread, so the event is only queued here
+    if event.name != None:
+        keyEvents.put((event.name.lower(), event.event_type == keyboard.KEY_DOWN))
+
+keyboardHooked = False
+try:
+    keyboard.hook(KeyboardHook)
+    keyboardHooked = True
+except Exception as ex:
+    print(f"Failed to hook the keyboard, the keys will be checked each frame instead: {ex.args}")
+
+joystickEvents = [pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYAXISMOTION, pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED]
+
+def UpdateInputs():
+    """Handle the input events since the last frame.
+
+    Returns:
+        set: The inputs that changed.
+    """
+    changed = set()
+    if not keyboardHooked:
+        for bound in inputBindings:
+            if bound[0] == "key":
+                try:
+                    keyEvents.put((bound[1], keyboard.is_pressed(bound[1])))
+                except: pass
+    while True:
+        try:
+            name, pressed = keyEvents.get_nowait()
+        except queue.Empty:
+            break
+        # Holding a key down repeats the down event, only the changes matter
+        if inputState.get(("key", name), False) != pressed:
+            inputState[("key", name)] = pressed
+            changed.add(("key", name))
+
+    for event in pygame.event.get(joystickEvents):
+        if event.type == pygame.JOYDEVICEADDED or event.type == pygame.JOYDEVICEREMOVED:
+            RefreshJoysticks()
+            continue
+        guid = guidByInstance.get(event.instance_id)
+        if guid == None:
+            continue
+        if event.type == pygame.JOYAXISMOTION:
+            bound = (guid, "axis", event.axis)
+            inputState[bound] = event.value
+        else:
+            bound = (guid, "button", event.button)
+            inputState[bound] = event.type == pygame.JOYBUTTONDOWN
+        changed.add(bound)
+
+    return changed
+
+def CallKeybind(keybind, callbackName):
+    try:
+        if keybind.get(callbackName) != None:
+            keybind[callbackName]()
+    except Exception as ex:
+        print(f"Keybind {keybind['name']} {callbackName} failed: {ex.args}")
+
 def plugin(data):
     """Handles calling back the keybinds. Should not be called directly.
 
@@ -119,28 +308,32 @@ def plugin(data):
     Returns:
         dict: Data dictionary to main.py
     """
-    pygame.event.pump()
-    for keybind in KEYBINDS:
-        if keybind["callback"] != None:
-            if keybind["deviceGUID"] == KEYBOARD_GUID:
-                try:
-                    if keyboard.is_pressed(keybind["buttonIndex"]):
-                        keybind["callback"]()
-                except:
-                    pass
+    now = time.time()
+    for bound in UpdateInputs():
+        value = inputState[bound]
+        pressed = abs(value) > AXIS_THRESHOLD if bound[1] == "axis" else value
+        for i in inputBindings.get(bound, []):
+            if keybindPressed[i] == pressed:
+                continue
+            keybindPressed[i] = pressed
+            keybind = KEYBINDS[i]
+            if pressed:
+                if now - lastPress[i] < keybind.get("debounce", 0):
+                    debouncedKeybinds.add(i)
+                    continue
+                lastPress[i] = now
+                CallKeybind(keybind, "callback")
+                if keybind.get("holdCallback") != None:
+                    heldKeybinds.add(i)
             else:
-                for joystick in joysticks:
-                    try:
-                        if joystick.get_guid() == keybind["deviceGUID"]:
-                            if keybind["buttonIndex"] != -1:
-                                if joystick.get_button(keybind["buttonIndex"]):
-                                    keybind["callback"]()
-                            elif keybind["axisIndex"] != -1:
-                                if abs(joystick.get_axis(keybind["axisIndex"])) > 0.4:
-                                    keybind["callback"]()
-                    except:
-                        pass
-            pass
+                heldKeybinds.discard(i)
+                if i in debouncedKeybinds:
+                    debouncedKeybinds.discard(i)
+                    continue
+                CallKeybind(keybind, "releaseCallback")
+
+    for i in list(heldKeybinds):
+        CallKeybind(KEYBINDS[i], "holdCallback")
     
     return data
 
@@ -289,14 +482,12 @@ def ChangeKeybind(name:str, updateUI:bool=True, callback=None):
         
     if currentbinding != None:
         SaveKeybind(name, deviceGUID=currentbinding["deviceGUID"], buttonIndex=currentbinding["buttonIndex"] if "buttonIndex" in currentbinding else -1, axisIndex=currentbinding["axisIndex"] if "axisIndex" in currentbinding else -1)
-        KEYBINDS[KEYBINDS.index(next((item for item in KEYBINDS if item["name"] == name), None))] = {"name": name, 
-                                                                                                     "callback": next((item for item in KEYBINDS if item["name"] == name), None)["callback"], 
-                                                                                                     "description": next((item for item in KEYBINDS if item["name"] == name), None)["description"], 
-                                                                                                     "deviceGUID": currentbinding["deviceGUID"], 
-                                                                                                     "buttonIndex": currentbinding["buttonIndex"] if "buttonIndex" in currentbinding else -1, 
-                                                                                                     "axisIndex": currentbinding["axisIndex"] if "axisIndex" in currentbinding else -1,
-                                                                                                     "shouldBeAxis": next((item for item in KEYBINDS if item["name"] == name), None)["shouldBeAxis"],
-                                                                                                     "notBoundInfo": next((item for item in KEYBINDS if item["name"] == name), None)["notBoundInfo"]}
+        index = KEYBINDS.index(next((item for item in KEYBINDS if item["name"] == name), None))
+        KEYBINDS[index] = {**KEYBINDS[index],
+                           "deviceGUID": currentbinding["deviceGUID"], 
+                           "buttonIndex": currentbinding["buttonIndex"] if "buttonIndex" in currentbinding else -1, 
+                           "axisIndex": currentbinding["axisIndex"] if "axisIndex" in currentbinding else -1}
+        IndexKeybinds()
 
         print(f"Saved keybind {name}")
 
@@ -317,21 +508,16 @@ def UnbindKeybind(name, updateUI=True):
         updateUI (bool, optional): Should the UI be updated (should be False if the function is called from other files). Defaults to True.
     """
     SaveKeybind(name, deviceGUID=-1, buttonIndex=-1, axisIndex=-1)
-    KEYBINDS[KEYBINDS.index(next((item for item in KEYBINDS if item["name"] == name), None))] = {"name": name, 
-                                                                                                 "callback": next((item for item in KEYBINDS if item["name"] == name), None)["callback"], 
-                                                                                                 "description": next((item for item in KEYBINDS if item["name"] == name), None)["description"], 
-                                                                                                 "deviceGUID": -1, 
-                                                                                                 "buttonIndex": -1, 
-                                                                                                 "axisIndex": -1,
-                                                                                                 "shouldBeAxis": next((item for item in KEYBINDS if item["name"] == name), None)["shouldBeAxis"],
-                                                                                                 "notBoundInfo": next((item for item in KEYBINDS if item["name"] == name), None)["notBoundInfo"]}
+    index = KEYBINDS.index(next((item for item in KEYBINDS if item["name"] == name), None))
+    KEYBINDS[index] = {**KEYBINDS[index], "deviceGUID": -1, "buttonIndex": -1, "axisIndex": -1}
+    IndexKeybinds()
     if updateUI:
         mainUI.closeTabName("controls")
         mainUI.switchSelectedPlugin("src.controls")
 
 
 def GetKeybindValue(name:str):
-    """Will get the value of a keybind.
+    """Will get the current value of a keybind.
 
     Args:
         name (str): The name of the keybind to fetch.
@@ -339,37 +525,23 @@ def GetKeybindValue(name:str):
     Returns:
         float | bool | str: Depending on whether the keybind is a button, axis or key, the value will be either a float, bool or str.
     """
-    keybind = None
-    for bind in KEYBINDS:
-        if bind["name"] == name:
-            keybind = bind
-            break
-        
-    if keybind == None:
-        return False
-    
-    if keybind["deviceGUID"] == KEYBOARD_GUID:
-        try:
-            return True if keyboard.is_pressed(keybind["buttonIndex"]) else False
-        except:
-            return False
-    
-    if keybind["buttonIndex"] == -1 and keybind["axisIndex"] == -1:
+    index = keybindIndex.get(name)
+    if index == None or index >= len(keybindInputs):
         return False
     
-    pygame.event.pump()
-    joysticks = [pygame.joystick.Joystick(i) for i in range(pygame.joystick.get_count())]
-    try:
-        for joystick in joysticks:
-            if joystick.get_guid() == keybind["deviceGUID"]:
-                if keybind["buttonIndex"] != -1:
-                    return True if joystick.get_button(keybind["buttonIndex"]) == 1 else False
-                elif keybind["axisIndex"] != -1:
-                    return joystick.get_axis(keybind["axisIndex"])
-    except:
+    bound = keybindInputs[index]
+    if bound == None:
         return False
+    if bound in inputState:
+        return inputState[bound]
+    if bound[0] == "key" and keyboardHooked:
+        return False # No events for the key yet, so it hasn't been pressed
     
-    return False
+    # No events for this input yet (for example an axis that hasn't moved), read it from the device
+    value = ReadKeybind(KEYBINDS[index])
+    if bound[0] != "key":
+        inputState[bound] = value
+    return value
 
 class UI():
     try: # The panel is in a try loop so that the logger can log errors if they occur
@@ -8,6 +8,7 @@ import traceback
 import ctypes.wintypes
 from src.logger import print
 from src.server import SendCrashReport
+from src.scsLogReader import logFollower
 
 RED = "\033[91m"
 NORMAL = "\033[0m"
@@ -294,6 +295,19 @@ def ReadGlobalConfigFile(game="automatic"):
         print("Error in gamefiles.py: ReadGlobalConfigFile" + str(e))
 
     
+logFollowers = {}
+"""path -> [logFollower, lines read so far], so the game log is only read once."""
+
+def ReadFollowedLog(path):
+    if path not in logFollowers:
+        logFollowers[path] = [logFollower(path), []]
+    follower, lines = logFollowers[path]
+    newLines, restarted = follower.Poll()
+    if restarted:
+        lines.clear()
+    lines.extend(newLines)
+    return "".join(lines) + follower.partial.decode("utf-8", errors="replace")
+
 def ReadGameLogFile(game="automatic"):
     '''
     Reads the game log of the selected game.
@@ -316,16 +330,14 @@ def ReadGameLogFile(game="automatic"):
 
             if game == "ets2":
                 if os.path.exists(ETS2_DOCUMENTS_PATH + "/game.log.txt"):
-                    with open(f"{ETS2_DOCUMENTS_PATH}/game.log.txt", "r") as file:
-                        return file.read()
+                    return ReadFollowedLog(f"{ETS2_DOCUMENTS_PATH}/game.log.txt")
                 else:
                     print(RED + "No game log file in documents found, unable to read file." + NORMAL)
                     return None
 
             if game == "ats":
                 if os.path.exists(ATS_DOCUMENTS_PATH + "/game.log.txt"):
-                    with open(f"{ATS_DOCUMENTS_PATH}/game.log.txt", "r") as file:
-                        return file.read()
+                    return ReadFollowedLog(f"{ATS_DOCUMENTS_PATH}/game.log.txt")
                 else:
                     print(RED + "No game log file in documents found, unable to read file." + NORMAL)
                     return None
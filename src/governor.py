@@ -0,0 +1,162 @@
+"""
+Keeps slow plugins from slowing down the whole mainloop.
+
+Each plugin has a maxExecTime in its PluginInformation (ms, 0 = no limit). The governor keeps a rolling
+estimate of how long each plugin takes. When the estimate goes over the plugin's maxExecTime the plugin
+is run in the background instead, and the mainloop keeps using the data from its last finished run.
+If a frame budget is set, plugins that would push the frame over it are skipped for that frame.
+
+Running in the background is opt-in. Only plugins that set threadSafe=True and declare their writes in
+their PluginInformation are moved to a background thread, the others (anything that uses tkinter or OpenCV
+windows in its plugin function) are always run on the calling thread, and can at most be skipped to stay
+in the frame budget. The background run gets its own deep copy of the keys in writes, and only those keys
+are used from its result, so it never changes the values the mainloop is still using.
+
+Main functions:
+```python
+# Maximum frame time in ms before plugins with a maxExecTime are skipped (0 = disabled).
+settings.GetSettings("Main Loop", "frameBudget", 0)
+
+data = governor.Run(plugin, data, RunPlugin)
+data["executionTimes"]["TrafficLightDetection skipped"] # How many frames the plugin has been skipped.
+```
+
+Plugins that the rest of the app can't work without (the APIs, screen capture, steering, controllers,
+warnings...) set maxExecTime=0, so that they are always run and never skipped.
+"""
+from src.logger import print
+import threading
+import copy
+import time
+
+def TopLevel(data):
+    return {key: id(value) for key, value in data.items()}
+
+def Changed(before, data):
+    """Get the top level values that were set since before = TopLevel(data) was taken."""
+    return {key: value for key, value in data.items() if key != "executionTimes" and before.get(key) != id(value)}
+
+def FrameTime(data):
+    """Time spent on the current frame so far, in seconds."""
+    frameTime = 0
+    for value in data["executionTimes"].values():
+        # Counters are stored as ints, only the floats are times
+        if type(value) == float:
+            frameTime += value
+    return frameTime
+
+class pluginState:
+    def __init__(self):
+        self.estimate = None
+        """Rolling estimate of the execution time in seconds."""
+        self.runs = 0
+        self.lastWrites = {}
+        """The top level values the plugin set during its last finished run."""
+        self.skips = 0
+        self.thread = None
+        self.asyncWrites = {}
+        self.asyncTime = 0
+
+class frameGovernor:
+    """Decides if each plugin is run normally, in the background or skipped.
+
+    Args:
+        smoothing (float, optional): How much each run moves the estimate (0-1). Defaults to 0.2.
+    """
+    def __init__(self, smoothing=0.2):
+        self.smoothing = smoothing
+        self.frameBudget = 0
+        """Maximum frame time in seconds, 0 to disable."""
+        self.states = {}
+
+    def Record(self, state, executionTime):
+        # The first run usually loads models etc. so it's not counted
+        state.runs += 1
+        if state.runs == 1:
+            return
+        if state.estimate == None:
+            state.estimate = executionTime
+        else:
+            state.estimate += (executionTime - state.estimate) * self.smoothing
+
+    def Reuse(self, state, data):
+        """Fill in the values from the plugin's last finished run. Values other plugins have
+        already set this frame are kept."""
+        for key, value in state.lastWrites.items():
+            if key not in data:
+                data[key] = value
+            elif type(value) == dict and type(data[key]) == dict and data[key] is not value:
+                data[key] = {**value, **data[key]}
+        return data
+
+    def RunAsync(self, plugin, data, runPlugin, state):
+        # The plugin gets its own copy of the values it writes, so it doesn't change the frames that are running
+        writes = [key for key in plugin.PluginInfo.writes if key not in ["last", "executionTimes"]]
+        asyncData = dict(data)
+        asyncData["executionTimes"] = {}
+        for key in writes:
+            if key in asyncData:
+                asyncData[key] = copy.deepcopy(asyncData[key])
+
+        def AsyncThread():
+            start = time.time()
+            result = runPlugin(plugin, asyncData)
+            state.asyncTime = time.time() - start
+            state.asyncWrites = {key: result[key] for key in writes if key in result}
+
+        state.thread = threading.Thread(target=AsyncThread, name=f"Async {plugin.PluginInfo.name}", daemon=True)
+        state.thread.start()
+
+    def Run(self, plugin, data, runPlugin):
+        """Run, skip or start a background run of a plugin.
+
+        Args:
+            plugin (module): The plugin.
+            data (dict): The data variable.
+            runPlugin (function): Called as runPlugin(plugin, data), should return the data.
+
+        Returns:
+            dict: The data variable.
+        """
+        info = plugin.PluginInfo
+        limit = (info.maxExecTime or 0) / 1000
+        if limit <= 0:
+            return runPlugin(plugin, data)
+
+        if info.name not in self.states:
+            self.states[info.name] = pluginState()
+        state = self.states[info.name]
+
+        # Collect the result of a finished background run
+        if state.thread != None and not state.thread.is_alive():
+            state.thread = None
+            state.lastWrites = state.asyncWrites
+            self.Record(state, state.asyncTime)
+            if state.estimate != None and state.estimate <= limit:
+                print(f"{info.name} is back under its {info.maxExecTime}ms limit, running it normally again.")
+
+        # Plugins that aren't thread safe are never moved to the background, only skipped when over the budget
+        canRunAsync = info.threadSafe and info.writes != None
+        overLimit = canRunAsync and state.estimate != None and state.estimate > limit
+        overBudget = self.frameBudget > 0 and state.estimate != None and FrameTime(data) + state.estimate > self.frameBudget
+
+        if not overLimit and not overBudget and state.thread == None:
+            before = TopLevel(data)
+            start = time.time()
+            data = runPlugin(plugin, data)
+            self.Record(state, time.time() - start)
+            if canRunAsync:
+                # Also catches the values the plugin changed in place (data["sdk"]["steering"] = ...)
+                state.lastWrites = {key: data[key] for key in info.writes if key in data and key not in ["last", "executionTimes"]}
+            else:
+                state.lastWrites = Changed(before, data)
+            if canRunAsync and state.estimate != None and state.estimate > limit:
+                print(f"{info.name} took {round(state.estimate * 1000)}ms (limit {info.maxExecTime}ms), running it in the background.")
+            return data
+
+        if overLimit and state.thread == None:
+            self.RunAsync(plugin, data, runPlugin, state)
+
+        state.skips += 1
+        data["executionTimes"][f"{info.name} skipped"] = state.skips
+        return self.Reuse(state, data)
@@ -0,0 +1,195 @@
+"""
+Runs model inference on a background thread, so the main loop doesn't have to wait for it.
+
+Each model has a name, and only the newest input of each model is kept. If a new frame is submitted
+before the worker has started on the last one, the last one is dropped. The plugins keep using the
+newest finished result until the next one is done, together with the frameSequence it was made from.
+
+```python
+# Enabled by default, when disabled the models are run right away on the calling thread.
+settings.GetSettings("Main Loop", "asyncInference", True)
+
+result, sequence = inferenceService.Infer("MyModel", RunModel, frame, data.get("frameSequence"))
+if result == None: # Nothing has finished yet
+    return data
+
+# Results that finished more than a second ago are not used (for example after the plugin was paused)
+result, sequence = inferenceService.Infer("MyModel", RunModel, frame, data.get("frameSequence"), maxAge=1)
+
+# Drop the pending input and the result, call this when the plugin stops using the model
+inferenceService.Forget("MyModel")
+```
+"""
+from src.logger import print
+import src.settings as settings
+import threading
+import time
+
+class inferenceWorker:
+    """Runs the submitted inputs on background threads, newest input per model first.
+
+    Args:
+        threads (int, optional): How many models can be run at the same time. Defaults to 1.
+    """
+    def __init__(self, threads=1):
+        self.threadCount = threads
+        self.threads = []
+        self.pending = {}
+        """name -> (function, input, sequence, submit time, generation) of the inputs that haven't been started."""
+        self.order = []
+        """Names with a pending input, in the order they were submitted."""
+        self.busy = set()
+        """Names that are being run right now, a model is never run twice at the same time."""
+        self.results = {}
+        """name -> (result, sequence, time it finished)"""
+        self.drops = {}
+        """name -> how many inputs were replaced before they were started."""
+        self.generations = {}
+        """name -> how many times the model has been forgotten, results of inputs from before that are discarded."""
+        self.condition = threading.Condition()
+
+    def Start(self):
+        while len(self.threads) < self.threadCount:
+            thread = threading.Thread(target=self.WorkerThread, name=f"Inference {len(self.threads)}", daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    def Submit(self, name:str, function, input, sequence:int=None):
+        """Queue an input for a model. If the model already has an input waiting it's replaced.
+
+        Args:
+            name (str): Name of the model.
+            function (function): Called as function(input) on the worker thread, the return value is the result.
+            input (any): The input, it shouldn't be changed after submitting it.
+            sequence (int, optional): The frameSequence of the input. Defaults to None.
+        """
+        with self.condition:
+            if name in self.pending:
+                self.drops[name] = self.drops.get(name, 0) + 1
+            else:
+                self.order.append(name)
+            self.pending[name] = (function, input, sequence, time.time(), self.generations.get(name, 0))
+            self.condition.notify()
+        self.Start()
+
+    def Latest(self, name:str):
+        """Get the newest finished result of a model.
+
+        Returns:
+            tuple: (result, sequence, time it finished), (None, None, 0) if nothing has finished yet.
+        """
+        return self.results.get(name, (None, None, 0))
+
+    def Running(self, name:str):
+        """Check if a model has an input waiting or being run.
+
+        Returns:
+            bool: False once the last submitted input is done (or failed).
+        """
+        with self.condition:
+            return name in self.pending or name in self.busy
+
+    def Wait(self, name:str, sequence:int, timeout:float=None):
+        """Wait for the result of an input to finish.
+
+        Args:
+            name (str): Name of the model.
+            sequence (int): The sequence the input was submitted with.
+            timeout (float, optional): How long to wait. Defaults to forever.
+
+        Returns:
+            tuple: Same as Latest(), it can still be older if the input was dropped or the timeout ran out.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.results.get(name, (None, None, 0))[1] == sequence or (name not in self.pending and name not in self.busy), timeout)
+            return self.Latest(name)
+
+    def Forget(self, name:str):
+        """Remove the pending input and the result of a model. An input that is being run
+        right now is finished, but its result is thrown away."""
+        with self.condition:
+            if name in self.pending:
+                del self.pending[name]
+                self.order.remove(name)
+            self.results.pop(name, None)
+            self.generations[name] = self.generations.get(name, 0) + 1
+            self.condition.notify_all()
+
+    def Store(self, name:str, result, sequence:int, generation:int):
+        """Save a finished result, unless the model was forgotten after the input was submitted."""
+        with self.condition:
+            if generation == self.generations.get(name, 0):
+                self.results[name] = (result, sequence, time.time())
+
+    def Next(self):
+        for name in self.order:
+            if name not in self.busy:
+                self.order.remove(name)
+                self.busy.add(name)
+                return name, self.pending.pop(name)
+        return None
+
+    def WorkerThread(self):
+        while True:
+            with self.condition:
+                request = self.Next()
+                while request == None:
+                    self.condition.wait()
+                    request = self.Next()
+
+            name, (function, input, sequence, submitted, generation) = request
+            try:
+                result = function(input)
+                self.Store(name, result, sequence, generation)
+            except Exception as ex:
+                print(f"Inference of {name} failed: {ex.args}")
+
+            with self.condition:
+                self.busy.discard(name)
+                self.condition.notify_all()
+
+worker = inferenceWorker()
+
+def Submit(name:str, function, input, sequence:int=None):
+    """Queue an input for a model, see inferenceWorker.Submit()."""
+    worker.Submit(name, function, input, sequence)
+
+def Latest(name:str):
+    """Get the newest finished result of a model, see inferenceWorker.Latest()."""
+    return worker.Latest(name)
+
+def Running(name:str):
+    """Check if a model has an input waiting or being run, see inferenceWorker.Running()."""
+    return worker.Running(name)
+
+def Forget(name:str):
+    worker.Forget(name)
+
+def Infer(name:str, function, input, sequence:int=None, maxAge:float=None):
+    """Run a model on the newest input.
+
+    With asyncInference (the default) the input is queued and the newest finished result is returned
+    right away, it can be from an older frame (or None before the first one has finished). Otherwise the
+    model is run right away.
+
+    Args:
+        name (str): Name of the model.
+        function (function): Called as function(input), the return value is the result.
+        input (any): The input, it shouldn't be changed after calling this.
+        sequence (int, optional): The frameSequence of the input. Defaults to None.
+        maxAge (float, optional): Results that finished more than this many seconds ago are returned as None. Defaults to no limit.
+
+    Returns:
+        tuple: (result, sequence of the frame the result is from)
+    """
+    if settings.GetSettings("Main Loop", "asyncInference", True):
+        worker.Submit(name, function, input, sequence)
+        result, resultSequence, finished = worker.Latest(name)
+        if maxAge != None and time.time() - finished > maxAge:
+            return None, None
+        return result, resultSequence
+
+    result = function(input)
+    # Keeps Latest() working, with the lock so it doesn't race a worker that is still running an older input
+    worker.Store(name, result, sequence, worker.generations.get(name, 0))
+    return result, sequence
@@ -2,6 +2,11 @@
 
 Logger, will replace the default "print" command with a custom one that will also log to a file.
 
+The messages are written to the console and the file by a background thread, so printing
+doesn't slow down the mainloop. If the same line prints more than `rateLimit` messages per
+second the rest are dropped, and the amount of dropped messages is shown with the next message
+from that line.
+
 Usage:
 ```
 from src.logger import print
@@ -10,9 +15,12 @@ print("Something just happened!")
 """
 
 import time
-import sys, inspect
+import sys
 import os
 import traceback
+import threading
+import atexit
+import queue
 import colorama
 
 printDebug = False
@@ -24,13 +32,27 @@ NORMAL = "\033[0m"
 BLUE = "\033[94m"
 RED = "\033[91m"
 
+logFile = "log.txt"
+maxLogSize = 10000000
+"""When the log file goes over this size (10mb) it's moved to log.1.txt and a new one is started."""
+rateLimit = 10
+"""Maximum amount of messages per second from a single line of code."""
+
 start = time.time()
 lastMsg = ""
 times = 0
 
+records = queue.Queue()
+"""(timestamp, caller, text, end) of the messages that haven't been written yet. Each one is marked done
+once it's written, so Flush() knows when everything is out."""
+callers = {}
+"""filename -> formatted caller, so each file is only formatted once."""
+rates = {}
+"""(filename, line) -> [window start, messages in the window, suppressed messages]"""
+
 # Clear the log file
 try:
-    with open("log.txt", "w") as f:
+    with open(logFile, "w") as f:
         f.truncate(0)
         f.write("")
 except:
@@ -41,87 +63,164 @@ colorama.init()
 
 startTime = time.time()
 
-def print(text:str, end:str=""):
-    """Standard print function that will add the time and the caller to the message and log it to a file.
+def FormatCaller(filename):
+    separator = "\\" if sys.platform == "win32" else "/"
+    if "plugins" in filename or "src" in filename:
+        return GREEN + filename.split(separator)[-2] + YELLOW + separator + filename.split(separator)[-1] + NORMAL
+    return YELLOW + filename.split(separator)[-1] + NORMAL
 
-    Args:
-        text (str): Text to print and log.
-        end (str, optional): Defaults to "".
+def FormatTime(timestamp):
+    timestr = str(round(timestamp - startTime, 3))
+    while len(timestr.split(".")[1]) < 3:
+        timestr += "0"
+    return BLUE + timestr + NORMAL
+
+def RemoveColors(message):
+    return message.replace(GREEN, "").replace(YELLOW, "").replace(NORMAL, "").replace(BLUE, "").replace(RED, "")
+
+def RotateLog(file):
+    """Move the full log file to log.1.txt and start a new one.
+
+    Returns:
+        file: The new log file.
+    """
+    file.close()
+    backup = logFile.replace(".txt", ".1.txt")
+    try:
+        os.replace(logFile, backup)
+    except:
+        pass
+    file = open(logFile, "a")
+    file.write(f"[Older messages are in {backup}]\n")
+    return file
 
-    Raises:
-        Exception: The log file is too big (>10mb).
+def WriteRecords(batch, file):
+    """Write a batch of messages to the console and the file.
+
+    Returns:
+        file: The log file (a new one if it was rotated).
     """
     global lastMsg
     global times
-    
-    timestr = str(round(time.time() - startTime, 3))
-    while len(timestr.split(".")[1]) < 3:
-        timestr += "0"
-    date = BLUE + timestr + NORMAL
-    
-    if sys.platform == "win32":
-        caller = inspect.stack()[1].filename
-        if "plugins" in caller or "src" in caller:
-            caller = GREEN + caller.split("\\")[-2] + YELLOW + "\\" + caller.split("\\")[-1] + NORMAL
-        else:
-            caller = YELLOW + caller.split("\\")[-1] + NORMAL  
-    else:
-        caller = inspect.stack()[1].filename
-        if "plugins" in caller or "src" in caller:
-            caller = GREEN + caller.split("/")[-2] + YELLOW + "/" + caller.split("/")[-1] + NORMAL
-        else:
-            caller = YELLOW + caller.split("/")[-1] + NORMAL  
-    
-    
-    message = f"[{caller}]\t- {text}\n"
-    
-
-    if message == lastMsg:
-        times += 1
-        sys.stdout.write(f"[{date}] [-> {times}]\r")
-        return
-    else:
+
+    consoleText = ""
+    fileText = ""
+    for timestamp, caller, text, end in batch:
+        date = FormatTime(timestamp)
+        message = f"[{caller}]\t- {text}\n"
+
+        if message == lastMsg:
+            times += 1
+            consoleText += f"[{date}] [-> {times}]\r"
+            continue
+
         if times > 0:
-            with open("log.txt", "a") as f:
-                f.write("[-> {}]".format(times))
+            fileText += "[-> {}]".format(times)
         times = 0
         lastMsg = message
-        message = f"[{date}] " + message 
-    
-    # Make sure the file is not too big
+        message = f"[{date}] " + message
+
+        consoleText += message + end
+        # Remove the color tags from the message so that the file is easier to read
+        fileText += RemoveColors(message)
+
     try:
-        if not os.path.exists("log.txt"):
-            with open("log.txt", "w") as f:
-                f.close()
-                
-        size = os.path.getsize("log.txt")
-        # 10MB
-        if size > 10000000:
-            sys.stdout.write(message + RED + "[ERROR] The log file is too big! (10mb) Saving paused! Please rerun the app!\n")
-            raise Exception("Usually you have a problem if the log file is this big!")
-        
-        try:
-            with open("log.txt", "a") as f:
-                fileMessage = message
-                # Remove the color tags from the message so that the file is easier to read
-                fileMessage = fileMessage.replace(GREEN, "").replace(YELLOW, "").replace(NORMAL, "").replace(BLUE, "").replace(RED, "")
-                f.write(fileMessage)
-        except:
-            pass
+        if file == None or file.closed:
+            file = open(logFile, "a")
+        file.write(fileText)
+        file.flush()
+        if file.tell() > maxLogSize:
+            file = RotateLog(file)
     except:
-        try:
-            # Check if the file exists
-            if not os.path.exists("log.txt"):
-                with open("log.txt", "w") as f:
-                    f.write("")
-        except:
-            pass
-    
+        pass
+
     # Can't use print() because it will cause an infinite loop
-    sys.stdout.write(message + end)
+    sys.stdout.write(consoleText)
+    sys.stdout.flush()
+    return file
+
+def WriterThread():
+    file = None
+    while True:
+        # Wait for a message, then take everything that has been queued since
+        batch = [records.get()]
+        while True:
+            try:
+                batch.append(records.get_nowait())
+            except queue.Empty:
+                break
+
+        try:
+            file = WriteRecords(batch, file)
+        except Exception as ex:
+            sys.stdout.write(f"[{RED}ERROR{NORMAL}] [{YELLOW}logger.py{NORMAL}] - Failed to write messages: {ex.args}\n")
+        for record in batch:
+            records.task_done()
+
+def Flush(timeout=1):
+    """Wait for the queued messages to be written.
+
+    Args:
+        timeout (float, optional): Maximum time to wait. Defaults to 1.
+    """
+    end = time.time() + timeout
+    # Same as records.join(), but with a timeout. The count only goes to 0 after the last batch is written.
+    with records.all_tasks_done:
+        while records.unfinished_tasks > 0 and time.time() < end:
+            records.all_tasks_done.wait(end - time.time())
+
+atexit.register(Flush)
+
+writerThread = threading.Thread(target=WriterThread, name="Logger", daemon=True)
+writerThread.start()
+
+def RateLimited(filename, line, timestamp):
+    """Check if a line of code has printed too many messages during the last second.
+
+    Returns:
+        int | None: None if the message should be dropped, otherwise the amount of messages
+            that were dropped before it.
+    """
+    key = (filename, line)
+    rate = rates.get(key)
+    if rate == None or timestamp - rate[0] > 1:
+        suppressed = rate[2] if rate != None else 0
+        rates[key] = [timestamp, 1, 0]
+        return suppressed
+
+    rate[1] += 1
+    if rate[1] > rateLimit:
+        rate[2] += 1
+        return None
+    return 0
+
+def print(text:str, end:str=""):
+    """Standard print function that will add the time and the caller to the message and log it to a file.
+    The message is written in the background.
+
+    Args:
+        text (str): Text to print and log.
+        end (str, optional): Defaults to "".
+    """
+    timestamp = time.time()
+    frame = sys._getframe(1)
+    filename = frame.f_code.co_filename
+
+    suppressed = RateLimited(filename, frame.f_lineno, timestamp)
+    if suppressed == None:
+        return
+
+    caller = callers.get(filename)
+    if caller == None:
+        caller = FormatCaller(filename)
+        callers[filename] = caller
+
+    if suppressed > 0:
+        records.put((timestamp, caller, f"[{suppressed} messages from line {frame.f_lineno} were not shown]", ""))
+    records.put((timestamp, caller, str(text), end))
+
     if printDebug:
         traceback.print_exc()
-    
-    
+
+
 print("Logger initialized!")
-        
@@ -0,0 +1,217 @@
+"""
+Opt-in pipelined version of the main loop.
+
+Normally every stage of the main loop runs one after the other, so capturing frame N has to wait
+for frame N-1's controller and UI. When pipelining is enabled the capture, detection and controller
+stages each run on their own thread. The stages are connected by single slot queues that only keep
+the newest frame, so a slow stage drops frames instead of building up a backlog, and the frame rate
+is limited by the slowest stage instead of the sum of all of them. The UI and the "before UI" and
+"last" plugins still run on the main thread.
+
+Tkinter and OpenCV windows can only be used from the main thread, so the stages only run plugins
+that set threadSafe=True in their PluginInformation. Those plugins must not touch the UI in their
+plugin function, or do it through helpers.RunInMainThread. If any enabled plugin in the stages is
+not thread safe the main loop falls back to running them one after the other (see UnsafePlugins).
+
+Main functions:
+```python
+# Enabled with this setting, needs a restart to apply.
+settings.GetSettings("Main Loop", "pipelined", False)
+
+data["pipeline"]["capture"]["latency"] # Seconds from the frame being queued to the stage being done.
+data["pipeline"]["latency"] # Seconds from the frame being started to all stages being done.
+data["executionTimes"]["Pipeline capture drops"] # How many frames the stage has dropped.
+```
+
+With pipelining data["last"] is the newest frame that had gone through all the stages when
+the current frame was started, so it can be a couple of frames old.
+"""
+from src.logger import print
+import threading
+import time
+
+defaultStages = [
+    ("capture", ["before image capture", "image capture"]),
+    ("detection", ["before lane detection", "lane detection"]),
+    ("controller", ["before controller", "controller", "before game", "game"]),
+]
+"""(name, dynamicOrders) of each stage, in the order they are run."""
+
+def UnsafePlugins(plugins, stages=defaultStages):
+    """Find the plugins that would run on the pipeline threads but are not thread safe.
+
+    Args:
+        plugins (list): The enabled plugin modules.
+        stages (list, optional): (name, dynamicOrders) of each stage. Defaults to defaultStages.
+
+    Returns:
+        list[str]: Names of the plugins, the pipeline can only be used when this is empty.
+    """
+    orders = [order for name, stageOrders in stages for order in stageOrders]
+    return [plugin.PluginInfo.name for plugin in plugins
+            if plugin.PluginInfo.dynamicOrder in orders and not plugin.PluginInfo.threadSafe]
+
+class latestSlot:
+    """A queue that only holds one item. Putting a new item replaces the old one."""
+    def __init__(self):
+        self.item = None
+        self.condition = threading.Condition()
+        self.drops = 0
+        """How many items have been replaced before anyone got them."""
+
+    def Put(self, item):
+        with self.condition:
+            if self.item is not None:
+                self.drops += 1
+            self.item = item
+            self.condition.notify_all()
+
+    def Get(self, timeout=None):
+        """Take the item out of the slot.
+
+        Args:
+            timeout (float, optional): How long to wait for an item. Defaults to forever.
+
+        Returns:
+            any: The item, or None if there was none in time.
+        """
+        with self.condition:
+            if self.item is None:
+                self.condition.wait(timeout)
+            item = self.item
+            self.item = None
+            self.condition.notify_all()
+            return item
+
+    def WaitEmpty(self, timeout=None):
+        """Wait for someone to take the item out of the slot.
+
+        Args:
+            timeout (float, optional): How long to wait. Defaults to forever.
+
+        Returns:
+            bool: Whether the slot is empty.
+        """
+        with self.condition:
+            if self.item is not None:
+                self.condition.wait(timeout)
+            return self.item is None
+
+    def Empty(self):
+        return self.item is None
+
+class pipelineStage:
+    """Runs a group of dynamicOrders on its own thread.
+
+    Args:
+        name (str): Name of the stage.
+        orders (list[str]): The dynamicOrders to run, in order.
+        inSlot (latestSlot): Where the frames come from.
+        outSlot (latestSlot): Where the finished frames go.
+        updatePlugins (function): Called as updatePlugins(dynamicOrder, data) for each order.
+    """
+    def __init__(self, name, orders, inSlot, outSlot, updatePlugins):
+        self.name = name
+        self.orders = orders
+        self.inSlot = inSlot
+        self.outSlot = outSlot
+        self.updatePlugins = updatePlugins
+        self.running = False
+        self.busy = False
+        self.thread = None
+
+    def Start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.StageThread, name=f"Pipeline {self.name}", daemon=True)
+        self.thread.start()
+
+    def Stop(self):
+        self.running = False
+        if self.thread != None:
+            self.thread.join(1)
+            self.thread = None
+
+    def StageThread(self):
+        while self.running:
+            data = self.inSlot.Get(timeout=0.1)
+            if data is None:
+                continue
+
+            self.busy = True
+            try:
+                for order in self.orders:
+                    data = self.updatePlugins(order, data)
+
+                end = time.time()
+                data["pipeline"][self.name] = {"latency": end - data["pipeline"]["queued"]}
+                data["pipeline"]["queued"] = end
+                data["executionTimes"][f"Pipeline {self.name} drops"] = self.inSlot.drops
+                self.outSlot.Put(data)
+            except Exception as ex:
+                print(f"Pipeline stage {self.name} failed: {ex.args}")
+            self.busy = False
+
+class pipeline:
+    """The capture -> detection -> controller pipeline.
+
+    Args:
+        updatePlugins (function): Called as updatePlugins(dynamicOrder, data) for each stage.
+        stages (list, optional): (name, dynamicOrders) of each stage. Defaults to defaultStages.
+    """
+    def __init__(self, updatePlugins, stages=defaultStages):
+        self.slots = [latestSlot() for i in range(len(stages) + 1)]
+        self.stages = [pipelineStage(name, orders, self.slots[i], self.slots[i + 1], updatePlugins) for i, (name, orders) in enumerate(stages)]
+
+    def Start(self):
+        for stage in self.stages:
+            stage.Start()
+        print(f"Started the pipelined main loop ({', '.join(stage.name for stage in self.stages)})")
+
+    def Stop(self):
+        for stage in self.stages:
+            stage.Stop()
+
+    def Submit(self, data, timeout=0.1):
+        """Start a new frame. Waits for the first stage to pick up the previous frame,
+        so new frames are started as fast as the first stage can take them.
+
+        Args:
+            data (dict): The frame's data.
+            timeout (float, optional): How long to wait for the first stage, after this the
+                previous frame is dropped. Defaults to 0.1.
+        """
+        self.slots[0].WaitEmpty(timeout)
+        now = time.time()
+        data["pipeline"] = {"start": now, "queued": now}
+        self.slots[0].Put(data)
+
+    def Collect(self, timeout=0):
+        """Get the newest frame that has gone through all the stages.
+
+        Args:
+            timeout (float, optional): How long to wait for a frame. Defaults to not waiting.
+
+        Returns:
+            dict | None: The frame's data, or None if no frame was finished in time.
+        """
+        data = self.slots[-1].Get(timeout)
+        if data is None:
+            return None
+
+        data["pipeline"]["latency"] = time.time() - data["pipeline"]["start"]
+        return data
+
+    def Idle(self):
+        return all(slot.Empty() for slot in self.slots[:-1]) and not any(stage.busy for stage in self.stages)
+
+    def WaitIdle(self, timeout=2):
+        """Wait for the frames that are in the pipeline to finish. Used before reloading plugins.
+        The finished frame is discarded.
+
+        Args:
+            timeout (float, optional): Maximum time to wait. Defaults to 2.
+        """
+        end = time.time() + timeout
+        while not self.Idle() and time.time() < end:
+            time.sleep(0.01)
+        self.slots[-1].Get(0)
@@ -0,0 +1,133 @@
+"""
+Plans the order the dynamic plugins are run in each frame.
+
+The plan is built once when the plugins are loaded (and again when plugins are enabled or disabled),
+so the mainloop doesn't have to go through all plugins for each dynamicOrder every frame.
+
+Inside each dynamicOrder the plugins are split into batches using the data keys they declare in
+their PluginInformation (reads / writes). Plugins in the same batch don't touch each other's data,
+so they can be run at the same time. Plugins that don't declare their data keys are always run on
+their own, in the same order as before. Only plugins that set threadSafe=True are given to the
+thread pool, the others in the batch are run on the calling thread while the pool works.
+
+Main functions:
+```python
+# Run the plugins in the same batch at the same time (defaults to False).
+settings.GetSettings("Main Loop", "parallelPlugins", False)
+
+scheduler.Plan(pluginObjects)
+data = scheduler.Run("lane detection", data, RunPlugin)
+```
+"""
+from src.logger import print
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+ignoredKeys = ["last", "executionTimes"]
+"""Keys that don't create dependencies. "last" is only read, and each plugin has its own executionTimes entry."""
+
+def Conflicts(first, second):
+    """Check if two plugins have to be run one after the other.
+
+    Args:
+        first (PluginInformation): The plugin that runs first.
+        second (PluginInformation): The plugin that runs second.
+
+    Returns:
+        bool: True if the plugins touch the same data.
+    """
+    if first.reads == None or first.writes == None or second.reads == None or second.writes == None:
+        return True
+
+    firstWrites = set(first.writes) - set(ignoredKeys)
+    secondWrites = set(second.writes) - set(ignoredKeys)
+    if firstWrites & (set(second.reads) | secondWrites):
+        return True
+    if secondWrites & set(first.reads):
+        return True
+    return False
+
+class pluginScheduler:
+    """Keeps the plan of which plugins are run in each dynamicOrder, and in which batches.
+
+    Args:
+        maxWorkers (int, optional): Maximum amount of plugins to run at the same time. Defaults to 4.
+    """
+    def __init__(self, maxWorkers=4):
+        self.maxWorkers = maxWorkers
+        self.parallel = False
+        self.pool = None
+        self.poolLock = threading.Lock()
+        """The pipeline stage threads can call Run() at the same time."""
+        self.plan = {}
+        """dynamicOrder -> list of batches, each batch is a list of plugins that can run at the same time."""
+
+    def Plan(self, pluginObjects):
+        """Build the plan for the given plugins. Plugins are kept in the given order unless they can run in parallel.
+
+        Args:
+            pluginObjects (list): The enabled plugin modules.
+        """
+        plan = {}
+        levels = {}
+        for plugin in pluginObjects:
+            order = plugin.PluginInfo.dynamicOrder
+            if order not in plan:
+                plan[order] = []
+                levels[order] = []
+
+            # Run after every earlier plugin that touches the same data
+            level = 0
+            for other, otherLevel in levels[order]:
+                if Conflicts(other.PluginInfo, plugin.PluginInfo):
+                    level = max(level, otherLevel + 1)
+
+            levels[order].append((plugin, level))
+            while len(plan[order]) <= level:
+                plan[order].append([])
+            plan[order][level].append(plugin)
+
+        self.plan = plan
+        parallelBatches = [batch for batches in plan.values() for batch in batches if len(batch) > 1]
+        if parallelBatches != []:
+            print(f"Plugins that can run in parallel: {', '.join(' + '.join(plugin.PluginInfo.name for plugin in batch) for batch in parallelBatches)}")
+
+    def Run(self, dynamicOrder, data, runPlugin):
+        """Run all plugins of a dynamicOrder.
+
+        Args:
+            dynamicOrder (str): Which plugins to run.
+            data (dict): The data variable.
+            runPlugin (function): Called as runPlugin(plugin, data), should return the data.
+
+        Returns:
+            dict: The data variable.
+        """
+        for batch in self.plan.get(dynamicOrder, []):
+            if len(batch) == 1 or not self.parallel:
+                for plugin in batch:
+                    data = runPlugin(plugin, data)
+                continue
+
+            # Plugins that use tkinter or OpenCV windows have to stay on this thread
+            local = [plugin for plugin in batch if not plugin.PluginInfo.threadSafe]
+            pooled = [plugin for plugin in batch if plugin.PluginInfo.threadSafe]
+            if local == []:
+                # The first plugin runs on this thread, the rest in the pool
+                local, pooled = pooled[:1], pooled[1:]
+            if pooled == []:
+                for plugin in batch:
+                    data = runPlugin(plugin, data)
+                continue
+
+            with self.poolLock:
+                if self.pool == None:
+                    self.pool = ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix="Plugin")
+
+            futures = [self.pool.submit(runPlugin, plugin, data) for plugin in pooled]
+            results = [runPlugin(plugin, data) for plugin in local] + [future.result() for future in futures]
+            for result in results:
+                if result is not data and result is not None:
+                    data.update(result)
+
+        return data
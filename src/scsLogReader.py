@@ -1,42 +1,202 @@
-"""This module is used to listen to the log file from ETS2 / ATS, it will then return the data to the main program."""
+"""This module is used to listen to the log file from ETS2 / ATS, it will then return the data to the main program.
+
+The log file is followed like `tail -f`, only the lines added since the last check are read,
+and the checks are only done every `pollInterval` seconds.
+
+Plugins can subscribe to log lines with a regex, the matching lines are given to them as events:
+```python
+scsLogReader.Subscribe("sdk", r"\[sdk\] (?P<message>.*)")
+
+for event in data["logEvents"]: # The events found since the last frame
+    event["name"] # "sdk"
+    event["line"] # The full log line
+    event["groups"] # {"message": "..."}, the named groups (always a dict, empty without named groups)
+    event["values"] # ("...",), all groups by number (always a tuple)
+```
+"""
 import src.variables as variables
 import src.helpers as helpers
 from src.logger import print
-import hashlib
+import time
+import re
+import os
 
 ets2FilePath = "C:/Users/" + variables.USERNAME + "/Documents/Euro Truck Simulator 2/game.log.txt"
-currentFileHash = None
+pollInterval = 0.5
+"""Seconds between checks for new lines."""
 currentLines = []
 hasShownCrackError = False
 
-def CheckForCrackedGame(data):
+class logFollower:
+    """Reads the lines that are added to a log file. If the file is replaced or gets
+    smaller (the game was restarted) it's read again from the start.
+
+    Args:
+        path (str): Path to the log file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.fileId = None
+        """(device, inode) of the file, used to notice when the file is replaced."""
+        self.offset = 0
+        """How many bytes of the file have been read."""
+        self.partial = b""
+        """The end of the last line, if it wasn't written completely yet."""
+
+    def Poll(self):
+        """Read the lines added since the last poll.
+
+        Returns:
+            tuple[list[str], bool]: The new lines, and whether the file was restarted (the lines are from the start of a new file).
+        """
+        stat = os.stat(self.path)
+        fileId = (stat.st_dev, stat.st_ino)
+        restarted = False
+        if fileId != self.fileId or stat.st_size < self.offset:
+            restarted = self.fileId != None
+            self.fileId = fileId
+            self.offset = 0
+            self.partial = b""
+
+        if stat.st_size == self.offset:
+            return [], restarted
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            new = f.read(stat.st_size - self.offset)
+        self.offset += len(new)
+
+        # Only complete lines are returned, the rest is kept for the next poll
+        text = self.partial + new
+        end = text.rfind(b"\n") + 1
+        self.partial = text[end:]
+        lines = text[:end].decode("utf-8", errors="replace").splitlines(keepends=True)
+        return lines, restarted
+
+class logEventBus:
+    """Matches log lines against the subscribed patterns.
+
+    All patterns are combined into one regex that is run once per line, so lines that
+    don't match anything (almost all of them) are skipped after a single search. Only
+    the lines that match are checked against each pattern to find out which events they are.
+
+    Patterns that would match differently inside the combined regex (backreferences, flags)
+    are left out of it and checked against every line on their own.
+    """
+    def __init__(self):
+        self.patterns = {}
+        """event name -> compiled regex"""
+        self.combined = None
+        self.separate = {}
+        """event name -> compiled regex of the patterns that aren't in the combined regex"""
+
+    def Subscribe(self, name, pattern):
+        """Add a pattern. If there already is a pattern with the same name it's replaced.
+
+        Args:
+            name (str): Name of the event.
+            pattern (str | re.Pattern): Regex that is searched for in each line.
+        """
+        if type(pattern) == str:
+            pattern = re.compile(pattern)
+        self.patterns[name] = pattern
+        self.Combine()
+
+    def Unsubscribe(self, name):
+        self.patterns.pop(name, None)
+        self.Combine()
+
+    def Combine(self):
+        # The group numbers and names change in the combined regex, so backreferences (\1, (?P=name), (?(1)...))
+        # would point to the wrong group. The flags of compiled patterns aren't carried over either.
+        self.separate = {name: pattern for name, pattern in self.patterns.items()
+                         if pattern.flags != re.UNICODE or re.search(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?P=|\(\?\(", pattern.pattern)}
+        # The group names are removed from the combined regex, so that patterns can use the same names
+        sources = [re.sub(r"\(\?P<\w+>", "(?:", pattern.pattern) for name, pattern in self.patterns.items() if name not in self.separate]
+        try:
+            self.combined = re.compile("|".join(f"(?:{source})" for source in sources)) if sources != [] else None
+        except re.error:
+            # Patterns that can't be combined (for example with flags in the middle) are checked one by one
+            self.combined = None
+            self.separate = dict(self.patterns)
+
+    def Match(self, lines):
+        """Find the events in the lines.
+
+        Args:
+            lines (list[str]): The new log lines.
+
+        Returns:
+            list[dict]: {"name", "line", "groups", "values"} of each event, in the order they were logged.
+                groups is match.groupdict() and values is match.groups().
+        """
+        if self.patterns == {}:
+            return []
+
+        events = []
+        combined = self.combined
+        separate = self.separate
+        for line in lines:
+            if combined == None or combined.search(line) != None:
+                candidates = self.patterns
+            elif separate != {}:
+                candidates = separate
+            else:
+                continue
+            for name, pattern in candidates.items():
+                match = pattern.search(line)
+                if match != None:
+                    events.append({"name": name, "line": line.rstrip("\r\n"), "groups": match.groupdict(), "values": match.groups()})
+        return events
+
+follower = logFollower(ets2FilePath)
+events = logEventBus()
+lastPoll = 0
+
+def Subscribe(name:str, pattern):
+    """Get an event in data["logEvents"] each time a line matching the pattern is logged.
+
+    Args:
+        name (str): Name of the event.
+        pattern (str | re.Pattern): Regex that is searched for in each line.
+    """
+    events.Subscribe(name, pattern)
+
+def Unsubscribe(name:str):
+    events.Unsubscribe(name)
+
+def CheckForCrackedGame(logEvents):
     global hasShownCrackError
-    crackIdentifier = "0000007E"
-    for line in data["log"]:
-        if crackIdentifier in line:
+    for event in logEvents:
+        if event["name"] == "dllLoadError":
             if not hasShownCrackError:
                 helpers.ShowFailure("\nThis is almost certainly due to a cracked game or DLC. It might just be a broken DLL though.\nIf the app and game works then fine, but if you see this error we will not help with diagnosing the issue.", "DLL load error detected!")
                 print("Possible cracked game detected.")
                 hasShownCrackError = True
-        
+
+Subscribe("dllLoadError", "0000007E")
+Subscribe("sdk", r"\[sdk\] (?P<message>.*)")
+
 
 def plugin(data):
-    global currentFileHash
     global currentLines
-    
+    global lastPoll
+
+    data["log"] = currentLines
+    data["logEvents"] = []
+    if time.time() - lastPoll < pollInterval:
+        return data
+    lastPoll = time.time()
+
     try:
-        # Check if the file hash is the same as the last time we checked
-        fileHash = hashlib.md5(open(ets2FilePath, 'rb').read()).hexdigest()
-        if currentFileHash == fileHash:
+        lines, restarted = follower.Poll()
+        if restarted:
+            currentLines = []
             data["log"] = currentLines
-            CheckForCrackedGame(data)
-            return data
-        
-        currentFileHash = fileHash
-        currentLines = open(ets2FilePath, "r").readlines()
-        CheckForCrackedGame(data)
-
-        data["log"] = currentLines
+        if lines != []:
+            currentLines.extend(lines)
+            data["logEvents"] = events.Match(lines)
+            CheckForCrackedGame(data["logEvents"])
     except:
         pass
-    return data
\ No newline at end of file
+    return data
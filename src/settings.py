@@ -2,6 +2,11 @@
 Provides an interface to read and write settings from the main JSON file.
 Ideally all settings should be stored using this interface.
 
+The settings are kept in memory, so reading a setting is a dictionary lookup. Changes are written
+to the file in the background, bursts of changes (for example dragging a slider) are combined into
+one write. If the file is changed by something else (for example the setup scripts) it will be
+reloaded automatically.
+
 Main functions:
 ```python
 # Will create (or update) a new setting in the settings file.
@@ -9,13 +14,27 @@ CreateSettings(category, name, data)
 
 # Will get a specific setting from the settings file.
 GetSettings(category, name, value=None) 
+
+# Will write any pending changes to the file right away.
+Flush()
+
+# Will call the function with a read only snapshot of the category each time a setting in it changes.
+Subscribe(category, callback)
+
+# Will get a read only snapshot of all the settings in a category.
+GetSnapshot(category)
 ```
 """
 import json
 from src.logger import print
-from src.variables import PATH, FRAMECOUNTER
+from src.variables import PATH
 import src.mainUI
 import src.helpers as helpers
+from types import MappingProxyType
+import threading
+import atexit
+import copy
+import time
 import os
 
 currentProfile = ""
@@ -78,9 +97,11 @@ def ChangeProfile():
     
     from tkinter import filedialog
     file = filedialog.askopenfilename(initialdir=PATH+"\\profiles", title="Select a profile", filetypes=(("JSON files", "*.json"), ("All files", "*.*")))
+    Flush()
     with open(currentProfile, "w") as f:
         f.truncate(0)
         f.write(file)
+    Reload()
     
     import src.variables
     src.variables.RELOAD = True
@@ -92,6 +113,7 @@ def CreateProfile():
     newFile = filedialog.asksaveasfile(initialdir=PATH+"\\profiles", initialfile="newProfile.json", title="Create a new profile", filetypes=(("JSON files", "*.json"), ("All files", "*.*")))
     try:       
         # Copy the current profile
+        Flush()
         profile = open(currentProfile, "r").readline().replace("\n", "")
             
         with open(profile, "r") as f:
@@ -111,6 +133,301 @@ def CreateProfile():
         print(ex.args)
         print("Failed to create profile")
 
+
+writeDelay = 0.5
+"""Seconds to wait after a change before writing the file. More changes during this time are written at the same time."""
+checkInterval = 1
+"""Seconds between checks for changes made to the file by something else."""
+
+store = None
+"""The settings of the current profile. Use the functions below instead of accessing this directly."""
+storeProfile = None
+"""The file the store was loaded from."""
+storeModified = None
+"""Modification time of the file when it was last read or written."""
+lastCheck = 0
+pendingKeys = set()
+"""(category, name) of the settings changed since the last write."""
+lastChange = 0
+lock = threading.RLock()
+writeLock = threading.Lock()
+"""Only one thread writes the file at a time. Never acquire lock while holding this."""
+writeSequence = 0
+"""Incremented for each snapshot that is written, so an older snapshot can't overwrite a newer one."""
+writtenSequence = 0
+writeEvent = threading.Event()
+writerThread = None
+subscribers = {}
+"""category -> list of callbacks"""
+snapshots = {}
+"""category -> settingsSnapshot, removed when the category changes."""
+changedCategories = set()
+"""Categories that have changed since the subscribers were last notified."""
+
+def Freeze(value):
+    """Make a read only copy of a setting. Lists become tuples and dicts become read only mappings."""
+    if type(value) == list or type(value) == tuple:
+        return tuple(Freeze(item) for item in value)
+    if type(value) == dict:
+        return MappingProxyType({key: Freeze(item) for key, item in value.items()})
+    return value
+
+class settingsSnapshot:
+    """A read only snapshot of the settings in one category. The values can be read as
+    attributes (snapshot.sensitivity) or with get(), which also converts the value to the
+    type of the default.
+
+    Args:
+        category (str): Json category.
+        values (dict): The settings in the category.
+    """
+    def __init__(self, category, values):
+        object.__setattr__(self, "category", category)
+        object.__setattr__(self, "values", Freeze(values))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings snapshots are read only, use settings.CreateSettings() to change a setting.")
+
+    def __getattr__(self, name):
+        try:
+            return self.values[name]
+        except KeyError:
+            raise AttributeError(f"No setting {name} in {self.category}")
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def __contains__(self, name):
+        return name in self.values
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"settingsSnapshot({self.category}, {dict(self.values)})"
+
+    def get(self, name:str, default:any=None):
+        """Get a setting from the snapshot.
+
+        Args:
+            name (str): Json setting name.
+            default (_type_, optional): Returned if the setting doesn't exist or is None. If it's an int or a float then
+                values saved as text (for example from an entry) are converted to it. Defaults to None.
+
+        Returns:
+            _type_: The setting (or the default value).
+        """
+        value = self.values.get(name)
+        if value == None:
+            return default
+        if type(default) in [int, float] and type(value) not in [int, float, bool]:
+            try:
+                return type(default)(value)
+            except:
+                return default
+        if type(default) == float and type(value) == int:
+            return float(value)
+        return value
+
+def GetSnapshot(category:str):
+    """Get a read only snapshot of a settings category. The same snapshot is returned until the category changes,
+    so this is cheap enough to call each frame.
+
+    Args:
+        category (str): Json category.
+
+    Returns:
+        settingsSnapshot: The settings in the category.
+    """
+    CheckForExternalChanges()
+    snapshot = snapshots.get(category)
+    if snapshot == None:
+        with lock:
+            snapshot = settingsSnapshot(category, store.get(category, {}))
+            snapshots[category] = snapshot
+    return snapshot
+
+def Subscribe(category:str, callback):
+    """Call a function each time a setting in the category changes. The function is called
+    from the main loop at most once per frame, even if many settings changed. It's also called
+    right away with the current settings.
+
+    Args:
+        category (str): Json category.
+        callback (function): Called as callback(snapshot) with a settingsSnapshot of the category.
+    """
+    if category not in subscribers:
+        subscribers[category] = []
+    if callback not in subscribers[category]:
+        subscribers[category].append(callback)
+    callback(GetSnapshot(category))
+
+def Unsubscribe(category:str, callback):
+    """Stop calling a function that was given to Subscribe().
+
+    Args:
+        category (str): Json category.
+        callback (function): The function.
+    """
+    try:
+        subscribers[category].remove(callback)
+    except: pass
+
+def CategoriesChanged(categories):
+    """Forget the old snapshots of the categories and notify the subscribers on the next frame."""
+    for category in categories:
+        snapshots.pop(category, None)
+        changedCategories.add(category)
+
+def NotifySubscribers():
+    """Call the subscribers of the categories that have changed. Called by the main loop once per frame."""
+    CheckForExternalChanges()
+    if changedCategories == set():
+        return
+    
+    with lock:
+        categories = list(changedCategories)
+        changedCategories.clear()
+    
+    for category in categories:
+        for callback in list(subscribers.get(category, [])):
+            try:
+                callback(GetSnapshot(category))
+            except Exception as ex:
+                print(f"Settings subscriber for {category} failed: {ex.args}")
+
+def GetProfile():
+    """Get the file of the currently selected profile.
+
+    Returns:
+        str: Path to the profile json file.
+    """
+    return open(currentProfile, "r").readline().replace("\n", "")
+
+def Reload():
+    """Will reload the settings from the current profile. Pending changes to the old profile are written first."""
+    global store, storeProfile, storeModified, lastCheck
+    with lock:
+        if storeProfile != None and pendingKeys != set():
+            Flush()
+        profile = GetProfile()
+        EnsureFile(profile)
+        with open(profile, "r") as f:
+            store = json.load(f)
+        CategoriesChanged(set(store) | set(snapshots) | set(subscribers))
+        storeProfile = profile
+        storeModified = os.path.getmtime(profile)
+        lastCheck = time.time()
+
+def CheckForExternalChanges():
+    """Reload the settings if the profile (or the file) was changed by something else.
+    Only checks once every checkInterval seconds."""
+    global lastCheck
+    if store != None and time.time() - lastCheck < checkInterval:
+        return
+    
+    with lock:
+        lastCheck = time.time()
+        if store == None or GetProfile() != storeProfile:
+            Reload()
+            return
+        MergeExternalChanges()
+
+def MergeExternalChanges():
+    """If the file was changed by something else, load it and keep our unwritten changes on top of it."""
+    global store, storeModified
+    with lock:
+        try:
+            modified = os.path.getmtime(storeProfile)
+        except:
+            return
+        if modified == storeModified:
+            return
+        
+        try:
+            with open(storeProfile, "r") as f:
+                external = json.load(f)
+        except:
+            return
+        for category, name in pendingKeys:
+            if category in store and name in store[category]:
+                external.setdefault(category, {})[name] = store[category][name]
+        CategoriesChanged([category for category in set(store) | set(external) if store.get(category) != external.get(category)])
+        store = external
+        storeModified = modified
+
+def WriterThread():
+    while True:
+        writeEvent.wait()
+        # Wait until the changes stop for a moment
+        while time.time() - lastChange < writeDelay:
+            time.sleep(writeDelay - (time.time() - lastChange))
+        writeEvent.clear()
+        try:
+            Flush()
+        except Exception as ex:
+            print(ex.args)
+
+def Changed(category:str, name:str):
+    """Mark a setting as changed, it will be written to the file by the writer thread."""
+    global lastChange, writerThread
+    pendingKeys.add((category, name))
+    CategoriesChanged([category])
+    lastChange = time.time()
+    if writerThread == None:
+        writerThread = threading.Thread(target=WriterThread, name="Settings writer", daemon=True)
+        writerThread.start()
+    writeEvent.set()
+
+def Flush():
+    """Write all pending changes to the file right away."""
+    global storeModified, writeSequence, writtenSequence
+    # Only the snapshot is taken under the lock, so other threads aren't blocked by the disk
+    with lock:
+        if store == None or pendingKeys == set():
+            return
+        
+        # Don't overwrite changes made to the file since it was last read
+        MergeExternalChanges()
+        
+        text = json.dumps(store, indent=6)
+        profile = storeProfile
+        written = set(pendingKeys)
+        pendingKeys.clear()
+        writeSequence += 1
+        sequence = writeSequence
+    
+    try:
+        with writeLock:
+            if sequence < writtenSequence:
+                return
+            
+            # Write to a temporary file and then replace the old one, so the file is never half written
+            temp = profile + ".tmp"
+            with open(temp, "w") as f:
+                f.write(text)
+            try:
+                os.replace(temp, profile)
+            except PermissionError:
+                # The file is open somewhere else (windows), write it directly instead
+                with open(profile, "w") as f:
+                    f.write(text)
+                os.remove(temp)
+            
+            writtenSequence = sequence
+            if profile == storeProfile:
+                storeModified = os.path.getmtime(profile)
+    except:
+        # Try again with the next write
+        with lock:
+            pendingKeys.update(written)
+        raise
+
+atexit.register(Flush)
+
 # Change settings in the json file
 def UpdateSettings(category:str, name:str, data:any):
     """Update a setting in the settings file.
@@ -121,27 +438,9 @@ def UpdateSettings(category:str, name:str, data:any):
         name (str): Json setting name.
         data (_type_): Data to write.
     """
-    global currentFrameSettings, frameCounter
-    try:
-        profile = open(currentProfile, "r").readline().replace("\n", "")
-        EnsureFile(profile)
-        with open(profile, "r") as f:
-            settings = json.load(f)
-
-        settings[category][name] = data
-        with open(profile, "w") as f:
-            f.truncate(0)
-            json.dump(settings, f, indent=6)
-            
-        currentFrameSettings = settings
-        frameCounter = FRAMECOUNTER
-        
-    except Exception as ex:
-        pass
+    CreateSettings(category, name, data)
 
 # Get a specific setting
-currentFrameSettings = {}
-frameCounter = -1
 def GetSettings(category:str, name:str, value:any=None):
     """Will get a specific setting from the settings file.
 
@@ -153,22 +452,17 @@ def GetSettings(category:str, name:str, value:any=None):
     Returns:
         _type_: The data from the json file. (or the default value)
     """
-    global frameCounter, currentFrameSettings
     try:
-        if frameCounter != FRAMECOUNTER:
-            profile = open(currentProfile, "r").readline().replace("\n", "")
-            EnsureFile(profile)
-            with open(profile, "r") as f:
-                settings = json.load(f)
-                currentFrameSettings = settings
-            frameCounter = FRAMECOUNTER
-        else:
-            settings = currentFrameSettings
+        CheckForExternalChanges()
         
-        if settings[category][name] == None:
-            return value    
+        setting = store[category][name]
+        if setting == None:
+            return value
         
-        return settings[category][name]
+        # Lists and dicts are copied so that changing them doesn't change the settings
+        if type(setting) == list or type(setting) == dict:
+            return copy.deepcopy(setting)
+        return setting
     except Exception as ex:
         if value != None:
             CreateSettings(category, name, value)
@@ -186,28 +480,15 @@ def CreateSettings(category:str, name:str, data:any):
         name (str): Json setting name.
         data (_type_): Data to write.
     """
-    global currentFrameSettings, frameCounter
     try:
-        profile = open(currentProfile, "r").readline().replace("\n", "")
-        EnsureFile(profile)
-        with open(profile, "r") as f:
-            settings = json.load(f)
-
-        # If the setting doesn't exist then create it 
-        if not category in settings:
-            settings[category] = {}
-            settings[category][name] = data
-        
-        # If the setting exists then overwrite it
-        if category in settings:
-            settings[category][name] = data
-            
-        with open(profile, "w") as f:
-            f.truncate(0)
-            json.dump(settings, f, indent=6)
-            
-        currentFrameSettings = settings
-        frameCounter = FRAMECOUNTER
+        with lock:
+            CheckForExternalChanges()
+            if not category in store:
+                store[category] = {}
+            if name in store[category] and store[category][name] == data:
+                return
+            store[category][name] = copy.deepcopy(data)
+            Changed(category, name)
     except Exception as ex:
         pass
         
@@ -220,56 +501,23 @@ def AddToList(category:str, name:str, data:any, exclusive:bool=False):
         data (str): Data to add to the list.
         exclusive (bool, optional): Whether to allow adding multiple instances of the same data. Defaults to False.
     """
-    global currentFrameSettings, frameCounter
     try:
-        profile = open(currentProfile, "r").readline().replace("\n", "")
-        EnsureFile(profile)
-        with open(profile, "r") as f:
-            settings = json.load(f)
-
-        # If the setting doesn't exist then create it 
-        if not category in settings:
-            settings[category] = {}
-            settings[category][name] = []
-            # Check if the data is a list
-            if isinstance(data, list):
-                for item in data:
-                    settings[category][name].append(item)
-            else:
-                settings[category][name].append(data)
-        
-        if not name in settings[category]:
-            settings[category][name] = []
-            # Check if the data is a list
-            if isinstance(data, list):
-                for item in data:
-                    settings[category][name].append(item)
-            else:
-                settings[category][name].append(data)
-        
-        # If the setting exists then overwrite it
-        if category in settings:
-            # Check if the data is a list
-            if isinstance(data, list):
-                for item in data:
-                    if exclusive:
-                        if not item in settings[category][name]:
-                            settings[category][name].append(item)
-                    else:
-                        settings[category][name].append(item)
-            else:
-                if exclusive:
-                    if not data in settings[category][name]:
-                        settings[category][name].append(data)
-                else:
-                    settings[category][name].append(data)
+        with lock:
+            CheckForExternalChanges()
+            # If the setting doesn't exist then create it 
+            if not category in store:
+                store[category] = {}
+            if not name in store[category]:
+                store[category][name] = []
             
-        with open(profile, "w") as f:
-            f.truncate(0)
-            json.dump(settings, f, indent=6)
+            # Check if the data is a list
+            items = data if isinstance(data, list) else [data]
+            for item in items:
+                if exclusive and item in store[category][name]:
+                    continue
+                store[category][name].append(copy.deepcopy(item))
             
-        currentFrameSettings = settings
-        frameCounter = FRAMECOUNTER
+            Changed(category, name)
     except Exception as ex:
         pass
         
@@ -282,27 +530,15 @@ def RemoveFromList(category:str, name:str, data:any):
         name (str): Json list name.
         data (_type_): Data to remove from the list.
     """
-    global currentFrameSettings, frameCounter
     try:
-        profile = open(currentProfile, "r").readline().replace("\n", "")
-        EnsureFile(profile)
-        with open(profile, "r") as f:
-            settings = json.load(f)
-
-        # If the setting doesn't exist then don't do anything 
-        if not category in settings:
-            return
-        
-        # If the setting exists then overwrite it
-        if category in settings:
-            settings[category][name].remove(data)
-            
-        with open(profile, "w") as f:
-            f.truncate(0)
-            json.dump(settings, f, indent=6)
+        with lock:
+            CheckForExternalChanges()
+            # If the setting doesn't exist then don't do anything 
+            if not category in store:
+                return
             
-        currentFrameSettings = settings
-        frameCounter = FRAMECOUNTER
+            store[category][name].remove(data)
+            Changed(category, name)
         
     except Exception as ex:
-        pass
\ No newline at end of file
+        pass